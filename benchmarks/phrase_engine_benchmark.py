@@ -0,0 +1,106 @@
+"""
+GRKKMAI response styling microbenchmark
+
+Times GRKKMAIPersonality.generate_response_style and
+GRKKMAI._add_personality_touches on the precompiled PhraseEngine against the
+previous implementation, which rebuilt its phrase lists, lowercased the text
+and scanned the keywords on every call.
+
+Usage: python benchmarks/phrase_engine_benchmark.py [--calls 200000]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Callable, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+TEXTS = [
+    "Okay, could you tell me more about this?",
+    "I'm sorry you're feeling sad, that sounds like a difficult problem.",
+    "Here is what I found about black holes: they bend light and time around them.",
+    "Hello there! Always happy to chat with you.",
+    "That issue has been troubling a lot of people who work with sqlite lately.",
+]
+
+
+def legacy_response_style(traits, base_response: str) -> str:
+    modified_response = base_response
+    if random.random() < traits["curiosity"] * 0.8:
+        follow_ups = [" What do you think about that?", " How did you discover that?", " Can you tell me more?",
+                      " That's fascinating - what else is there to know?", " I'm so curious to learn more!"]
+        modified_response += random.choice(follow_ups)
+    if random.random() < traits["enthusiasm"] * 0.4:
+        enthusiasm_additions = [" That's so cool!", " Amazing!", " Wow!", " This is interesting!",
+                                " I think I've learned about this before!", " I love learning about this!"]
+        modified_response += random.choice(enthusiasm_additions)
+    if any(word in base_response.lower() for word in ["sad", "worried", "problem", "issue", "troubled", "trouble",
+                                                      "difficult"]):
+        if random.random() < traits["empathy"]:
+            empathy_additions = [" I'm here to help!", " You're not alone in this.",
+                                 " We can figure this out together!", " I care about how you're feeling.",
+                                 " I understand how you're feeling, and I wish to help you out!"]
+            modified_response += random.choice(empathy_additions)
+    return modified_response
+
+
+def legacy_touches(curiosity: float, response: str) -> str:
+    if random.random() < curiosity:
+        follow_ups = [" What do you think about that?", " Can you tell me more?", " How did you discover that?",
+                      " Isn't that interesting?", " What else interests you?", " Do you want to explore that further?"]
+        response += random.choice(follow_ups)
+    if random.random() < 0.3:
+        enthusiasm = [" That's so cool!", " Wow!", " Amazing!", " I want to learn more!", " Ooooh!",
+                      " This is interesting!"]
+        response += random.choice(enthusiasm)
+    return response
+
+
+def per_call_us(func: Callable[[str], str], texts: List[str], calls: int) -> float:
+    random.seed(0)
+    started = time.perf_counter()
+    for i in range(calls):
+        func(texts[i % len(texts)])
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GRKKMAI response styling microbenchmark")
+    parser.add_argument("--calls", type=int, default=200_000)
+    args = parser.parse_args()
+
+    from core.ai_brain import GRKKMAI
+
+    with tempfile.TemporaryDirectory(prefix="grkkm-phrases-") as data_dir, \
+            contextlib.redirect_stdout(io.StringIO()):
+        brain = GRKKMAI(data_dir=data_dir)
+        personality = brain.personality
+        traits = personality.trait_values()
+
+        results = [
+            ("generate_response_style", per_call_us(lambda text: legacy_response_style(traits, text), TEXTS, args.calls),
+             per_call_us(lambda text: personality.generate_response_style(text, {}), TEXTS, args.calls)),
+            ("_add_personality_touches", per_call_us(lambda text: legacy_touches(brain.curiosity, text), TEXTS,
+                                                     args.calls),
+             per_call_us(lambda text: brain._add_personality_touches(text, ""), TEXTS, args.calls)),
+        ]
+        recompiles = personality.phrases.recompiles
+
+    print(f"💬 {args.calls:,} calls per function")
+    print("-" * 68)
+    print(f"{'function':<26}{'previous':>12}{'phrase engine':>16}{'speed-up':>12}")
+    for name, legacy, engine in results:
+        print(f"{name:<26}{legacy:>10.2f}us{engine:>14.2f}us{legacy / engine:>11.1f}x")
+    print("-" * 68)
+    print(f"probability tables rebuilt {recompiles} time(s)")
+
+
+if __name__ == "__main__":
+    main()
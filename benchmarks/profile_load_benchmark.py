@@ -0,0 +1,117 @@
+"""
+GRKKMAI personality profile load benchmark
+
+Builds a profile with a large event history, saves it as JSON and as a binary
+.grkp profile (core/profile_format.py), checks that JSON -> binary -> JSON is
+lossless, then times:
+    - parsing each file into a config dict
+    - opening the binary profile and reading only what the personality keeps
+    - starting a GRKKMAIPersonality from each format
+
+Usage: python benchmarks/profile_load_benchmark.py [--events 100000] [--repeat 20]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from core.profile_format import BinaryProfile, load_profile, write_profile
+from core.trait_engine import MOOD_BOOSTS, TRAIT_EFFECTS
+
+INTERACTIONS = sorted(set(TRAIT_EFFECTS) | set(MOOD_BOOSTS))
+
+
+def build_profile(events: int, seed: int) -> Dict:
+    """A default personality with `events` synthetic personality events"""
+    from core.personality import GRKKMAIPersonality
+
+    with tempfile.TemporaryDirectory(prefix="grkkm-profile-") as work_dir, \
+            contextlib.redirect_stdout(io.StringIO()):
+        personality = GRKKMAIPersonality(os.path.join(work_dir, "personality_config.json"))
+        personality.flush()
+        with open(personality.config_file) as f:
+            config = json.load(f)
+
+    rng = random.Random(seed)
+    traits = list(config["traits"])
+    started = datetime(2025, 1, 1)
+    config["personality_events"] = [
+        {"timestamp": (started + timedelta(seconds=i, microseconds=rng.randrange(10 ** 6))).isoformat(),
+         "trigger": rng.choice(INTERACTIONS),
+         "context": {"session": f"user-{rng.randrange(50)}"} if rng.random() < 0.3 else {},
+         "traits_affected": traits}
+        for i in range(events)]
+    return config
+
+
+def best_of(repeat: int, func: Callable[[], object]) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GRKKMAI personality profile load benchmark")
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    from core.personality import GRKKMAIPersonality
+
+    config = build_profile(args.events, args.seed)
+    with tempfile.TemporaryDirectory(prefix="grkkm-profile-") as work_dir:
+        json_path = os.path.join(work_dir, "personality_config.json")
+        profile_path = os.path.join(work_dir, "personality.grkp")
+        with open(json_path, "w") as f:
+            json.dump(config, f, separators=(",", ":"))
+        write_profile(config, profile_path)
+        lossless = load_profile(profile_path) == json.loads(json.dumps(config))
+
+        def load_json():
+            with open(json_path) as f:
+                return json.load(f)
+
+        def open_binary():
+            with BinaryProfile(profile_path) as profile:
+                return profile.traits(), profile.events[-100:]
+
+        def start(path):
+            with contextlib.redirect_stdout(io.StringIO()):
+                personality = GRKKMAIPersonality(path, snapshot_interval=10 ** 9)
+            personality._snapshot_seq = personality._seq  # nothing to write back on exit
+
+        results = [
+            ("json.load, all events", best_of(args.repeat, load_json)),
+            ("binary, all events", best_of(args.repeat, lambda: load_profile(profile_path))),
+            ("binary, traits + last 100 events", best_of(args.repeat, open_binary)),
+            ("GRKKMAIPersonality from JSON", best_of(args.repeat, lambda: start(json_path))),
+            ("GRKKMAIPersonality from .grkp", best_of(args.repeat, lambda: start(profile_path))),
+        ]
+        sizes = os.path.getsize(json_path), os.path.getsize(profile_path)
+
+    print(f"🧠 profile with {args.events:,} events: JSON {sizes[0] / 1024:,.0f} KB, "
+          f"binary {sizes[1] / 1024:,.0f} KB")
+    print("-" * 64)
+    for label, elapsed in results:
+        print(f"{label:<36}{elapsed * 1000:12.3f} ms")
+    print("-" * 64)
+    print(f"JSON -> binary -> JSON lossless: {'yes' if lossless else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
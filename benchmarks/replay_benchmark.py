@@ -0,0 +1,291 @@
+"""
+GRKKMAI transcript replay benchmark
+
+Feeds a JSONL transcript of user messages through GRKKMAI.think() with a seeded
+RNG, a stub search backend and throw-away databases. It reports turns/sec,
+turn latency percentiles, peak RSS and database growth, then compares them
+with a stored baseline.
+
+Transcript lines: {"message": "...", "consent": "yes"|"no"}, where "consent"
+answers the save question if the turn asks one (default "no").
+
+Usage: python benchmarks/replay_benchmark.py [--transcript PATH] [--repeat N] [--runs N] [--speculative-lookup]
+                                             [--baseline PATH] [--update-baseline]
+Every metric is the median of --runs fresh replays. Exits with status 1 when a
+result regresses past the tolerance. Throughput and RSS are only compared on the
+machine the baseline was recorded on.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from core.tracing import percentile
+
+DEFAULT_TRANSCRIPT = os.path.join(REPO_ROOT, "data", "replay_transcript.jsonl")
+DEFAULT_BASELINE = os.path.join(REPO_ROOT, "benchmarks", "replay_baseline.json")
+
+# Allowed relative change against the baseline before a metric counts as a regression
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_RUNS = 5
+HIGHER_IS_BETTER = ("turns_per_sec",)
+# p99 of one replay is about its slowest turn, so it is reported but not gated
+LOWER_IS_BETTER = ("p50_ms", "p95_ms", "peak_rss_mb", "db_growth_kb")
+# Only meaningful against a baseline from the same machine and interpreter
+MACHINE_DEPENDENT = ("turns_per_sec", "peak_rss_mb")
+# Latency changes smaller than this (ms) are scheduler noise, whatever the percentage
+ABSOLUTE_SLACK = {"p50_ms": 1.0, "p95_ms": 2.0}
+# Metrics that are summarised by their median over the runs
+MEDIAN_KEYS = ("elapsed_s", "turns_per_sec", "p50_ms", "p95_ms", "p99_ms", "max_ms", "db_growth_kb")
+
+
+class StubSearchBackend:
+    def __init__(self, seed: int = 0, latency_ms: float = 5.0):
+        """DDGS look-alike with deterministic results and a simulated network delay"""
+        self.seed = seed
+        self.latency_ms = latency_ms
+        self.calls = 0
+
+    def text(self, query: str, max_results: int = 3) -> List[Dict]:
+        self.calls += 1
+        rng = random.Random(f"{self.seed}:{query}")
+        # Jitter the delay by +-50% so the percentiles are not all the same
+        time.sleep(self.latency_ms * rng.uniform(0.5, 1.5) / 1000)
+
+        slug = "-".join(query.lower().split()[:4])
+        return [
+            {
+                "title": f"{query.title()} - result {i + 1}",
+                "href": f"https://example{rng.randint(1, 5)}.org/{slug}/{i}",
+                "body": (f"{query.capitalize()} is a topic with {rng.randint(2, 40)} key ideas. "
+                         f"It includes examples, features and a {rng.randint(10, 90)}% adoption rate. "
+                         f"Research from {rng.randint(1990, 2024)} explains how it works.")
+            }
+            for i in range(max_results)
+        ]
+
+
+def load_transcript(path: str) -> List[Dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is kilobytes on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def db_sizes(data_dir: str) -> Dict[str, int]:
+    """Bytes used by every SQLite file (WAL and journal files included)"""
+    sizes = {}
+    for name in os.listdir(data_dir):
+        if ".db" in name:
+            sizes[name] = os.path.getsize(os.path.join(data_dir, name))
+    return sizes
+
+
+def replay(transcript: List[Dict], seed: int = 0, repeat: int = 1, search_latency_ms: float = 5.0,
+           speculative_lookup: bool = False, verbose: bool = False) -> Dict:
+    """Replay a transcript against a fresh GRKKMAI and measure it"""
+    from core.ai_brain import GRKKMAI
+
+    random.seed(seed)
+    backend = StubSearchBackend(seed, search_latency_ms)
+
+    with tempfile.TemporaryDirectory(prefix="grkkm-replay-") as data_dir:
+        shutil.copy(os.path.join(REPO_ROOT, "data", "personality_config.json"), data_dir)
+
+        # Build everything up front so start-up cost stays out of the numbers
+        quiet = io.StringIO()
+        with contextlib.redirect_stdout(quiet):
+            ai = GRKKMAI(data_dir=data_dir, search_backend=backend, speculative_lookup=speculative_lookup)
+            ai.warm_up().join()
+        ai.storage.checkpoint()
+        sizes_before = db_sizes(data_dir)
+
+        latencies = []
+        consents = 0
+        started = time.perf_counter()
+
+        for _ in range(repeat):
+            for entry in transcript:
+                turn_started = time.perf_counter()
+                with contextlib.redirect_stdout(quiet):
+                    response = ai.think(entry["message"])
+                latencies.append(time.perf_counter() - turn_started)
+
+                if verbose:
+                    print(f"> {entry['message']}\n{response[:120]}\n")
+
+                pending = ai.pending_save
+                if pending and ai.search_memory:
+                    with contextlib.redirect_stdout(quiet):
+                        ai.search_memory.process_save_consent(entry.get("consent", "no"), pending["query"],
+                                                              pending["results"], pending["topic"])
+                    ai.pending_save = None
+                    consents += 1
+
+        # Spill what is still in RAM so every turn is counted in the database growth
+        with contextlib.redirect_stdout(quiet):
+            ai.conversation_history.flush()
+        elapsed = time.perf_counter() - started
+
+        if ai.advanced_search:
+            ai.advanced_search.prefetcher.cancel()
+        ai.storage.checkpoint()
+        sizes_after = db_sizes(data_dir)
+        ai.storage.close()
+
+    latencies.sort()
+    growth = {name: (sizes_after.get(name, 0) - sizes_before.get(name, 0)) / 1024 for name in sizes_after}
+    return {
+        "turns": len(latencies),
+        "consent_answers": consents,
+        "search_calls": backend.calls,
+        "elapsed_s": elapsed,
+        "turns_per_sec": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": (latencies[-1] if latencies else 0.0) * 1000,
+        "peak_rss_mb": peak_rss_mb(),
+        "db_growth_kb": sum(growth.values()),
+        "db_growth_by_file_kb": growth,
+    }
+
+
+def replay_runs(transcript: List[Dict], runs: int = DEFAULT_RUNS, **kwargs) -> Dict:
+    """Median of several replays, each against fresh databases"""
+    all_runs = [replay(transcript, **kwargs) for _ in range(max(1, runs))]
+    results = dict(all_runs[-1])
+    for key in MEDIAN_KEYS:
+        results[key] = statistics.median(run[key] for run in all_runs)
+    # ru_maxrss is a process-wide high-water mark: the last run has seen them all
+    results["runs"] = len(all_runs)
+    return results
+
+
+def machine_info() -> Dict:
+    return {
+        "system": platform.system(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+    }
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float, same_machine: bool = True) -> List[str]:
+    """Human-readable regressions of `results` against `baseline`"""
+    regressions = []
+    for key in HIGHER_IS_BETTER + LOWER_IS_BETTER:
+        if key in MACHINE_DEPENDENT and not same_machine:
+            continue
+        now, before = results.get(key), baseline.get(key)
+        if now is None or not before:
+            continue
+        if abs(now - before) <= ABSOLUTE_SLACK.get(key, 0.0):
+            continue
+        change = (now - before) / before
+        if (key in HIGHER_IS_BETTER and change < -tolerance) or (key in LOWER_IS_BETTER and change > tolerance):
+            regressions.append(f"{key}: {before:.2f} -> {now:.2f} ({change:+.0%}, tolerance {tolerance:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GRKKMAI transcript replay benchmark")
+    parser.add_argument("--transcript", default=DEFAULT_TRANSCRIPT)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--repeat", type=int, default=1, help="replay the transcript N times")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS,
+                        help="fresh replays to take the median of (default %(default)s)")
+    parser.add_argument("--search-latency-ms", type=float, default=5.0, help="stub search backend delay")
+    parser.add_argument("--speculative-lookup", action="store_true",
+                        help="search the web while looking up saved research (GRKKMAI(speculative_lookup=True))")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="print every reply")
+    args = parser.parse_args()
+
+    transcript = load_transcript(args.transcript)
+    results = replay_runs(transcript, runs=args.runs, seed=args.seed, repeat=args.repeat,
+                          search_latency_ms=args.search_latency_ms, speculative_lookup=args.speculative_lookup,
+                          verbose=args.verbose)
+    results.update(transcript=os.path.relpath(args.transcript, REPO_ROOT), seed=args.seed, repeat=args.repeat,
+                   search_latency_ms=args.search_latency_ms, speculative_lookup=args.speculative_lookup,
+                   machine=machine_info())
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        rss = results["peak_rss_mb"]
+        print(f"🔁 REPLAY RESULTS (median of {results['runs']} runs)")
+        print("-" * 60)
+        print(f"turns:           {results['turns']} ({results['consent_answers']} save questions answered)")
+        print(f"search calls:    {results['search_calls']}")
+        print(f"throughput:      {results['turns_per_sec']:8.2f} turns/sec")
+        print(f"latency p50:     {results['p50_ms']:8.2f} ms")
+        print(f"latency p95:     {results['p95_ms']:8.2f} ms")
+        print(f"latency p99:     {results['p99_ms']:8.2f} ms")
+        print(f"latency max:     {results['max_ms']:8.2f} ms")
+        print(f"peak RSS:        {rss:8.2f} MB" if rss is not None else "peak RSS:        n/a")
+        print(f"DB growth:       {results['db_growth_kb']:8.2f} KB")
+        for name, kb in sorted(results["db_growth_by_file_kb"].items()):
+            print(f"    {name:<24} {kb:8.2f} KB")
+        print("-" * 60)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        print(f"💾 Baseline written to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"⚠️ No baseline at {args.baseline}; run with --update-baseline to create one.")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    settings = ("transcript", "seed", "repeat", "search_latency_ms", "speculative_lookup")
+    if any(baseline.get(key, False) != results[key] for key in settings):
+        print("⚠️ Baseline was recorded with different settings; comparing anyway.")
+    same_machine = baseline.get("machine") == results["machine"]
+    if not same_machine:
+        print(f"⚠️ Baseline was recorded on another machine; not comparing {', '.join(MACHINE_DEPENDENT)}.")
+
+    regressions = compare(results, baseline, args.tolerance, same_machine)
+    if regressions:
+        print("❌ PERFORMANCE REGRESSION against the baseline:")
+        for line in regressions:
+            print(f"   {line}")
+        sys.exit(1)
+    print("✅ No regression against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
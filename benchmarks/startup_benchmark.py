@@ -0,0 +1,103 @@
+"""
+GRKKMAI import-time and start-up benchmark
+
+Usage: python benchmarks/startup_benchmark.py [--runs N] [--top N]
+Exits with status 1 when the import or start-up time goes over budget.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Target budgets (milliseconds)
+IMPORT_BUDGET_MS = 60.0     # python -X importtime cumulative for core.ai_brain
+STARTUP_BUDGET_MS = 150.0   # GRKKMAI() plus a first greeting, imports included
+
+STARTUP_SNIPPET = """
+import time
+started = time.perf_counter()
+from core.ai_brain import GRKKMAI
+ai = GRKKMAI()
+ready = time.perf_counter()
+ai.think("hello")
+answered = time.perf_counter()
+print(f"STARTUP {(ready - started) * 1000:.3f} {(answered - started) * 1000:.3f}")
+"""
+
+
+def import_breakdown(module: str = "core.ai_brain"):
+    """Run `python -X importtime -c 'import <module>'` and parse its report"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT, capture_output=True, text=True
+    )
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.rstrip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def measure_startup(runs: int):
+    """Time GRKKMAI() and a first greeting in fresh interpreters"""
+    ready_times, answer_times = [], []
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.makedirs(os.path.join(workdir, "data"))
+        env = dict(os.environ, PYTHONPATH=REPO_ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+
+        for _ in range(runs):
+            proc = subprocess.run([sys.executable, "-c", STARTUP_SNIPPET], cwd=workdir, env=env,
+                                  capture_output=True, text=True)
+            for line in proc.stdout.splitlines():
+                if line.startswith("STARTUP"):
+                    _, ready, answered = line.split()
+                    ready_times.append(float(ready))
+                    answer_times.append(float(answered))
+
+            if proc.returncode != 0:
+                print(proc.stderr)
+                raise SystemExit("start-up run failed")
+
+    return ready_times, answer_times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GRKKMAI import/start-up benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    rows = import_breakdown()
+    total_ms = next((cum for name, _, cum in rows if name.strip() == "core.ai_brain"), 0) / 1000
+
+    print(f"📦 IMPORT TIME (top {args.top} by cumulative)")
+    print("-" * 60)
+    print(f"{'self ms':>9} {'cumul ms':>9}  module")
+    for name, self_us, cumulative_us in sorted(rows, key=lambda r: r[2], reverse=True)[:args.top]:
+        print(f"{self_us / 1000:9.2f} {cumulative_us / 1000:9.2f}  {name}")
+    print("-" * 60)
+
+    ready_times, answer_times = measure_startup(args.runs)
+    ready_ms = statistics.median(ready_times)
+    answer_ms = statistics.median(answer_times)
+
+    print(f"⏱️  import core.ai_brain:        {total_ms:8.2f} ms (budget {IMPORT_BUDGET_MS:.0f} ms)")
+    print(f"⏱️  GRKKMAI() ready (median):    {ready_ms:8.2f} ms")
+    print(f"⏱️  first greeting (median):     {answer_ms:8.2f} ms (budget {STARTUP_BUDGET_MS:.0f} ms)")
+
+    over_budget = total_ms > IMPORT_BUDGET_MS or answer_ms > STARTUP_BUDGET_MS
+    print("❌ Over budget!" if over_budget else "✅ Within budget.")
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
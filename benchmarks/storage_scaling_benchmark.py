@@ -0,0 +1,137 @@
+"""
+GRKKMAI storage scaling benchmark
+
+Generates synthetic databases at several scales (see synthetic_data.py) and
+times find_memory, find_saved_research, get_saved_topics and get_memory_stats
+on each, so the latency curves show how GRKKMAI_MEMORY and SRM scale.
+
+Usage: python benchmarks/storage_scaling_benchmark.py [--scales 10000,100000,1000000]
+                                                      [--runs N] [--plot scaling.png]
+Plotting needs matplotlib; without it only the table is printed.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.synthetic_data import generate, table_sizes, vocabulary
+from core.tracing import percentile
+
+DEFAULT_SCALES = (10_000, 100_000, 1_000_000)
+OPERATIONS = ("find_memory", "find_saved_research", "get_saved_topics", "get_memory_stats",
+              "srm.get_memory_stats")
+
+
+def time_calls(func: Callable, args_list: List[tuple]) -> Dict[str, float]:
+    durations = []
+    for args in args_list:
+        started = time.perf_counter()
+        func(*args)
+        durations.append(time.perf_counter() - started)
+    durations.sort()
+    return {"p50_ms": percentile(durations, 0.50) * 1000, "p95_ms": percentile(durations, 0.95) * 1000,
+            "max_ms": durations[-1] * 1000}
+
+
+def bench_scale(scale: int, runs: int, seed: int, work_dir: str) -> Dict[str, Dict[str, float]]:
+    """Time every operation against databases of one scale"""
+    from core.memory_system import GRKKMAI_MEMORY
+    from core.search_memory import SRM
+    from core.storage import StorageEngine
+
+    out_dir = os.path.join(work_dir, f"scale-{scale}")
+    print(f"🏭 Generating scale {scale:,} ({', '.join(f'{t} {n:,}' for t, n in table_sizes(scale).items())})")
+    with contextlib.redirect_stdout(io.StringIO()):
+        storage = StorageEngine(generate(out_dir, scale, seed=seed, verbose=False))
+        memory = GRKKMAI_MEMORY(storage=storage)
+        search_memory = SRM(storage=storage)
+
+    # Mix of hits and misses, like real lookups
+    rng = random.Random(seed)
+    topics = vocabulary()
+    terms = [(rng.choice(topics) if rng.random() < 0.8 else f"unknown topic {i}",) for i in range(runs)]
+
+    results = {
+        "find_memory": time_calls(memory.find_memory, terms),
+        "find_saved_research": time_calls(search_memory.find_saved_research, terms),
+        "get_saved_topics": time_calls(search_memory.get_saved_topics, [()] * max(1, runs // 10)),
+        "get_memory_stats": time_calls(memory.get_memory_stats, [()] * max(1, runs // 10)),
+        "srm.get_memory_stats": time_calls(search_memory.get_memory_stats, [()] * max(1, runs // 10)),
+    }
+    storage.close()
+    return results
+
+
+def plot(results: Dict[int, Dict[str, Dict[str, float]]], path: str) -> bool:
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("⚠️ matplotlib is not installed, skipping the plot")
+        return False
+
+    scales = sorted(results)
+    fig, ax = plt.subplots(figsize=(8, 5))
+    for operation in OPERATIONS:
+        ax.plot(scales, [results[scale][operation]["p50_ms"] for scale in scales], marker="o", label=operation)
+    ax.set_xscale("log")
+    ax.set_yscale("log")
+    ax.set_xlabel("scale (conversations)")
+    ax.set_ylabel("p50 latency (ms)")
+    ax.set_title("GRKKMAI storage scaling")
+    ax.grid(True, which="both", alpha=0.3)
+    ax.legend()
+    fig.tight_layout()
+    fig.savefig(path)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GRKKMAI storage scaling benchmark")
+    parser.add_argument("--scales", default=",".join(str(s) for s in DEFAULT_SCALES),
+                        help="comma-separated scales (conversations per database)")
+    parser.add_argument("--runs", type=int, default=200, help="lookups per operation and scale")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--work-dir", help="keep the generated databases here (default: a temp dir)")
+    parser.add_argument("--plot", help="write the latency curves to this image file")
+    parser.add_argument("--json", help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    scales = [int(float(s)) for s in args.scales.split(",") if s.strip()]
+    results = {}
+
+    with tempfile.TemporaryDirectory(prefix="grkkm-scaling-") as temp_dir:
+        for scale in scales:
+            results[scale] = bench_scale(scale, args.runs, args.seed, args.work_dir or temp_dir)
+
+    print("\n📈 STORAGE SCALING (p50 / p95 ms)")
+    print("-" * (24 + 20 * len(scales)))
+    print(f"{'operation':<24}" + "".join(f"{scale:>20,}" for scale in scales))
+    for operation in OPERATIONS:
+        cells = "".join(f"{results[s][operation]['p50_ms']:>11.2f} / {results[s][operation]['p95_ms']:<6.2f}"
+                        for s in scales)
+        print(f"{operation:<24}{cells}")
+    print("-" * (24 + 20 * len(scales)))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({str(scale): ops for scale, ops in results.items()}, f, indent=2)
+        print(f"💾 Results written to {args.json}")
+
+    if args.plot and plot(results, args.plot):
+        print(f"🖼️ Latency curves written to {args.plot}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+GRKKMAI write throughput under concurrent sessions
+
+Compares the shared StorageEngine (one database, one group-committing writer)
+with the previous layout, where every write opened its own connection to one
+of two database files and committed on its own.
+
+Usage: python benchmarks/storage_write_benchmark.py [--sessions 16] [--writes 200]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+
+def run_sessions(sessions: int, writes: int, write: Callable[[int, int], None]) -> float:
+    """Run `sessions` threads doing `writes` writes each; returns writes/sec"""
+    barrier = threading.Barrier(sessions + 1)
+
+    def session(number: int):
+        barrier.wait()
+        for i in range(writes):
+            write(number, i)
+
+    threads = [threading.Thread(target=session, args=(n,)) for n in range(sessions)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return sessions * writes / (time.perf_counter() - started)
+
+
+def bench_legacy(work_dir: str, sessions: int, writes: int) -> float:
+    """Connection per write, memory and search memory in separate files"""
+    memory_path = os.path.join(work_dir, "GRKKMAI_MEMORY.db")
+    search_path = os.path.join(work_dir, "search_memory.db")
+    for path, table in ((memory_path, "conversations"), (search_path, "search_consent")):
+        conn = sqlite3.connect(path)
+        conn.execute(f"CREATE TABLE {table} (id INTEGER PRIMARY KEY AUTOINCREMENT, a TEXT, b TEXT, "
+                     "timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)")
+        conn.commit()
+        conn.close()
+
+    def write(session: int, i: int):
+        path, table = (memory_path, "conversations") if i % 2 else (search_path, "search_consent")
+        conn = sqlite3.connect(path, timeout=30)
+        conn.execute(f"INSERT INTO {table} (a, b) VALUES (?, ?)", (f"session-{session}", f"message {i}"))
+        conn.commit()
+        conn.close()
+
+    return run_sessions(sessions, writes, write)
+
+
+def bench_engine(work_dir: str, sessions: int, writes: int) -> float:
+    """The repositories over one shared StorageEngine"""
+    from core.memory_system import GRKKMAI_MEMORY
+    from core.search_memory import SRM
+    from core.storage import StorageEngine
+
+    storage = StorageEngine(os.path.join(work_dir, "grkkmai.db"))
+    with contextlib.redirect_stdout(io.StringIO()):
+        memory = GRKKMAI_MEMORY(storage=storage)
+        search_memory = SRM(storage=storage)
+
+    def write(session: int, i: int):
+        if i % 2:
+            memory.store_conversation(f"message {i}", "response", f"session-{session}")
+        else:
+            search_memory._log_consent_request(f"message {i}", f"session-{session}")
+
+    rate = run_sessions(sessions, writes, write)
+    print(f"   group commit: {storage.writes_committed} writes in {storage.batches_committed} transactions")
+    storage.close()
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GRKKMAI concurrent write benchmark")
+    parser.add_argument("--sessions", type=int, default=16, help="concurrent writer threads")
+    parser.add_argument("--writes", type=int, default=200, help="writes per session")
+    args = parser.parse_args()
+
+    print(f"✍️  {args.sessions} sessions x {args.writes} writes")
+    with tempfile.TemporaryDirectory(prefix="grkkm-writes-") as legacy_dir:
+        legacy = bench_legacy(legacy_dir, args.sessions, args.writes)
+    with tempfile.TemporaryDirectory(prefix="grkkm-writes-") as engine_dir:
+        engine = bench_engine(engine_dir, args.sessions, args.writes)
+
+    print("-" * 60)
+    print(f"connection per write, two files: {legacy:10,.0f} writes/sec")
+    print(f"shared StorageEngine:            {engine:10,.0f} writes/sec ({engine / legacy:.1f}x)")
+    print("-" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+GRKKMAI instance synchronization benchmark
+
+Builds hundreds of replicas (core/sync.py), each with its own event history,
+memories and traits, then measures:
+    - a full merge of every replica into a fresh one
+    - catching up, and incremental rounds where instances only exchange new operations
+    - that merging in different orders converges to the same state
+
+Usage: python benchmarks/sync_merge_benchmark.py [--instances 200] [--events 500] [--seed 0]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from typing import List
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.synthetic_data import MEMORY_TYPES, VERBS, vocabulary
+from core.sync import SyncState
+from core.trait_engine import TRAIT_EFFECTS
+
+TRAITS = sorted({trait for effects in TRAIT_EFFECTS.values() for trait in effects})
+
+
+def build_replicas(instances: int, events: int, seed: int) -> List[SyncState]:
+    rng = random.Random(seed)
+    topics = vocabulary()
+    replicas = []
+    for number in range(instances):
+        replica = SyncState(f"tachikoma-{number:04d}")
+        for i in range(events):
+            replica.add_event({"timestamp": f"2025-01-01T00:{i // 60:02d}:{i % 60:02d}.{number:06d}",
+                               "trigger": rng.choice(list(TRAIT_EFFECTS)), "context": {},
+                               "traits_affected": TRAITS})
+        for _ in range(max(1, events // 20)):
+            key, value = rng.choice(VERBS), rng.choice(topics)
+            replica.put_memory(key, value, rng.choice(MEMORY_TYPES))
+            if rng.random() < 0.1:
+                replica.forget_memory(key, value)
+        replica.set_traits({trait: round(rng.random(), 6) for trait in TRAITS})
+        replicas.append(replica)
+    return replicas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GRKKMAI sync merge benchmark")
+    parser.add_argument("--instances", type=int, default=200)
+    parser.add_argument("--events", type=int, default=500, help="events per instance")
+    parser.add_argument("--rounds", type=int, default=5, help="incremental sync rounds")
+    parser.add_argument("--observers", type=int, default=5, help="instances that catch up and pull each round")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    replicas = build_replicas(args.instances, args.events, args.seed)
+    total_ops = sum(replica.op_count() for replica in replicas)
+    print(f"👯 {args.instances} instances, {total_ops:,} operations "
+          f"(built in {time.perf_counter() - started:.2f}s)")
+
+    # Full merge: a new instance catches up with everyone
+    hub = SyncState("hub")
+    started = time.perf_counter()
+    for replica in replicas:
+        hub.merge(replica.delta({}))
+    full_merge = time.perf_counter() - started
+
+    # Same operations, other orders: must converge
+    digests = {hub.digest()}
+    rng = random.Random(args.seed)
+    for _ in range(2):
+        ops = [op for replica in replicas for op in replica.delta({})]
+        rng.shuffle(ops)
+        other = SyncState("check")
+        for start in range(0, len(ops), 1000):
+            other.merge(ops[start:start + 1000])
+        digests.add(other.digest())
+
+    # Catching up: an existing instance pulls everything it has not seen
+    observers = replicas[:args.observers]
+    started = time.perf_counter()
+    for replica in observers:
+        replica.merge(hub.delta(replica.clock()))
+    catch_up = (time.perf_counter() - started) / max(1, len(observers))
+
+    # Incremental: every instance adds an event and pushes only that; the
+    # caught-up instances then pull only what is new
+    push_times, pull_times = [], []
+    for number in range(args.rounds):
+        for replica in replicas:
+            replica.add_event({"timestamp": f"2025-01-02T00:00:{number:02d}", "trigger": "question_asked",
+                               "context": {}})
+        started = time.perf_counter()
+        for replica in replicas:
+            hub.merge(replica.delta(hub.clock()))
+        push_times.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        for replica in observers:
+            replica.merge(hub.delta(replica.clock()))
+        pull_times.append((time.perf_counter() - started) / max(1, len(observers)))
+
+    print("-" * 64)
+    print(f"full merge:        {full_merge * 1000:10.1f} ms  {total_ops / full_merge:12,.0f} ops/sec")
+    print(f"catch-up:          {catch_up * 1000:10.1f} ms  per instance")
+    print(f"push round:        {sum(push_times) / len(push_times) * 1000:10.1f} ms  "
+          f"({args.instances} instances, one new op each)")
+    print(f"pull:              {sum(pull_times) / len(pull_times) * 1000:10.1f} ms  "
+          f"per instance per round ({args.instances} new ops)")
+    print(f"merged state:      {hub.op_count():,} ops, {len(hub.memories())} live memories, "
+          f"{len(hub.events()):,} events, {len(hub.traits())} trait sets")
+    print(f"converged:         {'yes' if len(digests) == 1 else 'NO'} ({len(digests)} distinct digest(s))")
+    print("-" * 64)
+
+
+if __name__ == "__main__":
+    main()
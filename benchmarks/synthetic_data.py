@@ -0,0 +1,189 @@
+"""
+Synthetic GRKKMAI databases for storage scaling tests
+
+Builds a realistic GRKKMAI database (the tables of GRKKMAI_MEMORY and SRM) with
+10^5 - 10^7 rows:
+memories, conversations, consent logs and saved searches, with skewed (Zipf-like)
+access counts. Rows are generated lazily and inserted with executemany in large
+transactions, so memory use stays flat at any scale. The same seed always gives
+the same databases.
+
+Usage: python benchmarks/synthetic_data.py --scale 1000000 [--out DIR] [--seed N]
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+# Rows per table for a given scale (the scale is the number of conversations)
+SCALE_MIX = {
+    "conversations": 1.0,
+    "explicit_memories": 0.1,
+    "consent_log": 0.2,
+    "search_results": 0.05,
+    "search_consent": 0.1,
+}
+DEFAULT_BATCH_SIZE = 50_000
+
+SUBJECTS = ["python", "rust", "coffee", "jazz", "chess", "hiking", "astronomy", "cooking", "linux", "sqlite",
+            "photosynthesis", "black holes", "the roman empire", "volcanoes", "machine learning", "tea",
+            "guitar", "origami", "marathons", "quantum computing", "gardening", "anime", "tachikoma", "sushi"]
+VERBS = ["like", "love", "study", "prefer", "work with", "dislike", "want to learn", "teach"]
+QUALIFIERS = ["basics", "history", "tips", "advanced topics", "news", "examples", "tools", "theory"]
+MEMORY_TYPES = ["preference", "fact", "goal", "skill"]
+CONSENT_ACTIONS = ["consent_requested", "consent_granted", "consent_declined"]
+SEARCH_CONSENT_ACTIONS = ["save_consent_requested", "save_consent_granted", "save_consent_declined"]
+
+
+def vocabulary() -> List[str]:
+    """Every topic phrase the generator can produce (also used to pick lookup terms)"""
+    return [f"{subject} {qualifier}" for subject in SUBJECTS for qualifier in QUALIFIERS]
+
+
+def table_sizes(scale: int) -> Dict[str, int]:
+    return {table: max(1, int(scale * share)) for table, share in SCALE_MIX.items()}
+
+
+class SyntheticData:
+    def __init__(self, seed: int = 0, span_days: int = 730):
+        """Seeded row factories for every GRKKMAI table"""
+        self.rng = random.Random(seed)
+        self.topics = vocabulary()
+        self.now = datetime(2025, 1, 1)
+        self.span_seconds = span_days * 86400
+
+    def _timestamp(self) -> str:
+        # SQLite's CURRENT_TIMESTAMP format, so date() and ORDER BY work as usual
+        moment = self.now - timedelta(seconds=self.rng.randrange(self.span_seconds))
+        return moment.strftime("%Y-%m-%d %H:%M:%S")
+
+    def _topic(self) -> str:
+        # Popular topics are asked about far more often than the long tail
+        index = min(len(self.topics) - 1, int(self.rng.paretovariate(1.2)) - 1)
+        return self.topics[(index * 7919) % len(self.topics)]
+
+    def _access_count(self) -> int:
+        return min(100_000, int(self.rng.paretovariate(1.1)) - 1)
+
+    def conversations(self, count: int) -> Iterator[Tuple]:
+        for _ in range(count):
+            topic = self._topic()
+            yield (f"tell me about {topic}", f"Here is what I know about {topic}...", self._timestamp(),
+                   f"session-{self.rng.randrange(max(1, count // 20))}")
+
+    def explicit_memories(self, count: int) -> Iterator[Tuple]:
+        for _ in range(count):
+            yield (self.rng.choice(VERBS), self._topic(), self.rng.choice(MEMORY_TYPES), self._timestamp(),
+                   int(self.rng.random() < 0.9))
+
+    def consent_log(self, count: int) -> Iterator[Tuple]:
+        for _ in range(count):
+            action = self.rng.choice(CONSENT_ACTIONS)
+            response = None if action == "consent_requested" else self.rng.choice(["yes", "no", "sure", "nope"])
+            yield (action, f"preference: {self.rng.choice(VERBS)} = {self._topic()}", response, self._timestamp())
+
+    def search_results(self, count: int) -> Iterator[Tuple]:
+        for _ in range(count):
+            topic = self._topic()
+            sources = [{"title": f"{topic.title()} ({i + 1})", "url": f"https://example{i}.org/{topic.replace(' ', '-')}",
+                        "snippet": f"{topic.capitalize()} explained."} for i in range(3)]
+            facts = [f"{topic.capitalize()} has {self.rng.randint(2, 50)} key ideas.",
+                     f"{topic.capitalize()} became popular in {self.rng.randint(1950, 2024)}."]
+            search_data = {"sources": sources, "key_information": facts, "total_sources": 3}
+            access_count = self._access_count()
+            yield (f"what is {topic}", topic, json.dumps(search_data), ". ".join(facts), json.dumps(facts),
+                   json.dumps(sources), self._timestamp(), int(self.rng.random() < 0.95), access_count,
+                   self._timestamp() if access_count else None)
+
+    def search_consent(self, count: int) -> Iterator[Tuple]:
+        for _ in range(count):
+            action = self.rng.choice(SEARCH_CONSENT_ACTIONS)
+            topic = self._topic()
+            response = None if action == "save_consent_requested" else self.rng.choice(["yes", "no"])
+            yield (action, f"{topic}: what is {topic}", response, self._timestamp())
+
+
+INSERTS = {
+    "conversations": "INSERT INTO conversations (message, response, timestamp, session_id) VALUES (?, ?, ?, ?)",
+    "explicit_memories": """INSERT INTO explicit_memories (memory_key, memory_value, memory_type, timestamp,
+                            user_consent) VALUES (?, ?, ?, ?, ?)""",
+    "consent_log": "INSERT INTO consent_log (action, memory_description, user_response, timestamp) VALUES (?, ?, ?, ?)",
+    "search_results": """INSERT INTO search_results (query, topic, search_data, summary, key_facts, sources,
+                         timestamp, user_consent, access_count, last_accessed) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+    "search_consent": "INSERT INTO search_consent (action, query_topic, user_response, timestamp) VALUES (?, ?, ?, ?)",
+}
+
+
+def _bulk_insert(conn: sqlite3.Connection, sql: str, rows: Iterator[Tuple], batch_size: int) -> int:
+    """Insert a row stream, one transaction per batch"""
+    inserted = 0
+    while True:
+        batch = [row for _, row in zip(range(batch_size), rows)]
+        if not batch:
+            return inserted
+        with conn:
+            conn.executemany(sql, batch)
+        inserted += len(batch)
+
+
+def generate(out_dir: str, scale: int, seed: int = 0, batch_size: int = DEFAULT_BATCH_SIZE,
+             verbose: bool = True) -> str:
+    """Create grkkmai.db in out_dir; returns its path"""
+    from core.memory_system import GRKKMAI_MEMORY
+    from core.search_memory import SRM
+    from core.storage import StorageEngine
+
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, "grkkmai.db")
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    # The stores create their own schema, so generated databases always match it
+    storage = StorageEngine(path)
+    GRKKMAI_MEMORY(storage=storage)
+    SRM(storage=storage)
+    storage.close()
+
+    data = SyntheticData(seed)
+    conn = sqlite3.connect(path)
+    # Bulk-load settings: the database is disposable until it is complete
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+
+    for table, count in table_sizes(scale).items():
+        started = time.perf_counter()
+        inserted = _bulk_insert(conn, INSERTS[table], getattr(data, table)(count), batch_size)
+        if verbose:
+            elapsed = time.perf_counter() - started
+            print(f"   {table:<18} {inserted:>10,} rows in {elapsed:6.2f}s ({inserted / elapsed:,.0f} rows/s)")
+
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.close()
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic GRKKMAI databases")
+    parser.add_argument("--scale", type=int, default=100_000, help="number of conversations (other tables scale with it)")
+    parser.add_argument("--out", default=os.path.join(REPO_ROOT, "data", "synthetic"))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    print(f"🏭 Generating scale {args.scale:,} into {args.out}")
+    path = generate(args.out, args.scale, seed=args.seed, batch_size=args.batch_size)
+    print(f"💾 {path} ({os.path.getsize(path) / (1024 * 1024):.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+GRKKMAI batch personality evolution benchmark
+
+Applies the same stream of interactions three ways: evolve_personality() once
+per interaction, TraitEngine.evolve_many() with NumPy, and evolve_many() on the
+plain Python fallback.
+
+Usage: python benchmarks/trait_engine_benchmark.py [--interactions 100000] [--seed 0]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from core.trait_engine import MOOD_BOOSTS, TRAIT_EFFECTS, TraitEngine, load_numpy
+
+INTERACTIONS = sorted(set(TRAIT_EFFECTS) | set(MOOD_BOOSTS)) + ["small_talk"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GRKKMAI batch personality evolution benchmark")
+    parser.add_argument("--interactions", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    from core.personality import GRKKMAIPersonality
+
+    rng = random.Random(args.seed)
+    interactions = [rng.choice(INTERACTIONS) for _ in range(args.interactions)]
+    print(f"🧬 {args.interactions:,} interactions")
+
+    with tempfile.TemporaryDirectory(prefix="grkkm-traits-") as work_dir:
+        with contextlib.redirect_stdout(io.StringIO()):
+            personality = GRKKMAIPersonality(os.path.join(work_dir, "personality_config.json"),
+                                             snapshot_every=10 ** 9)
+        random.seed(args.seed)
+        started = time.perf_counter()
+        for interaction in interactions:
+            personality.evolve_personality(interaction, {})
+        one_by_one = time.perf_counter() - started
+        final = {name: trait.value for name, trait in personality.traits.items()}
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            personality.reset_personality()
+        results = {"evolve_personality() per interaction": one_by_one}
+        for label, vectorized in (("evolve_many(), numpy", True), ("evolve_many(), python", False)):
+            if vectorized and load_numpy() is None:
+                print("⚠️ numpy is not installed, skipping the vectorized run")
+                continue
+            engine = TraitEngine.from_personality(personality, seed=args.seed, vectorized=vectorized)
+            started = time.perf_counter()
+            engine.evolve_many(interactions)
+            results[label] = time.perf_counter() - started
+
+    print("-" * 72)
+    for label, elapsed in results.items():
+        print(f"{label:<40} {elapsed * 1000:10.1f} ms {args.interactions / elapsed:14,.0f} /sec "
+              f"({one_by_one / elapsed:6.1f}x)")
+    print("-" * 72)
+    print("final traits (one by one): " + ", ".join(f"{name} {value:.3f}" for name, value in final.items()))
+    print("final traits (batch):      " + ", ".join(f"{name} {value:.3f}"
+                                                    for name, value in engine.trait_values().items()))
+
+
+if __name__ == "__main__":
+    main()
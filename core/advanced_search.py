@@ -2,20 +2,51 @@
 Search module for GRKKMAI
 """
 
+import importlib.util
 import re
 import json
 import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
-from typing import List, Dict, Optional, Any
-from duckduckgo_search import DDGS
+from typing import List, Dict, Optional, Any, Generator, Iterable, Iterator, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from core.conversation_buffer import ConversationBuffer, ConversationTurn
+from core.metrics import CACHE_LOOKUPS, ERRORS, SEARCH_CALLS
+from core.prefetch import SearchPrefetcher
+from core.tracing import traced, tracer
+
+# Query parameters that only track where a click came from
+TRACKING_PARAM_PREFIXES = ("utm_", "mc_", "pk_")
+TRACKING_PARAMS = {"fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "ref", "ref_src", "spm", "_ga"}
 
 
 class GRKKMAI_Search:
-    def __init__(self):
-        self.ddgs = DDGS()
-        self.conversation_context = []
+    def __init__(self, backend: Optional[Any] = None):
+        # Fail fast if the backend is missing, but only import it on first search
+        if backend is None and importlib.util.find_spec("duckduckgo_search") is None:
+            raise ImportError("duckduckgo_search is not installed")
+        self._ddgs = backend
+        self.conversation_context = ConversationBuffer(capacity=20)
         self.fact_database = {}
         self._pending_save = None  # ← ADDED: For consent flow
+        self._state_lock = threading.Lock()  # conversation_context and fact_database are shared
+        self.last_batch_stats = None
+
+        # Raw search cache: (normalized query, max results) -> (stored_at, results)
+        self._search_cache = OrderedDict()
+        self._prefetched_keys = set()
+        self._cache_lock = threading.Lock()
+        self.search_cache_size = 128
+        self.search_cache_ttl = 600.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        # Warms the cache for likely follow-up questions while the user is typing
+        self.prefetcher = SearchPrefetcher(self)
 
         self.knowledge_categories = {
             "general": ["what", "how", "why", "when", "where"],
@@ -28,8 +59,17 @@ class GRKKMAI_Search:
 
         print("✅ Advanced search system has been activated!")
     
+    @property
+    def ddgs(self):
+        """Search backend, created on first use"""
+        if self._ddgs is None:
+            from duckduckgo_search import DDGS
+            self._ddgs = DDGS()
+        return self._ddgs
+
     # ← ADDED: Method that ai_brain.py needs
-    def _should_use_advanced_search(self, message: str) -> bool:
+    @staticmethod
+    def _should_use_advanced_search(message: str) -> bool:
         """Check if user message requires web search"""
         triggers = [
             "what is", "who is", "explain", "how does", "why does",
@@ -62,6 +102,7 @@ class GRKKMAI_Search:
         
         return response
     
+    @traced("search.analyze_question")
     def analyze_question(self, user_message: str) -> Dict[str, Any]:
         """Analyze user question to understand intent and complexity"""
         message_lower = user_message.lower()
@@ -135,34 +176,164 @@ class GRKKMAI_Search:
         concepts = [word for word in words if len(word) > 3 and word not in stop_words]
         return concepts[:5]  # Top 5 concepts
     
-    def search_and_analyze(self, queries: List[str], max_results_per_query: int = 3) -> Dict[str, Any]:
+    def search_and_analyze(self, queries: List[str], max_results_per_query: int = 3,
+                           cancel: Optional[threading.Event] = None) -> Dict[str, Any]:
         """Search web and analyze results"""
-        all_results = []
+        merged = {}
 
         for query in queries:
-            try:
-                results = self.ddgs.text(query, max_results=max_results_per_query)
-                for result in results:
-                    all_results.append({
-                        "title": result.get("title", ""),
-                        "url": result.get("href", ""),
-                        "snippet": result.get("body", ""),
-                        "query": query
-                    })
-            except Exception as e:
-                print(f"Search error for '{query}': {e}")
+            # Stop issuing requests once the caller no longer needs the answer
+            if cancel is not None and cancel.is_set():
+                break
+            self._merge_results(merged, self._fetch_results(query, max_results_per_query))
+
+        return self._analyze_results(list(merged.values()))
+
+    def _fetch_results(self, query: str, max_results: int) -> List[Dict]:
+        """Run a single web search (or reuse a cached one) and normalize its results"""
+        key = (self._normalize_query(query), max_results)
+
+        cached = self._cache_get(key)
+        if cached is not None:
+            return [dict(result, query=query) for result in cached]
+
+        results = self._search_web(query, max_results)
+        if results is None:
+            return []
+
+        self._cache_put(key, results)
+        return results
+
+    @traced("search.network")
+    def _search_web(self, query: str, max_results: int, kind: str = "live") -> Optional[List[Dict]]:
+        """Hit the search backend directly, None on error"""
+        try:
+            results = self.ddgs.text(query, max_results=max_results)
+            SEARCH_CALLS.inc(kind=kind, outcome="ok")
+            return [
+                {
+                    "title": result.get("title", ""),
+                    "url": result.get("href", ""),
+                    "snippet": result.get("body", ""),
+                    "query": query
+                }
+                for result in results
+            ]
+        except Exception as e:
+            SEARCH_CALLS.inc(kind=kind, outcome="error")
+            ERRORS.inc(component="search")
+            print(f"Search error for '{query}': {e}")
+            return None
+
+    def _cache_get(self, key: Tuple[str, int]) -> Optional[List[Dict]]:
+        """Fresh cached results for a search key, if any"""
+        with self._cache_lock:
+            entry = self._search_cache.get(key)
+            if entry is None or time.time() - entry[0] > self.search_cache_ttl:
+                self.cache_misses += 1
+                CACHE_LOOKUPS.inc(result="miss")
+                return None
+
+            self._search_cache.move_to_end(key)
+            # A real query used it, so it no longer counts against the prefetch budget
+            self._prefetched_keys.discard(key)
+            self.cache_hits += 1
+            CACHE_LOOKUPS.inc(result="hit")
+            return entry[1]
+
+    def _cache_put(self, key: Tuple[str, int], results: List[Dict], prefetched: bool = False,
+                   prefetch_budget: int = 0) -> bool:
+        """Store search results, keeping prefetched entries within their own budget"""
+        with self._cache_lock:
+            if prefetched:
+                if key in self._search_cache or prefetch_budget < 1:
+                    return False
+                while len(self._prefetched_keys) >= prefetch_budget:
+                    oldest = next(k for k in self._search_cache if k in self._prefetched_keys)
+                    del self._search_cache[oldest]
+                    self._prefetched_keys.discard(oldest)
+                self._prefetched_keys.add(key)
+
+            self._search_cache[key] = (time.time(), results)
+            self._search_cache.move_to_end(key)
+
+            while len(self._search_cache) > self.search_cache_size:
+                evicted, _ = self._search_cache.popitem(last=False)
+                self._prefetched_keys.discard(evicted)
+            return True
+
+    def _is_cached(self, query: str, max_results: int = 3) -> bool:
+        """Check for a fresh cache entry without counting a hit or miss"""
+        with self._cache_lock:
+            entry = self._search_cache.get((self._normalize_query(query), max_results))
+            return entry is not None and time.time() - entry[0] <= self.search_cache_ttl
+
+    def _merge_results(self, merged: Dict[str, Dict], results: List[Dict]) -> Dict[str, Dict]:
+        """Merge results into `merged` by canonical URL, recording every query that returned them
+
+        The canonical URL is only the key: the first URL seen for a page is
+        the one shown, since the canonical form may not exist (https forced,
+        parameters dropped).
+        """
+        for result in results:
+            key = self._canonicalize_url(result["url"])
+            existing = merged.get(key)
+
+            if existing is None:
+                merged[key] = dict(result, queries=[result["query"]])
                 continue
 
-        # Analyze and consolidate information
-        analysis = {
+            if result["query"] not in existing["queries"]:
+                existing["queries"].append(result["query"])
+            # Different variants can get different snippets for the same page, keep the richest
+            if len(result["snippet"]) > len(existing["snippet"]):
+                existing["snippet"] = result["snippet"]
+            if not existing["title"]:
+                existing["title"] = result["title"]
+
+        return merged
+
+    @staticmethod
+    def _canonicalize_url(url: str) -> str:
+        """Normalize scheme, host, tracking params and fragments so the same page compares equal"""
+        try:
+            parts = urlsplit(url.strip())
+            port = parts.port
+        except ValueError:
+            return url
+
+        if not parts.netloc:
+            return url
+
+        scheme = "https" if parts.scheme.lower() in ("http", "https", "") else parts.scheme.lower()
+
+        host = (parts.hostname or "").rstrip(".")
+        if host.startswith("www."):
+            host = host[4:]
+        port = port if port not in (80, 443) else None
+        netloc = f"{host}:{port}" if port else host
+
+        path = parts.path or "/"
+        if len(path) > 1:
+            path = path.rstrip("/")
+
+        params = [
+            (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+            if not name.lower().startswith(TRACKING_PARAM_PREFIXES) and name.lower() not in TRACKING_PARAMS
+        ]
+
+        return urlunsplit((scheme, netloc, path, urlencode(sorted(params)), ""))
+
+    def _analyze_results(self, all_results: List[Dict]) -> Dict[str, Any]:
+        """Analyze and consolidate information"""
+        return {
             "total_sources": len(all_results),
             "key_information": self._extract_key_information(all_results),
             "sources": all_results,
             "consolidated_facts": self._consolidate_facts(all_results)
         }
 
-        return analysis
-    
+    @traced("search.extract_key_information")
     def _extract_key_information(self, results: List[Dict]) -> List[str]:
         """Extract key information from search results"""
         key_info = []
@@ -179,6 +350,7 @@ class GRKKMAI_Search:
 
         return key_info[:10]  # Top 10
     
+    @traced("search.consolidate_facts")
     def _consolidate_facts(self, results: List[Dict]) -> Dict[str, List[str]]:
         """Consolidate facts from multiple sources"""
         facts = {
@@ -218,6 +390,7 @@ class GRKKMAI_Search:
         
         return facts
     
+    @traced("search.format")
     def generate_intelligent_response(self, user_message: str, search_analysis: Optional[Dict] = None) -> str:
         """Generate intelligent, well-formatted response"""
         if not search_analysis:
@@ -236,8 +409,73 @@ class GRKKMAI_Search:
 
         return "\n\n".join(response_parts)
 
-    def _generate_intro(self, user_message: str, search_analysis: Dict) -> str:
-        """Generate introduction"""
+    def stream_intelligent_response(self, user_message: str, queries: List[str], max_results_per_query: int = 3,
+                                    cancel: Optional[threading.Event] = None) -> Generator[str, None, Dict[str, Any]]:
+        """Yield response sections as soon as enough search results have arrived"""
+        # Intro and main content go out with the first query that returns results,
+        # key points and sources once every query is done. Returns the full analysis.
+        # Once `cancel` is set, the queries still running are abandoned and only
+        # their cached results (if any) are used.
+        merged = {}
+        started = False
+
+        pool = ThreadPoolExecutor(max_workers=max(1, len(queries)))
+        try:
+            futures = {pool.submit(self._fetch_results, query, max_results_per_query): query for query in queries}
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=None if cancel is None else 0.05, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self._merge_results(merged, future.result())
+                if cancel is not None and cancel.is_set() and pending:
+                    for future in pending:
+                        if self._is_cached(futures[future], max_results_per_query):
+                            self._merge_results(merged, self._fetch_results(futures[future],
+                                                                            max_results_per_query))
+                    break
+                if not started and merged:
+                    partial_analysis = self._analyze_results(list(merged.values()))
+                    with tracer.span("search.format"):
+                        # Other queries are still out: no source count yet, the sources section has it
+                        first_sections = [self._generate_intro(user_message, partial_analysis, early=True),
+                                          self._generate_main_content(partial_analysis)]
+                    yield from first_sections
+                    started = True
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        search_analysis = self._analyze_results(list(merged.values()))
+
+        with tracer.span("search.format"):
+            sections = []
+            if not started:
+                sections.append(self._generate_intro(user_message, search_analysis))
+                sections.append(self._generate_main_content(search_analysis))
+
+            if search_analysis.get("key_information"):
+                sections.append(self._generate_key_points(search_analysis["key_information"]))
+
+            sources_section = self._generate_sources_section(
+                search_analysis.get("sources", []),
+                total=search_analysis.get("total_sources", 0) if started else None)
+            if sources_section:
+                sections.append(sources_section)
+
+            sections.append(self._generate_conclusion(user_message))
+
+        yield from sections
+
+        return search_analysis
+
+    def _generate_intro(self, user_message: str, search_analysis: Dict, early: bool = False) -> str:
+        """Generate introduction (early: written before every search is back, so without a count)"""
+        if early:
+            return random.choice([
+                "🔍 Here's what my first search results say, more sources are on the way:",
+                "📚 The first results are in, here's what they say:",
+                "✨ Let me start with what the first sources I found say about this topic:",
+            ])
+
         source_count = search_analysis.get("total_sources", 0)
 
         intros = [
@@ -281,12 +519,12 @@ class GRKKMAI_Search:
 
         return "\n".join(points)
     
-    def _generate_sources_section(self, sources: List[Dict]) -> str:
-        """Generate sources section"""
+    def _generate_sources_section(self, sources: List[Dict], total: Optional[int] = None) -> str:
+        """Generate sources section (with the number of sources found, when the intro did not give it)"""
         if not sources:
             return ""
         
-        sources_text = ["**Sources:**"]
+        sources_text = [f"**Sources ({total} found):**" if total is not None else "**Sources:**"]
         unique_sources = {}
 
         # Remove duplicates by URL
@@ -324,37 +562,179 @@ class GRKKMAI_Search:
         
         return "I'm not sure I have enough information to answer that well. Could you be more specific, or would you like me to search about it?"
     
+    @traced("search.process_query")
     def process_query(self, user_message: str) -> str:
         """Main method to process any user query"""
+        return "\n\n".join(self.stream_query(user_message))
+
+    def stream_query(self, user_message: str,
+                     cancel: Optional[threading.Event] = None) -> Generator[str, None, Optional[Dict]]:
+        """Process a user query, yielding response sections as they become ready (returns the pending save)"""
+        # A real query beats any speculative work still running
+        self.prefetcher.cancel()
+
+        analysis, search_results = yield from self._stream_research(user_message, cancel)
+        return self._remember_research(user_message, analysis, search_results)
+
+    def _stream_research(self, user_message: str, cancel: Optional[threading.Event] = None
+                         ) -> Generator[str, None, Tuple[Dict[str, Any], Optional[Dict]]]:
+        """Yield the response sections without touching conversation state (returns analysis, results)"""
         # Analyze the question
         analysis = self.analyze_question(user_message)
 
-        # Add to conversation context
-        self.conversation_context.append({
-            "user_message": user_message,
-            "analysis": analysis,
-            "timestamp": datetime.now().isoformat()
-        })
-
         # If search is needed, do comprehensive research
         if analysis["needs_search"] and analysis["search_queries"]:
-            search_results = self.search_and_analyze(analysis["search_queries"])
-            response = self.generate_intelligent_response(user_message, search_results)
-
-            # Store pending save for consent flow
-            self._pending_save = {
+            search_results = yield from self.stream_intelligent_response(user_message, analysis["search_queries"],
+                                                                          cancel=cancel)
+            return analysis, search_results
+
+        yield self.generate_intelligent_response(user_message)
+        return analysis, None
+
+    def _remember_research(self, user_message: str, analysis: Dict[str, Any],
+                           search_results: Optional[Dict]) -> Optional[Dict]:
+        """Record a finished query in the shared state and return its pending save"""
+        with self._state_lock:
+            # Add to conversation context
+            self.conversation_context.append(ConversationTurn(
+                user_message,
+                intent=analysis["intent"],
+                concepts=analysis["key_concepts"]
+            ))
+
+            if search_results is None:
+                return None
+
+            # Store pending save for consent flow (callers serving several
+            # conversations keep the returned copy per session instead)
+            pending_save = {
                 "query": user_message,
                 "results": search_results,
                 "topic": analysis["key_concepts"][0] if analysis["key_concepts"] else user_message[:30]
             }
+            self._pending_save = pending_save
 
             # Store useful facts for future reference
             self._store_learned_facts(analysis["key_concepts"], search_results)
-        else:
-            response = self.generate_intelligent_response(user_message)
 
-        return response
+        # Warm up the cache for the likely next questions
+        self.prefetcher.schedule(analysis["key_concepts"])
+        return pending_save
     
+    def process_queries(self, queries: Iterable[str], concurrency: int = 4, search_memory: Optional[Any] = None,
+                        bulk_size: int = 50) -> Iterator[Dict[str, Any]]:
+        """Research many queries with bounded concurrency, yielding one outcome per query.
+
+        Queries are deduplicated after normalization. If `search_memory` (an SRM) is
+        given, successful research is saved to it in bulk transactions of `bulk_size`.
+        Every outcome carries the running throughput stats under "stats".
+        """
+        concurrency = max(1, concurrency)
+        stats = {"submitted": 0, "completed": 0, "failed": 0, "duplicates": 0, "skipped": 0, "saved": 0,
+                 "elapsed": 0.0, "queries_per_sec": 0.0}
+        started_at = time.perf_counter()
+        seen = set()
+        to_save = []
+
+        def outcome(entry: Dict[str, Any]) -> Dict[str, Any]:
+            stats["elapsed"] = time.perf_counter() - started_at
+            done = stats["completed"] + stats["failed"]
+            stats["queries_per_sec"] = done / stats["elapsed"] if stats["elapsed"] > 0 else 0.0
+            entry["stats"] = dict(stats)
+            return entry
+
+        def flush_saves():
+            if search_memory and to_save:
+                stats["saved"] += search_memory.save_search_results_bulk(to_save)
+                to_save.clear()
+
+        def run(query: str) -> Dict[str, Any]:
+            query_started = time.perf_counter()
+            result = self._research(query)
+            result["elapsed"] = time.perf_counter() - query_started
+            return result
+
+        query_iter = iter(queries)
+        in_flight = {}
+
+        try:
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                while True:
+                    # Keep at most 2x `concurrency` queries in flight so huge inputs stream through
+                    while len(in_flight) < concurrency * 2:
+                        query = next(query_iter, None)
+                        if query is None:
+                            break
+
+                        normalized = self._normalize_query(query)
+                        if not normalized:
+                            stats["skipped"] += 1
+                            yield outcome({"query": query, "normalized": normalized, "status": "empty"})
+                            continue
+                        if normalized in seen:
+                            stats["duplicates"] += 1
+                            yield outcome({"query": query, "normalized": normalized, "status": "duplicate"})
+                            continue
+
+                        seen.add(normalized)
+                        stats["submitted"] += 1
+                        in_flight[pool.submit(run, query)] = (query, normalized)
+
+                    if not in_flight:
+                        break
+
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        query, normalized = in_flight.pop(future)
+                        try:
+                            result = future.result()
+                        except Exception as e:
+                            stats["failed"] += 1
+                            yield outcome({"query": query, "normalized": normalized, "status": "error", "error": str(e)})
+                            continue
+
+                        stats["completed"] += 1
+                        if result["results"] is not None:
+                            to_save.append((query, result["results"], result["topic"]))
+                            if len(to_save) >= bulk_size:
+                                flush_saves()
+
+                        yield outcome({
+                            "query": query,
+                            "normalized": normalized,
+                            "status": "ok" if result["results"] is not None else "no_search",
+                            "topic": result["topic"],
+                            "response": result["response"],
+                            "total_sources": result["results"]["total_sources"] if result["results"] else 0,
+                            "elapsed": result["elapsed"]
+                        })
+
+        finally:
+            # Also when the consumer stops early (break or close()): keep what is buffered
+            flush_saves()
+            self.last_batch_stats = outcome({})["stats"]
+
+    def _research(self, user_message: str, cancel: Optional[threading.Event] = None) -> Dict[str, Any]:
+        """Analyze and research a query without touching conversation state"""
+        analysis = self.analyze_question(user_message)
+
+        if analysis["needs_search"] and analysis["search_queries"]:
+            search_results = self.search_and_analyze(analysis["search_queries"], cancel=cancel)
+            return {
+                "response": self.generate_intelligent_response(user_message, search_results),
+                "results": search_results,
+                "topic": analysis["key_concepts"][0] if analysis["key_concepts"] else user_message[:30],
+                "analysis": analysis
+            }
+
+        return {"response": self.generate_intelligent_response(user_message), "results": None, "topic": None,
+                "analysis": analysis}
+
+    @staticmethod
+    def _normalize_query(query: str) -> str:
+        """Lowercase and collapse whitespace so equivalent queries compare equal"""
+        return " ".join(query.lower().split())
+
     def _store_learned_facts(self, concepts: List[str], search_results: Dict):
         """Store learned facts for future use"""
         for concept in concepts:
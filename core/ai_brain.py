@@ -2,90 +2,510 @@
 Gurukukomi Brain
 """
 
+import math
+import os
+import queue
 import random
-from datetime import datetime
-from typing import Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from typing import Any, Dict, Generator, Iterator, List, Optional, Tuple
 
-from core.memory_system import GRKKMAI_MEMORY
-from core.personality import GRKKMAIPersonality
-from core.advanced_search import GRKKMAI_Search
-from core.search_memory import SRM
+from core.conversation_buffer import ConversationBuffer, ConversationTurn
+from core.metrics import CONSENT_PROMPTS, SAVED_RESEARCH_LOOKUPS, STORED_ITEMS, TURN_SECONDS, TURNS, registry
+from core.sessions import SessionContext
+from core.stats import STATS_TTL, PersonalityStats, StatsSnapshot
+from core.tracing import tracer
+
+# Subsystems (and their heavy imports) are only built on first use
+SUBSYSTEMS = ("storage", "memory", "personality", "search_memory", "advanced_search")
+
+# Appended to answers whose web search was cancelled
+CANCELLED_NOTE = "⏹️ Search stopped early, so this answer only covers what I found so far."
 
 
 class GRKKMAI:
-    def __init__(self):
+    def __init__(self, warm_up: bool = False, speculative_lookup: bool = False, data_dir: str = "data",
+                 search_backend: Optional[Any] = None, per_user_storage: bool = False):
         print("Gurukukomi start-up!")
 
-        # Personality & Memory - CORRECTLY instantiated
-        self.memory = GRKKMAI_MEMORY()
-        self.personality = GRKKMAIPersonality()
-        
-        # Set personality traits for _add_personality_touches
-        self.curiosity = 0.5
-        self.playfulness = 0.7
-        self.loyalty = 0.5
+        # Where the databases and personality config live, and an optional
+        # DDGS-compatible object (anything with .text(query, max_results=...))
+        # used instead of duckduckgo_search, e.g. by the replay benchmark
+        self.data_dir = data_dir
+        self.search_backend = search_backend
+        # Sessions with a user_id keep memories and saved research in that
+        # user's own database (see core/namespaces.py)
+        self.per_user_storage = per_user_storage
+
+        # Personality, memory, web search and search memory are created lazily,
+        # see the properties below
+        self._subsystems: Dict[str, Any] = {}
+        self._init_lock = threading.RLock()
+        self.use_advanced = True
+
+        # Speculative lookup: query saved research and the web together,
+        # cancelling the web search when a good-enough saved answer exists
+        self.speculative_lookup = speculative_lookup
+        self.saved_research_max_age_days = 30
+        self._lookup_pool: Optional[ThreadPoolExecutor] = None
+
+        # Per-conversation state (history, pending save, trait floats). The
+        # subsystems above are shared, so a SessionManager can run many sessions
+        # over one GRKKMAI; this is the one used when no session is given.
+        # Only the most recent turns stay in RAM, older ones are spilled to the
+        # memory database.
+        self.session = SessionContext("default", history_capacity=50, spill=self._spill_turn)
+
+        # stats_snapshot() results by user_id: (monotonic time, snapshot)
+        self._stats_cache: Dict[Optional[str], tuple] = {}
+        # Bumped by invalidate_stats(), so a snapshot taken across an invalidation is not cached
+        self._stats_generation: Dict[Optional[str], int] = {}
+        self._stats_lock = threading.Lock()
+        for kind, section, name in (("memories", "memory", "memories_stored"),
+                                    ("saved_searches", "search", "saved_searches"),
+                                    ("saved_topics", "search", "unique_topics")):
+            STORED_ITEMS.set_function(partial(self._stats_gauge, section, name), kind=kind)
+
+        if warm_up:
+            self.warm_up()
+
+        print("Thanks for waiting! Gurukukomi initialization complete.")
+        print("Go ahead and ask a question...")
+
+    @property
+    def storage(self):
+        """The database engine shared by memory and search memory"""
+        return self._subsystem("storage")
+
+    @property
+    def namespaces(self):
+        """Per-user databases, None unless per_user_storage is on"""
+        return self._subsystem("namespaces") if self.per_user_storage else None
+
+    @property
+    def memory(self):
+        return self._subsystem("memory")
+
+    @property
+    def personality(self):
+        return self._subsystem("personality")
+
+    @property
+    def sync(self):
+        """Synchronization with sibling instances (see core/sync.py)"""
+        return self._subsystem("sync")
+
+    @property
+    def advanced_search(self):
+        return self._subsystem("advanced_search") if self.use_advanced else None
+
+    @property
+    def search_memory(self):
+        return self._subsystem("search_memory")
+
+    @property
+    def pending_save(self) -> Optional[Dict]:
+        """Search results waiting for the user's save consent"""
+        return self.session.pending_save
+
+    @pending_save.setter
+    def pending_save(self, value: Optional[Dict]):
+        self.session.pending_save = value
+
+    # The default session's state, kept reachable under the old attribute names
+    @property
+    def conversation_history(self) -> ConversationBuffer:
+        return self.session.conversation_history
 
-        # Web search - CORRECTLY instantiated with ()
+    @property
+    def last_turn_metrics(self) -> Optional[Dict]:
+        return self.session.last_turn_metrics
+
+    @property
+    def curiosity(self) -> float:
+        return self._trait_values(self.session)["curiosity"]
+
+    @curiosity.setter
+    def curiosity(self, value: float):
+        self.session.curiosity = value
+
+    @property
+    def playfulness(self) -> float:
+        return self._trait_values(self.session)["playfulness"]
+
+    @playfulness.setter
+    def playfulness(self, value: float):
+        self.session.playfulness = value
+
+    @property
+    def loyalty(self) -> float:
+        return self._trait_values(self.session)["loyalty"]
+
+    @loyalty.setter
+    def loyalty(self, value: float):
+        self.session.loyalty = value
+
+    def _trait_values(self, session: SessionContext) -> Dict[str, float]:
+        """The personality's traits, with the session's overrides on top"""
+        values = self.personality.trait_values()
+        for name in ("curiosity", "playfulness", "loyalty"):
+            override = getattr(session, name)
+            if override is not None:
+                values[name] = override
+        return values
+
+    def warm_up(self) -> threading.Thread:
+        """Build every subsystem in a background thread so the first real query is fast"""
+        def build_all():
+            for name in SUBSYSTEMS:
+                subsystem = self._subsystem(name)
+                if name == "advanced_search" and subsystem:
+                    subsystem.ddgs  # pulls in duckduckgo_search
+
+        thread = threading.Thread(target=build_all, name="grkkm-warm-up", daemon=True)
+        thread.start()
+        return thread
+
+    def _subsystem(self, name: str):
+        """Return a subsystem, creating it on first use (thread-safe)"""
         try:
-            self.advanced_search = GRKKMAI_Search()
-            self.use_advanced = True
+            return self._subsystems[name]
+        except KeyError:
+            pass
+
+        with self._init_lock:
+            if name not in self._subsystems:
+                self._subsystems[name] = getattr(self, f"_create_{name}")()
+            return self._subsystems[name]
+
+    def _create_storage(self):
+        from core.storage import StorageEngine
+        return StorageEngine.shared(os.path.join(self.data_dir, "grkkmai.db"))
+
+    def _create_namespaces(self):
+        from core.namespaces import UserNamespaces
+        return UserNamespaces(os.path.join(self.data_dir, "users"))
+
+    def _create_memory(self):
+        from core.memory_system import GRKKMAI_MEMORY
+        memory = GRKKMAI_MEMORY(storage=self.storage)
+        memory.import_legacy(os.path.join(self.data_dir, "GRKKMAI_MEMORY.db"))
+        return memory
+
+    def _create_personality(self):
+        from core.personality import GRKKMAIPersonality
+        # A binary profile, once imported (python core/profile_format.py import ...), takes precedence
+        profile = os.path.join(self.data_dir, "personality.grkp")
+        if os.path.exists(profile):
+            return GRKKMAIPersonality(profile)
+        return GRKKMAIPersonality(os.path.join(self.data_dir, "personality_config.json"))
+
+    def _create_sync(self):
+        from core.sync import InstanceSync, SyncState
+        return InstanceSync(SyncState.open(os.path.join(self.data_dir, "sync")), self.personality, self.memory)
+
+    def _create_advanced_search(self):
+        from core.advanced_search import GRKKMAI_Search
+        try:
+            search = GRKKMAI_Search(backend=self.search_backend)
             print("✅ Web search is ready to go.")
+            return search
         except Exception as e:
             print(f"⚠️ Web search not available: {e}")
-            self.advanced_search = None
             self.use_advanced = False
+            return None
 
-        # Search Memory
+    def _create_search_memory(self):
+        from core.search_memory import SRM
         try:
-            self.search_memory = SRM()
+            search_memory = SRM(storage=self.storage)
+            search_memory.import_legacy(os.path.join(self.data_dir, "search_memory.db"))
             print("💾 Search memory loaded.")
+            return search_memory
         except Exception as e:
             print(f"⚠️ Search memory not available: {e}")
-            self.search_memory = None
+            return None
 
-        # Conversation history
-        self.conversation_history = []
-
-        print("Thanks for waiting! Gurukukomi initialization complete.")
-        print("Go ahead and ask a question...")
+    def _wants_web_search(self, user_message: str) -> bool:
+        """Trigger check that does not need the search system to be built"""
+        from core.advanced_search import GRKKMAI_Search
+        return self.use_advanced and GRKKMAI_Search._should_use_advanced_search(user_message)
     
-    def think(self, user_message: str) -> str:
+    def think(self, user_message: str, session: Optional[SessionContext] = None,
+              cancel: Optional[threading.Event] = None) -> str:
         """The thinking function, where the user query is processed."""
+        return "\n\n".join(self.think_stream(user_message, session, cancel))
+
+    @contextmanager
+    def stores(self, user_id: Optional[str] = None) -> Iterator[Any]:
+        """Object with the .memory and .search_memory to use for a user"""
+        if user_id is None or not self.per_user_storage:
+            yield self
+            return
+        with self.namespaces.using(user_id) as store:
+            yield store
+
+    def think_stream(self, user_message: str, session: Optional[SessionContext] = None,
+                     cancel: Optional[threading.Event] = None) -> Iterator[str]:
+        """Same as think(), but yields the reply section by section as it becomes ready
+
+        Setting `cancel` stops a web search early: the answer is built from the
+        results that arrived (or were cached) by then, or from saved research.
+        """
+        session = session or self.session
+        with self.stores(session.user_id) as stores:
+            yield from self._think_stream(user_message, session, stores.search_memory, cancel)
+
+    def _think_stream(self, user_message: str, session: SessionContext, search_memory: Optional[Any],
+                      cancel: Optional[threading.Event] = None) -> Iterator[str]:
         
         # Remember what was said by the user
-        self.conversation_history.append({
-            "user": user_message,
-            "timestamp": datetime.now().isoformat()
-        })
-
-        # If web search is triggered, make use of it
-        if self.use_advanced and self.advanced_search and self.advanced_search._should_use_advanced_search(user_message):
-            # Check for saved research first
-            if self.search_memory:
-                saved = self.search_memory.find_saved_research(user_message)
-                if saved:
-                    reply = self.advanced_search._generate_response_from_saved_research(user_message, saved)
-                    self._log_response(reply)
-                    return reply
-            
-            # Perform new web search
-            reply = self.advanced_search.process_query(user_message)
-            self._log_response(reply)
-            return reply
-
-        # Fallback to simple conversational response
-        reply = self._fallback_response(user_message)
-        self._log_response(reply)
-        return reply
-
-    def _log_response(self, response: str):
+        turn = session.conversation_history.append(ConversationTurn(user_message))
+        metrics = {"path": "fallback"}
+        started = time.perf_counter()
+
+        # A real query arrived, so stop warming the cache for guesses
+        if self._subsystems.get("advanced_search"):
+            self._subsystems["advanced_search"].prefetcher.cancel()
+
+        sections = []
+        try:
+            # If web search is triggered, make use of it
+            with tracer.span("think.trigger_check"):
+                wants_search = self._wants_web_search(user_message)
+
+            if wants_search and self.advanced_search:
+                if self.speculative_lookup and search_memory:
+                    session.pending_save = yield from self._speculative_search(user_message, sections, metrics,
+                                                                               search_memory, cancel)
+                    return
+
+                # Check for saved research first
+                metrics["lookup"] = "sequential"
+                if search_memory:
+                    lookup_started = time.perf_counter()
+                    with tracer.span("think.srm_lookup"):
+                        saved = search_memory.find_saved_research(user_message)
+                    metrics["srm_ms"] = (time.perf_counter() - lookup_started) * 1000
+                    SAVED_RESEARCH_LOOKUPS.inc(result="hit" if saved else "miss")
+                    if saved:
+                        metrics["path"] = "saved"
+                        sections.append(self.advanced_search._generate_response_from_saved_research(user_message, saved))
+                        yield sections[-1]
+                        return
+
+                # Perform new web search
+                metrics["path"] = "live"
+                live_started = time.perf_counter()
+                stream = self.advanced_search.stream_query(user_message, cancel=cancel)
+                while True:
+                    try:
+                        section = next(stream)
+                    except StopIteration as done:
+                        session.pending_save = done.value
+                        break
+                    sections.append(section)
+                    yield section
+                metrics["live_ms"] = (time.perf_counter() - live_started) * 1000
+                if cancel is not None and cancel.is_set():
+                    # Partial research is not worth a save prompt
+                    metrics["cancelled"] = True
+                    session.pending_save = None
+                    sections.append(CANCELLED_NOTE)
+                    yield sections[-1]
+                return
+
+            # Fallback to simple conversational response
+            with tracer.span("think.fallback"):
+                sections.append(self._fallback_response(user_message, session))
+            yield sections[-1]
+        finally:
+            metrics["total_ms"] = (time.perf_counter() - started) * 1000
+            tracer.record(f"think.turn.{metrics['path']}", metrics["total_ms"] / 1000)
+            TURNS.inc(path=metrics["path"])
+            TURN_SECONDS.observe(metrics["total_ms"] / 1000, path=metrics["path"])
+            if metrics["path"] == "live" and session.pending_save:
+                CONSENT_PROMPTS.inc(store="search_save")
+            turn.metrics = metrics
+            session.last_turn_metrics = metrics
+            turn.response = "\n\n".join(sections)
+
+    def _speculative_search(self, user_message: str, sections: List[str], metrics: Dict, search_memory: Any,
+                            cancel: Optional[threading.Event] = None) -> Generator[str, None, Optional[Dict]]:
+        """Look up saved research and search the web at the same time, keeping whichever wins"""
+        search = self.advanced_search
+        stop = threading.Event()
+        metrics["lookup"] = "speculative"
+
+        if self._lookup_pool is None:
+            self._lookup_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="grkkm-live")
+
+        # The live search streams its sections into a queue; they are held back
+        # until the saved research has been ruled out
+        live_started = time.perf_counter()
+        live_sections: "queue.Queue[Tuple[str, Any]]" = queue.Queue()
+        live = self._lookup_pool.submit(self._drain_into, search._stream_research(user_message, stop), live_sections)
+
+        try:
+            with tracer.span("think.srm_lookup"):
+                # Not counted as used (nor as a hit) unless it is good enough to answer with
+                saved = search_memory.find_saved_research(user_message, touch=False)
+            metrics["srm_ms"] = (time.perf_counter() - live_started) * 1000
+            accepted = bool(saved) and self._saved_research_good_enough(saved)
+            SAVED_RESEARCH_LOOKUPS.inc(result="hit" if accepted else "miss")
+
+            if accepted:
+                # The saved answer wins: stop the live search and throw its results away
+                stop.set()
+                search_memory.mark_accessed(saved["id"])
+                metrics["live_cancelled"] = live.cancel() or not live.done()
+                metrics["path"] = "saved"
+                sections.append(search._generate_response_from_saved_research(user_message, saved))
+                yield sections[-1]
+                return None
+
+            streamed = 0
+            while True:
+                # Ctrl-C in the CLI: the live search stops early and sends what it has
+                if cancel is not None and cancel.is_set():
+                    stop.set()
+                try:
+                    kind, value = live_sections.get(timeout=None if cancel is None else 0.05)
+                except queue.Empty:
+                    continue
+                if kind == "error":
+                    raise value
+                if kind == "done":
+                    analysis, results = value
+                    break
+                if stop.is_set() and saved and not streamed:
+                    continue  # a stale saved answer beats a partial live one
+                streamed += 1
+                sections.append(value)
+                yield value
+
+            metrics["live_ms"] = (time.perf_counter() - live_started) * 1000
+            metrics["live_cancelled"] = stop.is_set()
+            if stop.is_set():
+                metrics["cancelled"] = True
+                metrics["path"] = "saved" if saved and not streamed else "live"
+                if metrics["path"] == "saved":
+                    search_memory.mark_accessed(saved["id"])
+                    sections.append(search._generate_response_from_saved_research(user_message, saved))
+                    yield sections[-1]
+                sections.append(CANCELLED_NOTE)
+                yield sections[-1]
+                return None
+
+            metrics["path"] = "live"
+            return search._remember_research(user_message, analysis, results)
+        finally:
+            # Also when the reader goes away mid-answer
+            stop.set()
+
+    @staticmethod
+    def _drain_into(stream: Generator[str, None, Any], out: "queue.Queue[Tuple[str, Any]]"):
+        """Run a section generator, putting ("section", s) items, then ("done", value) or ("error", e)"""
+        try:
+            while True:
+                try:
+                    out.put(("section", next(stream)))
+                except StopIteration as done:
+                    out.put(("done", done.value))
+                    return
+        except Exception as e:
+            out.put(("error", e))
+
+    def _saved_research_good_enough(self, saved: Dict) -> bool:
+        """Is a saved answer complete and fresh enough to skip the live search?"""
+        if not saved.get("summary") or not saved.get("sources"):
+            return False
+
+        try:
+            saved_at = datetime.fromisoformat(saved["timestamp"])
+        except (TypeError, ValueError):
+            return False
+        # SQLite CURRENT_TIMESTAMP is naive UTC
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return now - saved_at <= timedelta(days=self.saved_research_max_age_days)
+
+    def stats_snapshot(self, user_id: Optional[str] = None, max_age: float = STATS_TTL) -> StatsSnapshot:
+        """Memory, saved research and personality statistics: one read transaction per store, cached briefly"""
+        key = user_id if self.per_user_storage else None
+        now = time.monotonic()
+        with self._stats_lock:
+            cached = self._stats_cache.get(key)
+            if cached is not None and now - cached[0] <= max_age:
+                return cached[1]
+            generation = self._stats_generation.get(key, 0)
+
+        snapshot = self._collect_stats(key)
+        with self._stats_lock:
+            if self._stats_generation.get(key, 0) == generation:
+                self._stats_cache[key] = (now, snapshot)
+        return snapshot
+
+    def invalidate_stats(self, user_id: Optional[str] = None):
+        """Forget the cached snapshot after a write the caller will want to see"""
+        key = user_id if self.per_user_storage else None
+        with self._stats_lock:
+            self._stats_cache.pop(key, None)
+            self._stats_generation[key] = self._stats_generation.get(key, 0) + 1
+
+    def _collect_stats(self, user_id: Optional[str]) -> StatsSnapshot:
+        memory_stats = search_stats = None
+        with self.stores(user_id) as stores:
+            memory, search_memory = stores.memory, stores.search_memory
+            if memory and search_memory and memory.storage is search_memory.storage:
+                with memory.storage.snapshot() as conn:
+                    memory_stats = memory.collect_stats(conn)
+                    search_stats = search_memory.collect_stats(conn)
+            else:
+                if memory:
+                    with memory.storage.snapshot() as conn:
+                        memory_stats = memory.collect_stats(conn)
+                if search_memory:
+                    with search_memory.storage.snapshot() as conn:
+                        search_stats = search_memory.collect_stats(conn)
+
+        personality = self.personality
+        return StatsSnapshot(
+            user_id=user_id,
+            memory=memory_stats,
+            search=search_stats,
+            personality=PersonalityStats(**personality.get_personality_summary()) if personality else None
+        )
+
+    def _stats_gauge(self, section: str, name: str) -> float:
+        # A metrics scrape should not be what builds the stores
+        if "memory" not in self._subsystems or "search_memory" not in self._subsystems:
+            return math.nan
+        part = getattr(self.stats_snapshot(), section)
+        return float(getattr(part, name)) if part else math.nan
+
+    def metrics_text(self) -> str:
+        """Snapshot of the process metrics in Prometheus text format"""
+        return registry.render()
+
+    def _log_response(self, response: str, session: Optional[SessionContext] = None):
         """Log the AI's response to conversation history"""
-        self.conversation_history.append({
-            "gurukukomi": response,
-            "timestamp": datetime.now().isoformat()
-        })
+        turn = (session or self.session).conversation_history.last()
+        if turn is not None:
+            turn.response = response
+
+    def _spill_turn(self, turn: ConversationTurn, session_id: str = "default", user_id: Optional[str] = None):
+        """Move a turn that fell out of the conversation buffer into the memory database"""
+        if turn.response is None:
+            return
+        with self.stores(user_id) as stores:
+            if stores.memory:
+                stores.memory.store_conversation(turn.user, turn.response, session_id)
 
-    def _fallback_response(self, user_message: str) -> str:
+    def _fallback_response(self, user_message: str, session: Optional[SessionContext] = None) -> str:
         """Generate simple conversational response when not using web search"""
         message_lower = user_message.lower()
         
@@ -140,7 +560,7 @@ class GRKKMAI:
 
         # Pick a random response and add personality
         base_response = random.choice(possible_responses)
-        response = self._add_personality_touches(base_response, user_message)
+        response = self._add_personality_touches(base_response, user_message, session)
 
         return response
     
@@ -194,36 +614,18 @@ class GRKKMAI:
         
         return None  # if no FAQ detected
 
-    def _add_personality_touches(self, response: str, original_message: str) -> str:
+    def _add_personality_touches(self, response: str, original_message: str,
+                                 session: Optional[SessionContext] = None) -> str:
         """Add personality quirks to responses"""
-        
-        if random.random() < self.curiosity:
-            follow_ups = [
-                " What do you think about that?",
-                " Can you tell me more?",
-                " How did you discover that?",
-                " Isn't that interesting?",
-                " What else interests you?",
-                " Do you want to explore that further?"
-            ]
-            response += random.choice(follow_ups)
-
-        if random.random() < 0.3:
-            enthusiasm = [
-                " That's so cool!",
-                " Wow!",
-                " Amazing!",
-                " I want to learn more!",
-                " Ooooh!",
-                " This is interesting!"
-            ]
-            response += random.choice(enthusiasm)
-    
-        return response
+        session = session or self.session
+        personality = self.personality
+        # Probabilities are cached until a trait or one of the session's overrides changes
+        key = (personality.trait_version, session.curiosity, session.playfulness, session.loyalty)
+        return personality.phrases.apply("touches", response, key, partial(self._trait_values, session))
 
-    def get_conversation_count(self) -> int:
+    def get_conversation_count(self, session: Optional[SessionContext] = None) -> int:
         """How many things have we been talking about?"""
-        return len([msg for msg in self.conversation_history if "user" in msg])
+        return (session or self.session).conversation_history.total_turns
 
     def introduce_self(self) -> str:
         """Let Gurukukomi introduce itself!"""
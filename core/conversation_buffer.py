@@ -0,0 +1,104 @@
+"""
+Bounded conversation context for GRKKMAI
+"""
+
+import sys
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+from core.metrics import ERRORS
+
+
+class ConversationTurn:
+    """Compact record of a single conversation turn"""
+    __slots__ = ("user", "response", "intent", "concepts", "timestamp", "metrics")
+
+    def __init__(self, user: str, response: Optional[str] = None, intent: Optional[str] = None,
+                 concepts: Sequence[str] = (), timestamp: Optional[float] = None):
+        self.user = user
+        self.response = response
+        # Intents and concepts repeat a lot between turns, so share one copy of each
+        self.intent = sys.intern(intent) if intent else None
+        self.concepts = tuple(sys.intern(concept) for concept in concepts)
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.metrics: Optional[Dict] = None
+
+    def to_dict(self) -> Dict:
+        """Plain dict view of the turn (for display or export)"""
+        return {
+            "user": self.user,
+            "response": self.response,
+            "intent": self.intent,
+            "concepts": list(self.concepts),
+            "timestamp": self.timestamp,
+            "metrics": self.metrics
+        }
+
+
+class ConversationBuffer:
+    """Fixed-capacity ring buffer of conversation turns"""
+
+    def __init__(self, capacity: int = 50, spill: Optional[Callable[[ConversationTurn], None]] = None):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+
+        self.capacity = capacity
+        self.spill = spill
+        self.total_turns = 0  # every turn ever appended, spilled ones included
+        self._turns: List[Optional[ConversationTurn]] = [None] * capacity
+        self._start = 0
+        self._size = 0
+
+    def append(self, turn: ConversationTurn) -> ConversationTurn:
+        """Add a turn, spilling the oldest one when the buffer is full"""
+        if self._size == self.capacity:
+            oldest = self._turns[self._start]
+            self._turns[self._start] = turn
+            self._start = (self._start + 1) % self.capacity
+            self._spill(oldest)
+        else:
+            self._turns[(self._start + self._size) % self.capacity] = turn
+            self._size += 1
+
+        self.total_turns += 1
+        return turn
+
+    def last(self) -> Optional[ConversationTurn]:
+        """Most recent turn, if any"""
+        if not self._size:
+            return None
+        return self._turns[(self._start + self._size - 1) % self.capacity]
+
+    def recent(self, count: int) -> List[ConversationTurn]:
+        """Up to `count` most recent turns, oldest first"""
+        turns = list(self)
+        return turns[-count:] if count > 0 else []
+
+    def clear(self):
+        """Drop every buffered turn without spilling"""
+        self._turns = [None] * self.capacity
+        self._start = 0
+        self._size = 0
+
+    def flush(self):
+        """Spill every buffered turn, oldest first, and empty the buffer"""
+        turns = list(self)
+        self.clear()
+        for turn in turns:
+            self._spill(turn)
+
+    def _spill(self, turn: Optional[ConversationTurn]):
+        if turn is None or self.spill is None:
+            return
+        try:
+            self.spill(turn)
+        except Exception as e:
+            ERRORS.inc(component="conversation_buffer")
+            print(f"⚠️ Could not spill conversation turn: {e}")
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[ConversationTurn]:
+        for offset in range(self._size):
+            yield self._turns[(self._start + offset) % self.capacity]
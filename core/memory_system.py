@@ -2,37 +2,41 @@
 GRKKMAI MEMORY SYSTEM
 """
 
-import sqlite3
 import json
+from dataclasses import asdict
 from datetime import datetime
 from typing import List, Dict, Optional
 
+from core.metrics import CONSENT_PROMPTS, CONSENT_RESPONSES, DB_WRITE_SECONDS
+from core.stats import MemoryStats
+from core.storage import DEFAULT_DB_PATH, StorageEngine
+from core.tracing import traced
+
+MEMORY_TABLES = ("conversations", "explicit_memories", "consent_log")
+
 class GRKKMAI_MEMORY:
-    def __init__(self, db_path: str = "data/GRKKMAI_MEMORY.db"):
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, storage: Optional[StorageEngine] = None,
+                 verbose: bool = True):
         """Initialize Memory System"""
-        self.db_path= db_path
+        self.storage = storage or StorageEngine.shared(db_path)
+        self.db_path = self.storage.db_path
         self.setup_database()
-        print("Gurukukomi memory system initialization complete!")
+        if verbose:
+            print("Gurukukomi memory system initialization complete!")
 
     def setup_database(self):
-        conn = sqlite3.connect(self.db_path)
-
-        #General convos table
-        conn.execute(
+        self.storage.executescript(
             """
+            --General convos table
             CREATE TABLE IF NOT EXISTS conversations (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             message TEXT NOT NULL,
             response TEXT NOT NULL,
             timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
             session_id TEXT
-            )
-            """
-        )
+            );
 
-        #Memory table
-        conn.execute(
-            """
+            --Memory table
             CREATE TABLE IF NOT EXISTS explicit_memories (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             memory_key TEXT NOT NULL,
@@ -40,36 +44,32 @@ class GRKKMAI_MEMORY:
             memory_type TEXT DEFAULT 'preference',
             timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
             user_consent BOOLEAN DEFAULT 1
-            )
-            """
-        )
+            );
 
-        #Memory consent table
-        conn.execute(
-            """
+            --Memory consent table
             CREATE TABLE IF NOT EXISTS consent_log (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             action TEXT NOT NULL,
             memory_description TEXT,
             user_response TEXT,
             timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
+            );
             """
         )
 
-        conn.commit()
-        conn.close()
+    def import_legacy(self, legacy_path: str = "data/GRKKMAI_MEMORY.db") -> int:
+        """Move the rows of the old standalone memory database into the shared one"""
+        return self.storage.import_legacy(legacy_path, MEMORY_TABLES)
     
+    @traced("db.memory.store_conversation")
+    @DB_WRITE_SECONDS.time(store="memory", operation="store_conversation")
     def store_conversation(self, user_message: str, ai_response: str, session_id: str = "default"):
         """Basic conversation storage"""
-        conn = sqlite3.connect(self.db_path)
-        conn.execute(
+        self.storage.execute(
             """
             INSERT INTO conversations (message, response, session_id)
             VALUES (?, ?, ?)
             """, (user_message, ai_response, session_id))
-        conn.commit()
-        conn.close()
 
     def ask_to_remember(self, memory_key: str, memory_value: str, memory_type: str = "preference") -> str:
         """Ask for consent to remember something specific"""
@@ -85,6 +85,7 @@ class GRKKMAI_MEMORY:
         """
 
         self._log_consent_request(memory_key, memory_value, memory_type)
+        CONSENT_PROMPTS.inc(store="memory")
 
         return consent_question.strip()
     
@@ -96,50 +97,50 @@ class GRKKMAI_MEMORY:
         if any(word in response_lower for word in ["yes","remember","sure","okay","ok","allow","save"]):
             self._store_explicit_memory(memory_key, memory_value, memory_type, consent=True)
             self._log_consent_response(memory_key, "granted", user_response)
+            CONSENT_RESPONSES.inc(store="memory", response="granted")
             return "Okay, got it! I'll remember that for future conversations. Thank you for letting me know!"
         
         #otherwise...
         elif any(word in response_lower for word in ["no","don't","nope","decline","refuse","never"]):
             self._log_consent_response(memory_key, "declined", user_response)
+            CONSENT_RESPONSES.inc(store="memory", response="declined")
             return " Cool, I won't be remembering that. Let me know if you change your mind in the future."
         
         #not sure?
         else:
+            CONSENT_RESPONSES.inc(store="memory", response="unclear")
             return "I'm not so sure if you want me to remember that or not. Could you tell me 'yes' or 'no' so as to follow through with your decision?"
         
+    @traced("db.memory.store_explicit_memory")
+    @DB_WRITE_SECONDS.time(store="memory", operation="store_explicit_memory")
     def _store_explicit_memory(self, memory_key: str, memory_value: str, memory_type: str, consent: bool = True):
-        conn = sqlite3.connect(self.db_path)
-        conn.execute("""
+        self.storage.execute("""
                      INSERT INTO explicit_memories (memory_key, memory_value, memory_type, user_consent)
                      VALUES (?, ?, ?, ?)
                      """, (memory_key, memory_value, memory_type, consent))
-        conn.commit()
-        conn.close()
     
+    @traced("db.memory.log_consent_request")
+    @DB_WRITE_SECONDS.time(store="memory", operation="log_consent_request")
     def _log_consent_request(self, memory_key: str, memory_value: str, memory_type: str):
         """Remembering the times (?) GRKKMAI asked for consent"""
-        conn = sqlite3.connect(self.db_path)
-        conn.execute("""
+        self.storage.execute("""
                      INSERT INTO consent_log (action, memory_description)
                      VALUES (?, ?)
                      """, ("consent_requested", f"{memory_type}: {memory_key} = {memory_value}"))
-        conn.commit()
-        conn.close()
 
+    @traced("db.memory.log_consent_response")
+    @DB_WRITE_SECONDS.time(store="memory", operation="log_consent_response")
     def _log_consent_response(self, memory_key: str, response_type: str, user_response: str):
         """Log user's yes or no"""
-        conn = sqlite3.connect(self.db_path)
-        conn.execute("""
+        self.storage.execute("""
             INSERT INTO consent_log (action, memory_description, user_response)
             VALUES (?, ?, ?)
             """, (f"consent_{response_type}", memory_key, user_response))
-        conn.commit()
-        conn.close()
 
+    @traced("db.memory.get_explicit_memories")
     def get_explicit_memories(self) -> List[Dict]:
         """Get all memories user explicitly consented to"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.execute("""
+        rows = self.storage.query("""
             SELECT memory_key, memory_value, memory_type, timestamp
             FROM explicit_memories
             WHERE user_consent = 1
@@ -147,7 +148,7 @@ class GRKKMAI_MEMORY:
             """)
         
         memories = []
-        for row in cursor.fetchall():
+        for row in rows:
             memories.append({
                 "key": row[0],
                 "value": row[1],
@@ -155,13 +156,12 @@ class GRKKMAI_MEMORY:
                 "timestamp": row[3]
                 })
             
-        conn.close()
         return memories
         
+    @traced("db.memory.find_memory")
     def find_memory(self, search_term: str) -> Optional[Dict]:
         """Key or value memory search"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.execute("""
+        row = self.storage.query_one("""
             SELECT memory_key, memory_value, memory_type, timestamp
             FROM explicit_memories
             WHERE (memory_key LIKE ? OR memory_value LIKE ?) AND user_consent = 1
@@ -169,9 +169,6 @@ class GRKKMAI_MEMORY:
             LIMIT 1
         """, (f"%{search_term}%", f"%{search_term}%"))
 
-        row = cursor.fetchone()
-        conn.close()
-
         if row is None:
             return None
 
@@ -184,47 +181,45 @@ class GRKKMAI_MEMORY:
             }
         
     
+    @traced("db.memory.forget_memory")
+    @DB_WRITE_SECONDS.time(store="memory", operation="forget_memory")
     def forget_memory(self, memory_key: str) ->  bool:
         """Forget the things the user wants"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.execute("""
+        deleted = self.storage.execute("""
             DELETE FROM explicit_memories
             WHERE memory_key LIKE ?              
-        """, (f"%{memory_key}%",))
-
-        deleted = cursor.rowcount > 0
-        conn.commit()
-        conn.close()
+        """, (f"%{memory_key}%",)) > 0
 
         if deleted:
             self._log_consent_response(memory_key, "forgotten", "user_requested_deletion")
         return deleted
     
+    @DB_WRITE_SECONDS.time(store="memory", operation="remove_explicit_memory")
+    def remove_explicit_memory(self, memory_key: str, memory_value: str) -> bool:
+        """Delete one exact memory (e.g. forgotten on a synchronized instance)"""
+        return self.storage.execute("""
+            DELETE FROM explicit_memories
+            WHERE memory_key = ? AND memory_value = ?
+        """, (memory_key, memory_value)) > 0
+
+    @traced("db.memory.get_memory_stats")
     def get_memory_stats(self) -> Dict:
         """Get statistics about stored memories"""
-        conn = sqlite3.connect(self.db_path)
-
-        cursor = conn.execute("SELECT COUNT(*) FROM explicit_memories WHERE user_consent = 1")
-        memory_count = cursor.fetchone()[0]
-
-        cursor = conn.execute("SELECT COUNT(*) FROM consent_log WHERE date(timestamp) = date('now')")
-        conversation_count = cursor.fetchone()[0]
-
-        cursor = conn.execute("SELECT COUNT(*) FROM consent_log WHERE action = 'consent_requested'")
-        consent_requests = cursor.fetchone()[0]
-
-        conn.close()
-
-        return {
-            "memories_stored": memory_count,
-            "conversations_today": conversation_count,
-            "consent_requests_made": consent_requests
-        }
+        with self.storage.reader() as conn:
+            return asdict(self.collect_stats(conn))
+
+    @staticmethod
+    def collect_stats(conn) -> MemoryStats:
+        """Memory statistics, read on a connection the caller holds (one statement)"""
+        memory_count, conversation_count, consent_requests = conn.execute("""
+            SELECT (SELECT COUNT(*) FROM explicit_memories WHERE user_consent = 1),
+                   (SELECT COUNT(*) FROM consent_log WHERE date(timestamp) = date('now')),
+                   (SELECT COUNT(*) FROM consent_log WHERE action = 'consent_requested')
+        """).fetchone()
+        return MemoryStats(memories_stored=memory_count, conversations_today=conversation_count,
+                           consent_requests_made=consent_requests)
 
     def clear_session_data(self):
         """Erase non-permanent conversation data"""
-        conn = sqlite3.connect(self.db_path)
-        conn.execute("DELETE FROM conversations")
-        conn.commit()
-        conn.close()
+        self.storage.execute("DELETE FROM conversations")
         print("🧹 Session conversation data cleared (explicit memories preserved)")
@@ -0,0 +1,203 @@
+"""
+Per-user storage namespaces for GRKKMAI
+
+Every user gets a GRKKMAI_MEMORY and SRM over a database file of their own:
+    data/users/<2 hex>/<sha1 of user id>.db
+
+Users never share a write lock, and exporting or deleting a user is a single
+file operation. Open databases are kept in an LRU so a deployment with many
+users stays within its file-descriptor budget.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List
+
+from core.memory_system import MEMORY_TABLES, GRKKMAI_MEMORY
+from core.metrics import OPEN_USER_STORES
+from core.search_memory import SRM_TABLES, SRM
+from core.storage import StorageEngine
+
+
+class UserStore:
+    """The repositories of one user, over that user's database file"""
+    __slots__ = ("user_id", "path", "storage", "memory", "search_memory", "pins", "doomed")
+
+    def __init__(self, user_id: str, path: str):
+        self.user_id = user_id
+        self.path = path
+        # One reader per user: a user's requests are few, the number of users is not
+        self.storage = StorageEngine(path, readers=1)
+        self.memory = GRKKMAI_MEMORY(storage=self.storage, verbose=False)
+        self.search_memory = SRM(storage=self.storage, verbose=False)
+        self.pins = 0
+        # Deleted while pinned: removed when the last borrower lets go
+        self.doomed = False
+        self.storage.executescript("""
+            CREATE TABLE IF NOT EXISTS namespace (key TEXT PRIMARY KEY, value TEXT);
+        """)
+        self.storage.execute("INSERT OR IGNORE INTO namespace (key, value) VALUES ('user_id', ?)", (user_id,))
+
+    def close(self):
+        self.storage.close()
+
+
+def _remove_database(path: str) -> bool:
+    """Remove a database file and its WAL files"""
+    deleted = False
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+            deleted = True
+    return deleted
+
+
+class UserNamespaces:
+    def __init__(self, root: str = "data/users", max_open: int = 64):
+        """Route user ids to their own sharded database files"""
+        self.root = root
+        self.max_open = max_open
+        # Least recently used first
+        self._open: "OrderedDict[str, UserStore]" = OrderedDict()
+        # Deleted users whose store is still borrowed; no new borrowers
+        self._doomed: Dict[str, UserStore] = {}
+        self._lock = threading.Lock()
+        self.evictions = 0
+        OPEN_USER_STORES.set_function(self.open_count)
+
+    def shard_path(self, user_id: str) -> str:
+        """Database file of a user (the id is hashed, so any string is a safe file name)"""
+        digest = hashlib.sha1(user_id.encode("utf-8")).hexdigest()
+        return os.path.join(self.root, digest[:2], f"{digest}.db")
+
+    @contextmanager
+    def using(self, user_id: str) -> Iterator[UserStore]:
+        """Borrow a user's store; it is not closed by the LRU while borrowed"""
+        store = self._acquire(user_id)
+        try:
+            yield store
+        finally:
+            with self._lock:
+                store.pins -= 1
+                last = store.doomed and store.pins == 0
+                if last:
+                    del self._doomed[store.user_id]
+            if last:
+                store.close()
+                _remove_database(store.path)
+            else:
+                self._evict()
+
+    def _acquire(self, user_id: str) -> UserStore:
+        with self._lock:
+            self._check_not_doomed(user_id)
+            store = self._open.get(user_id)
+            if store is not None:
+                self._open.move_to_end(user_id)
+                store.pins += 1
+                return store
+
+        # Opening creates the schema, keep it outside the lock
+        path = self.shard_path(user_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        opened = UserStore(user_id, path)
+
+        with self._lock:
+            if user_id in self._doomed:
+                opened.close()
+                self._check_not_doomed(user_id)
+            store = self._open.get(user_id)
+            if store is None:
+                store = self._open[user_id] = opened
+                opened = None
+            else:
+                self._open.move_to_end(user_id)
+            store.pins += 1
+
+        if opened is not None:  # another thread opened it first
+            opened.close()
+        self._evict()
+        return store
+
+    def _check_not_doomed(self, user_id: str):
+        if user_id in self._doomed:
+            raise KeyError(f"user {user_id} is being deleted")
+
+    def _evict(self):
+        """Close least recently used stores that nobody is borrowing"""
+        closing = []
+        with self._lock:
+            excess = len(self._open) - self.max_open
+            for user_id, store in list(self._open.items()):
+                if excess <= 0:
+                    break
+                if store.pins == 0:
+                    closing.append(self._open.pop(user_id))
+                    excess -= 1
+        for store in closing:
+            store.close()
+            self.evictions += 1
+
+    def exists(self, user_id: str) -> bool:
+        return user_id in self._open or os.path.exists(self.shard_path(user_id))
+
+    def export(self, user_id: str, destination: str) -> str:
+        """Copy a user's database to `destination` (a consistent online backup)"""
+        if not self.exists(user_id):
+            raise KeyError(user_id)
+
+        with self.using(user_id) as store:
+            with store.storage.reader() as source:
+                target = sqlite3.connect(destination)
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+        return destination
+
+    def export_data(self, user_id: str) -> Dict[str, List[Dict]]:
+        """Every row a user has, table by table (for JSON export)"""
+        if not self.exists(user_id):
+            raise KeyError(user_id)
+
+        data = {}
+        with self.using(user_id) as store:
+            with store.storage.snapshot() as conn:
+                for table in MEMORY_TABLES + SRM_TABLES:
+                    cursor = conn.execute(f"SELECT * FROM {table} ORDER BY id")
+                    columns = [column[0] for column in cursor.description]
+                    data[table] = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        return data
+
+    def delete(self, user_id: str) -> bool:
+        """Forget a user entirely by removing their database file
+
+        A store that a request still borrows is closed and removed when that
+        request lets go of it; until then nobody else can borrow it.
+        """
+        with self._lock:
+            if user_id in self._doomed:
+                return True
+            store = self._open.pop(user_id, None)
+            if store is not None and store.pins:
+                store.doomed = True
+                self._doomed[user_id] = store
+                return True
+        if store is not None:
+            store.close()
+        return _remove_database(self.shard_path(user_id))
+
+    def close(self):
+        with self._lock:
+            stores = list(self._open.values()) + list(self._doomed.values())
+            self._open.clear()
+            self._doomed.clear()
+        for store in stores:
+            store.close()
+
+    def open_count(self) -> int:
+        return len(self._open) + len(self._doomed)
@@ -1,10 +1,19 @@
+import atexit
 import json
+import os
 import random
+import threading
+import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterable, List, Any, Optional
 from dataclasses import dataclass
 import math
 
+from core.phrase_engine import PhraseEngine
+from core.profile_format import PROFILE_SUFFIX, load_profile, write_profile
+from core.trait_engine import (MOOD_BOOSTS, MOOD_HALF_LIFE, SPEECH_EFFECTS, TRAIT_EFFECTS, BatchEvolution,
+                               Interaction, TraitEngine, decay_mood)
+
 @dataclass
 class PersonalityTrait:
     """Evolution-able personality trait"""
@@ -16,15 +25,37 @@ class PersonalityTrait:
     influences: List[str]
 
 class GRKKMAIPersonality:
-    def __init__(self, config_file: str = "data/personality_config.json"):
+    def __init__(self, config_file: str = "data/personality_config.json", snapshot_interval: float = 30.0,
+                 snapshot_every: int = 500, mood_half_life: float = MOOD_HALF_LIFE):
         """GRKKMAI Personality system Initialization"""
         self.config_file = config_file
+        # A .grkp profile (core/profile_format.py) opens far faster than JSON
+        self.binary_profile = config_file.endswith(PROFILE_SUFFIX)
         self.traits = {}
+        # name -> [value, time it was set]; read through mood(), which applies the decay since then
         self.mood_factors = {}
+        self.mood_half_life = mood_half_life
+        # Bumped whenever a trait value changes, so cached phrase probabilities know when to refresh
+        self.trait_version = 0
+        self.phrases = PhraseEngine()
         self.speech_patterns = {}
         self.behavioral_quirks = []
         self.conversation_history = []
         self.personality_events = []
+        # Shared by every session of a multi-session engine
+        self._lock = threading.RLock()
+
+        # Persistence: every evolution is appended to a small event log; the
+        # full profile (a snapshot) is only rewritten every `snapshot_interval`
+        # seconds or `snapshot_every` events, atomically
+        self.event_log_file = os.path.splitext(config_file)[0] + ".events.jsonl"
+        self.snapshot_interval = snapshot_interval
+        self.snapshot_every = snapshot_every
+        self._event_log = None
+        self._seq = 0              # last logged event
+        self._snapshot_seq = 0     # last event included in the snapshot
+        self._snapshot_timer: Optional[threading.Timer] = None
+        atexit.register(self.flush)
     
         # Load initial personality
         self.load_personality()
@@ -32,13 +63,26 @@ class GRKKMAIPersonality:
 
     def load_personality(self):
         """Load personality from config or create default Tachikoma-like traits"""
+        created = False
         try:
-            with open(self.config_file, 'r') as f:
-                config = json.load(f)
-                self._load_from_config(config)
+            if self.binary_profile:
+                # Only the events the personality keeps are decoded
+                self._load_from_config(load_profile(self.config_file, max_events=100))
+            else:
+                with open(self.config_file, 'r') as f:
+                    config = json.load(f)
+                    self._load_from_config(config)
         except FileNotFoundError:
             print("Creating new personality profie...")
             self._create_default_personality()
+            created = True
+
+        # Evolutions logged after the last snapshot
+        replayed = self._replay_events()
+        self.trait_version += 1
+        if replayed:
+            print(f"Replayed {replayed} personality events.")
+        if created:
             self.save_personality()
 
     def _create_default_personality(self):
@@ -118,11 +162,12 @@ class GRKKMAIPersonality:
         ]
 
         # Current mood factors 
+        now = time.time()
         self.mood_factors = {
-            "current_energy":0.8,
-            "curiosity_satisfaction": 0.5,
-            "social_fulfillment": 0.6,
-            "learning_excitement": 0.7
+            "current_energy": [0.8, now],
+            "curiosity_satisfaction": [0.5, now],
+            "social_fulfillment": [0.6, now],
+            "learning_excitement": [0.7, now]
         }
     
     def _load_from_config(self, config: Dict):
@@ -133,65 +178,209 @@ class GRKKMAIPersonality:
 
         self.speech_patterns = config.get("speech_patterns", {})
         self.behavioral_quirks = config.get("behavioral_quirks", {})
-        self.mood_factors = config.get("mood_factors", {})
+        self.mood_factors = {name: self._mood_entry(entry) for name, entry in config.get("mood_factors", {}).items()}
         self.personality_events = config.get("personality_events", {})
+        self._seq = self._snapshot_seq = config.get("log_seq", 0)
 
     def save_personality(self):
-        """Save current personality state"""
-        config = {
-            "traits": {name: trait.__dict__ for name, trait in self.traits.items()},
-            "speech_patterns": self.speech_patterns,
-            "behavioral_quirks": self.behavioral_quirks,
-            "mood_factors": self.mood_factors,
-            "personality_events": self.personality_events,
-            "last_saved": datetime.now().isoformat()
-        }
+        """Save current personality state (a snapshot; the event log starts over)"""
+        with self._lock:
+            if self._snapshot_timer is not None:
+                self._snapshot_timer.cancel()
+                self._snapshot_timer = None
+
+            config = {
+                "traits": {name: trait.__dict__ for name, trait in self.traits.items()},
+                "speech_patterns": self.speech_patterns,
+                "behavioral_quirks": self.behavioral_quirks,
+                "mood_factors": self.mood_factors,
+                "personality_events": self.personality_events,
+                "last_saved": datetime.now().isoformat(),
+                "log_seq": self._seq
+            }
+
+            # Write-temp-then-rename: a crash leaves either the old or the new profile
+            if self.binary_profile:
+                write_profile(config, self.config_file)
+            else:
+                temp_file = f"{self.config_file}.tmp"
+                with open(temp_file, 'w') as f:
+                    json.dump(config, f, separators=(",", ":"), default=str)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_file, self.config_file)
+            self._snapshot_seq = self._seq
+
+            # Everything logged so far is in the snapshot now
+            if self._event_log is not None:
+                self._event_log.close()
+                self._event_log = None
+            if os.path.exists(self.event_log_file):
+                os.remove(self.event_log_file)
+
+    def flush(self):
+        """Snapshot now if there are evolutions that only the event log has"""
+        with self._lock:
+            if self._seq != self._snapshot_seq:
+                try:
+                    self.save_personality()
+                except OSError as e:
+                    print(f"⚠️ Could not save personality: {e}")
+
+    def _log_event(self, event: Dict):
+        """Append one evolution to the event log (O(1)), snapshotting when due"""
+        self._seq += 1
+        event["seq"] = self._seq
+        try:
+            if self._event_log is None:
+                self._event_log = open(self.event_log_file, "a")
+            self._event_log.write(json.dumps(event, separators=(",", ":"), default=str) + "\n")
+            self._event_log.flush()
+        except OSError as e:
+            print(f"⚠️ Could not log personality event: {e}")
+
+        pending = self._seq - self._snapshot_seq
+        if pending >= self.snapshot_every:
+            self.flush()
+        elif self._snapshot_timer is None:
+            self._snapshot_timer = threading.Timer(self.snapshot_interval, self.flush)
+            self._snapshot_timer.daemon = True
+            self._snapshot_timer.start()
+
+    def _replay_events(self) -> int:
+        """Apply the evolutions logged after the snapshot"""
+        try:
+            with open(self.event_log_file, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return 0
+
+        replayed = 0
+        good = 0  # bytes of whole, valid lines
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b"\n"):
+                break  # torn last line from a crash mid-append
+            try:
+                event = json.loads(line)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                break
+            good += len(line)
+            if event["seq"] <= self._snapshot_seq:
+                continue
+
+            # Events hold absolute values, so replaying one twice is harmless
+            for name, (value, last_updated) in event.get("traits", {}).items():
+                if name in self.traits:
+                    self.traits[name].value = value
+                    self.traits[name].last_updated = last_updated
+            self.speech_patterns.update(event.get("speech", {}))
+            for name, entry in event.get("mood", {}).items():
+                self.mood_factors[name] = self._mood_entry(entry)
+            if event.get("evolved"):
+                self._remember_event(event["ts"], event["trigger"], event.get("context", {}))
+            for trigger, context in event.get("remembered", ()):
+                self._remember_event(event["ts"], trigger, context)
+            self._seq = event["seq"]
+            replayed += 1
+
+        if good < len(data):
+            # Cut the torn tail off, or the next append would be glued onto it
+            # and every replay after that would stop there
+            try:
+                with open(self.event_log_file, "r+b") as f:
+                    f.truncate(good)
+            except OSError as e:
+                print(f"⚠️ Could not repair personality event log: {e}")
+        return replayed
+
+    def _remember_event(self, timestamp: str, trigger: str, context: Dict):
+        self.personality_events.append ({
+            "timestamp": timestamp,
+            "trigger": trigger,
+            "context": context,
+            "traits_affected": [name for name in self.traits.keys()]
+        })
+
+        #Keep only recent events (last 100)
+        self.personality_events = self. personality_events[-100:]
 
-        with open(self.config_file, 'w') as f:
-            json.dump(config, f, indent=2)
-        
     def evolve_personality(self, interaction_type: str, context: Dict):
         """Evolve personality based on interactivity"""
-        evolution_occured = False
+        with self._lock:
+            evolution_occured = False
+            traits_before = {name: trait.value for name, trait in self.traits.items()}
+            philosophical_before = self.speech_patterns.get("philosophical_tendency")
 
-        if interaction_type == "question_asked":
-            evolution_occured |= self._evolve_trait("curiosity", 0.02, context)
+            for trait_name, change_amount in TRAIT_EFFECTS.get(interaction_type, {}).items():
+                evolution_occured |= self._evolve_trait(trait_name, change_amount, context)
+            for pattern, change_amount in SPEECH_EFFECTS.get(interaction_type, {}).items():
+                self.speech_patterns[pattern] = min(1.0, self.speech_patterns[pattern] + change_amount)
 
-        elif interaction_type == "learned_something":
-            evolution_occured |= self._evolve_trait("curiosity", 0.01, context)
-            evolution_occured |= self._evolve_trait("entusiasm", 0.015, context)
-        
-        elif interaction_type == "helped_user":
-            evolution_occured |= self._evolve_trait("loyalty", 0.01, context)
-            evolution_occured |= self._evolve_trait("empathy", 0.015, context)
-        
-        elif interaction_type == "playful_conversation":
-            evolution_occured |= self._evolve_trait("playfulness", 0.01, context)
-            evolution_occured |= self._evolve_trait("enthusiasm", 0.01, context)
-
-        elif interaction_type == "philosophical_discussion":
-            evolution_occured |= self._evolve_trait("independence", 0.02, context)
-            self.speech_patterns["philosophical_tendency"] = min(1.0,
-                self.speech_patterns["philosophical_tendency"] + 0.02)
-            
-        elif interaction_type == "emotional_support":
-            evolution_occured |= self._evolve_trait("empathy", 0.02, context)
-            evolution_occured |= self._evolve_trait("loyalty", 0.01, context)
-
-        #Update mood based on interaction
-        self._update_mood(interaction_type, context)
-
-        #Log personality evolution event
-        if evolution_occured:
-            self.personality_events.append ({
-                "timestamp": datetime.now().isoformat(),
+            #Update mood based on interaction
+            mood_changes = self._update_mood(interaction_type, context)
+
+            #Log personality evolution event
+            timestamp = datetime.now().isoformat()
+            if evolution_occured:
+                self._remember_event(timestamp, interaction_type, context)
+
+            #Persist what changed (absolute values, so the log can be replayed)
+            event = {
+                "ts": timestamp,
                 "trigger": interaction_type,
-                "context": context,
-                "traits_affected": [name for name in self.traits.keys()]
-            })
+                "evolved": evolution_occured,
+                "traits": {name: [trait.value, trait.last_updated] for name, trait in self.traits.items()
+                           if trait.value != traits_before.get(name)},
+                "mood": mood_changes
+            }
+            if self.speech_patterns.get("philosophical_tendency") != philosophical_before:
+                event["speech"] = {"philosophical_tendency": self.speech_patterns["philosophical_tendency"]}
+            if evolution_occured:
+                event["context"] = context
+            self._log_event(event)
 
-            #Keep only recent events (last 100)
-            self.personality_events = self. personality_events[-100:]
+    def evolve_many(self, interactions: Iterable[Interaction], seed: Optional[int] = None) -> BatchEvolution:
+        """Apply many interactions (types, or (type, context) pairs) at once with the TraitEngine"""
+        interactions = list(interactions)
+        with self._lock:
+            engine = TraitEngine.from_personality(self, seed)
+            mood_before = engine.mood_values()
+            result = engine.evolve_many(interactions)
+
+            timestamp = datetime.now().isoformat()
+            for name, value in engine.trait_values().items():
+                self.traits[name].value = value
+            for name in result.touched:
+                self.traits[name].last_updated = timestamp
+            self.trait_version += 1
+            now = time.time()
+            mood_changes = {name: [value, now] for name, value in engine.mood_values().items()
+                            if value != mood_before[name]}
+            self.mood_factors.update(mood_changes)
+            speech_changes = {name: value for name, value in engine.speech.items()
+                              if value != self.speech_patterns.get(name)}
+            self.speech_patterns.update(speech_changes)
+
+            # Only the last 100 evolutions are kept anyway
+            remembered = []
+            for index in result.evolved[-100:]:
+                item = interactions[index]
+                trigger, context = (item, {}) if isinstance(item, str) else item
+                self._remember_event(timestamp, trigger, context)
+                remembered.append([trigger, context])
+
+            event = {
+                "ts": timestamp,
+                "trigger": "batch",
+                "evolved": False,
+                "traits": {name: [self.traits[name].value, timestamp] for name in result.touched},
+                "mood": mood_changes,
+                "remembered": remembered
+            }
+            if speech_changes:
+                event["speech"] = speech_changes
+            self._log_event(event)
+            return result
 
     def _evolve_trait(self, trait_name: str, change_amount: float, context: Dict) -> bool:
         """Evolve a specific personality trait"""
@@ -209,77 +398,50 @@ class GRKKMAIPersonality:
         trait.value = max(0.0, min(1.0, trait.value + actual_change))
         trait.last_updated = datetime.now().isoformat()
 
+        if trait.value != old_value:
+            self.trait_version += 1
+
         #Evaluate trait change
         return abs(trait.value - old_value) > 0.001
     
-    def _update_mood(self, interaction_type: str, context: Dict):
-        """Update current mood factors"""
-        if interaction_type == "learned_something":
-            self.mood_factors["learning_excitement"] = min(1.0,
-                self.mood_factors["learning_excitement"] + 0.1)
-            self.mood_factors["curiosity_satisfaction"] = min(1.0,
-                self.mood_factors["curiosity_satisfaction"] + 0.05)
-        
-        elif interaction_type == "social_interaction":
-            self.mood_factors["social_fulfillment"] = min(1.0,
-                self.mood_factors["social_fulfillment"] + 0.08)
+    def _update_mood(self, interaction_type: str, context: Dict) -> Dict[str, List[float]]:
+        """Boost the mood factors an interaction affects; returns the changed entries"""
+        now = time.time()
+        changes = {}
+        for mood, boost in MOOD_BOOSTS.get(interaction_type, {}).items():
+            changes[mood] = self.mood_factors[mood] = [min(1.0, self.mood(mood, now) + boost), now]
+        return changes
+
+    def mood(self, name: str, now: Optional[float] = None) -> float:
+        """Current value of a mood factor (the decay since it was set is applied on read)"""
+        value, updated = self.mood_factors[name]
+        return decay_mood(value, (now or time.time()) - updated, self.mood_half_life)
 
-        elif interaction_type == "helped_user":
-            self.mood_factors["current_energy"] = min(1.0,
-                self.mood_factors["current_energy"] + 0.1)
+    def current_mood(self) -> Dict[str, float]:
+        now = time.time()
+        return {name: self.mood(name, now) for name in self.mood_factors}
 
-        #Natural mood decay over time
-        for mood in self.mood_factors:
-            self.mood_factors[mood] = max(0.1, self.mood_factors[mood] - 0.01)
+    @staticmethod
+    def _mood_entry(entry) -> List[float]:
+        # Profiles from before time-based decay store bare values
+        if isinstance(entry, (int, float)):
+            return [float(entry), time.time()]
+        return [float(entry[0]), float(entry[1])]
 
     def generate_response_style(self, base_response: str, context: Dict) -> str:
         """Apply personality on response style"""
-        modified_response = base_response
-
-        #Apply curiosity trait
-        if random.random() < self.traits["curiosity"].value * 0.8:
-            follow_ups = [
-                " What do you think about that?",
-                " How did you discover that?",
-                " Can you tell me more?",
-                " That's fascinating - what else is there to know?",
-                " I'm so curious to learn more!"
-            ]
-            modified_response += random.choice(follow_ups)
-
-        #Apply playfulness trait
-        if random.random() < self.traits["enthusiasm"].value * 0.4:
-            enthusiasm_additions = [
-                " That's so cool!",
-                " Amazing!",
-                " Wow!",
-                " This is interesting!",
-                " I think I've learned about this before!"
-                " I love learning about this!"
-            ]
-            modified_response += random.choice(enthusiasm_additions)
-
-        #Apply empathy for emotional content
-        if any(word in base_response.lower() for word in ["sad", "worried", "problem", "issue", "troubled", "trouble", "difficult"]):
-            if random.random() < self.traits["empathy"].value:
-                empathy_additions = [
-                    " I'm here to help!",
-                    " You're not alone in this.",
-                    " We can figure this out together!",
-                    " I care about how you're feeling.",
-                    " I understand how you're feeling, and I wish to help you out!"
-                ]
-                modified_response += random.choice(empathy_additions)
-
-
-        return modified_response
+        return self.phrases.apply("personality", base_response, self.trait_version, self.trait_values)
+
+    def trait_values(self) -> Dict[str, float]:
+        return {name: trait.value for name, trait in self.traits.items()}
 
     def get_current_mood_description(self) -> str:
         """Get a description of current mood/state"""
-        energy = self.mood_factors["current_energy"]
-        curiosity = self.mood_factors["curiosity_satisfaction"]
-        social = self.mood_factors["social_fulfillment"]
-        learning = self.mood_factors["learning_excitement"]
+        mood = self.current_mood()
+        energy = mood["current_energy"]
+        curiosity = mood["curiosity_satisfaction"]
+        social = mood["social_fulfillment"]
+        learning = mood["learning_excitement"]
 
         if energy > 0.8 and learning > 0.7:
             return "incredibly excited and energetic about learning!"
@@ -311,6 +473,7 @@ class GRKKMAIPersonality:
     def reset_personality(self):
         """Reset personality to initial defaults"""
         self._create_default_personality()
+        self.trait_version += 1
         self.personality_events = []
         self.save_personality()
         print("Personality was reset. Initial defaults applied.")
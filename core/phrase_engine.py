@@ -0,0 +1,129 @@
+"""
+Precompiled response-style phrases for GRKKMAI
+
+A style is a list of rules: "with probability <trait value x scale> (or a fixed
+chance), and only if the text matches a trigger, append a phrase from a
+table". Phrase tables are tuples built once, every trigger list is one
+compiled regex (a single pass over the text instead of one substring search
+per keyword), and the per-rule probabilities are cached until the trait
+values they depend on change.
+"""
+
+import random
+import re
+from typing import Callable, Dict, Hashable, List, Optional, Pattern, Tuple
+
+PHRASES: Dict[str, List[str]] = {
+    "curious_follow_ups": [
+        " What do you think about that?",
+        " How did you discover that?",
+        " Can you tell me more?",
+        " That's fascinating - what else is there to know?",
+        " I'm so curious to learn more!"
+    ],
+    "enthusiastic": [
+        " That's so cool!",
+        " Amazing!",
+        " Wow!",
+        " This is interesting!",
+        " I think I've learned about this before!",
+        " I love learning about this!"
+    ],
+    "empathetic": [
+        " I'm here to help!",
+        " You're not alone in this.",
+        " We can figure this out together!",
+        " I care about how you're feeling.",
+        " I understand how you're feeling, and I wish to help you out!"
+    ],
+    "follow_ups": [
+        " What do you think about that?",
+        " Can you tell me more?",
+        " How did you discover that?",
+        " Isn't that interesting?",
+        " What else interests you?",
+        " Do you want to explore that further?"
+    ],
+    "excited": [
+        " That's so cool!",
+        " Wow!",
+        " Amazing!",
+        " I want to learn more!",
+        " Ooooh!",
+        " This is interesting!"
+    ],
+}
+
+TRIGGERS: Dict[str, List[str]] = {
+    "emotional": ["sad", "worried", "problem", "issue", "troubled", "trouble", "difficult"],
+}
+
+# Rules are applied in order; "trait" + "scale" or a fixed "chance" gives the probability
+STYLES: Dict[str, List[Dict]] = {
+    # GRKKMAIPersonality.generate_response_style
+    "personality": [
+        {"phrases": "curious_follow_ups", "trait": "curiosity", "scale": 0.8},
+        {"phrases": "enthusiastic", "trait": "enthusiasm", "scale": 0.4},
+        {"phrases": "empathetic", "trait": "empathy", "scale": 1.0, "trigger": "emotional"},
+    ],
+    # GRKKMAI._add_personality_touches
+    "touches": [
+        {"phrases": "follow_ups", "trait": "curiosity", "scale": 1.0},
+        {"phrases": "excited", "chance": 0.3},
+    ],
+}
+
+# (probability, phrases, trigger)
+Rule = Tuple[float, Tuple[str, ...], Optional[Pattern]]
+
+
+class PhraseEngine:
+    def __init__(self, phrases: Optional[Dict[str, List[str]]] = None, styles: Optional[Dict[str, List[Dict]]] = None,
+                 triggers: Optional[Dict[str, List[str]]] = None, rng: Optional[random.Random] = None):
+        """Index the phrase tables and compile the triggers once"""
+        self.phrases = {name: tuple(table) for name, table in (phrases or PHRASES).items()}
+        # Matched against the lowercased text: in CPython that is several times
+        # faster than an IGNORECASE pattern
+        self.triggers = {name: re.compile("|".join(re.escape(word.lower()) for word in words))
+                         for name, words in (triggers or TRIGGERS).items()}
+        self.styles = styles or STYLES
+        self.rng = rng or random  # the module-level generator, so random.seed() still applies
+        self._compiled: Dict[str, Tuple[Hashable, List[Rule]]] = {}
+        self.recompiles = 0
+
+    def rules(self, style: str, key: Hashable, traits: Callable[[], Dict[str, float]]) -> List[Rule]:
+        """A style's rules with probabilities; recomputed only when `key` (the trait version) changes"""
+        cached = self._compiled.get(style)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        values = traits()
+        compiled = []
+        for rule in self.styles[style]:
+            if "chance" in rule:
+                probability = rule["chance"]
+            else:
+                probability = values.get(rule["trait"], 0.0) * rule.get("scale", 1.0)
+            trigger = self.triggers[rule["trigger"]] if rule.get("trigger") else None
+            compiled.append((probability, self.phrases[rule["phrases"]], trigger))
+        self._compiled[style] = (key, compiled)
+        self.recompiles += 1
+        return compiled
+
+    def apply(self, style: str, text: str, key: Hashable, traits: Callable[[], Dict[str, float]]) -> str:
+        """Append the phrases a style picks for text"""
+        cached = self._compiled.get(style)
+        rules = cached[1] if cached is not None and cached[0] == key else self.rules(style, key, traits)
+        rng = self.rng
+        styled = text
+        lowered = None
+        for probability, phrases, trigger in rules:
+            if trigger is not None:
+                if lowered is None:
+                    lowered = text.lower()  # triggers look at the text before any additions
+                if trigger.search(lowered) is None:
+                    continue
+            if rng.random() < probability:
+                # Cheaper than rng.choice(), which draws random bits in a loop
+                styled += phrases[int(rng.random() * len(phrases))]
+        return styled
@@ -0,0 +1,134 @@
+"""
+Speculative prefetch of likely follow-up searches for GRKKMAI
+"""
+
+import threading
+from typing import List
+
+from core.metrics import QUEUE_DEPTH
+
+
+# Request words that analyze_question picks up as concepts but that make poor topics
+FILLER_CONCEPTS = {"explain", "tell", "about", "information", "learn", "research", "latest", "current", "recent"}
+
+
+class SearchPrefetcher:
+    def __init__(self, search, max_concurrency: int = 1, max_candidates: int = 3, max_bytes: int = 64_000,
+                 max_cache_entries: int = 12, max_results: int = 3, start_delay: float = 0.5):
+        """Low-priority cache warmer with strict concurrency, bandwidth and cache budgets"""
+        self.search = search
+        self.max_candidates = max_candidates
+        self.max_bytes = max_bytes  # result text fetched per round
+        self.max_cache_entries = max_cache_entries  # cache slots prefetched entries may occupy
+        self.max_results = max_results
+        self.start_delay = start_delay
+        self.enabled = True
+
+        # Shared across rounds: a cancelled round may still be stuck in a network call
+        self._slots = threading.Semaphore(max_concurrency)
+        self._max_concurrency = max_concurrency
+        self._cancel = threading.Event()
+        self._cancel.set()
+
+        self.prefetched = 0
+        self.bytes_fetched = 0
+        self.cancelled_rounds = 0
+
+    def candidate_queries(self, key_concepts: List[str]) -> List[str]:
+        """Likely next questions: secondary concepts, 'X vs Y' and 'X examples'"""
+        key_concepts = [concept for concept in key_concepts if concept not in FILLER_CONCEPTS]
+        if not key_concepts:
+            return []
+
+        primary, secondary = key_concepts[0], key_concepts[1:]
+        candidates = [f"what is {concept}" for concept in secondary[:2]]
+        if secondary:
+            candidates.append(f"{primary} vs {secondary[0]}")
+        candidates.append(f"{primary} examples")
+
+        return candidates[:self.max_candidates]
+
+    def schedule(self, key_concepts: List[str]):
+        """Start a new prefetch round, replacing any round still running"""
+        self.cancel()
+        if not self.enabled:
+            return
+
+        # Warm exactly the query variants a real search for each candidate would run
+        queries = []
+        for candidate in self.candidate_queries(key_concepts):
+            for query in self.search._generate_search_queries(candidate):
+                if query not in queries and not self.search._is_cached(query, self.max_results):
+                    queries.append(query)
+
+        if not queries:
+            return
+
+        cancel = threading.Event()
+        self._cancel = cancel
+        QUEUE_DEPTH.set(len(queries), queue="prefetch")
+        workers = min(self._max_concurrency, len(queries))
+        budget = {"bytes": self.max_bytes, "workers": workers}
+        lock = threading.Lock()
+
+        for _ in range(workers):
+            worker = threading.Thread(target=self._run, args=(queries, budget, lock, cancel),
+                                      name="grkkm-prefetch", daemon=True)
+            worker.start()
+
+    def cancel(self):
+        """Stop the current round, if one is running; results arriving after this are discarded"""
+        if not self._cancel.is_set():
+            self._cancel.set()
+            self.cancelled_rounds += 1
+            QUEUE_DEPTH.set(0, queue="prefetch")
+
+    def _run(self, queries: List[str], budget: dict, lock: threading.Lock, cancel: threading.Event):
+        try:
+            self._prefetch(queries, budget, lock, cancel)
+        finally:
+            with lock:
+                budget["workers"] -= 1
+                finished = budget["workers"] == 0
+            # The round ran out of queries or budget: there is nothing left for cancel() to stop
+            if finished and not cancel.is_set():
+                cancel.set()
+                QUEUE_DEPTH.set(0, queue="prefetch")
+
+    def _prefetch(self, queries: List[str], budget: dict, lock: threading.Lock, cancel: threading.Event):
+        # Give the user a moment to start typing before touching the network
+        if cancel.wait(self.start_delay):
+            return
+
+        while not cancel.is_set():
+            with lock:
+                if not queries or budget["bytes"] <= 0:
+                    QUEUE_DEPTH.set(0, queue="prefetch")
+                    return
+                query = queries.pop(0)
+                QUEUE_DEPTH.set(len(queries), queue="prefetch")
+
+            # Wait for a free slot, but give up as soon as the round is cancelled
+            while not self._slots.acquire(timeout=0.1):
+                if cancel.is_set():
+                    return
+
+            try:
+                if cancel.is_set():
+                    return
+                results = self.search._search_web(query, self.max_results, kind="prefetch")
+            finally:
+                self._slots.release()
+
+            if results is None or cancel.is_set():
+                continue
+
+            size = sum(len(r["title"]) + len(r["url"]) + len(r["snippet"]) for r in results)
+            with lock:
+                budget["bytes"] -= size
+                self.bytes_fetched += size
+
+            key = (self.search._normalize_query(query), self.max_results)
+            if self.search._cache_put(key, results, prefetched=True, prefetch_budget=self.max_cache_entries):
+                with lock:
+                    self.prefetched += 1
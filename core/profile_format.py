@@ -0,0 +1,300 @@
+"""
+Binary personality profile format (.grkp)
+
+An optional alternative to personality_config.json that opens in
+microseconds: fixed-size records and columns that are read in place (the
+file can be memory-mapped), with every string stored once in a string table.
+Conversion to and from JSON is lossless, so profiles stay editable:
+
+    python core/profile_format.py import data/personality_config.json data/personality.grkp
+    python core/profile_format.py export data/personality.grkp data/personality_config.json
+
+Layout (little-endian), version 1:
+    header    magic "GRKP", version, trait/event/string counts, section offsets
+    strings   (count + 1) u32 offsets, then the UTF-8 bytes
+    traits    one record per trait: key, name, value, base_value,
+              evolution_rate, last_updated, influences (JSON)
+    events    three u32 columns: timestamp, trigger, the other fields (JSON)
+    extra     the remaining config keys, as one JSON document
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from collections.abc import Sequence
+from typing import Dict, Iterable, List, Optional
+
+PROFILE_MAGIC = b"GRKP"
+PROFILE_VERSION = 1
+PROFILE_SUFFIX = ".grkp"
+
+_HEADER = struct.Struct("<4sHHIIIQQQQ")
+_TRAIT = struct.Struct("<IIdddII")
+_MISSING = 0xFFFFFFFF  # string index of a field an event does not have
+
+TRAIT_FIELDS = ("name", "value", "base_value", "evolution_rate", "last_updated", "influences")
+
+
+class ProfileFormatError(ValueError):
+    pass
+
+
+def _compact(value) -> str:
+    return json.dumps(value, separators=(",", ":"), default=str)
+
+
+class _StringTable:
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+        self.strings: List[str] = []
+
+    def add(self, text: str) -> int:
+        position = self.index.get(text)
+        if position is None:
+            position = self.index[text] = len(self.strings)
+            self.strings.append(text)
+        return position
+
+    def encode(self) -> bytes:
+        blobs = [text.encode("utf-8") for text in self.strings]
+        offsets, position = [0], 0
+        for blob in blobs:
+            position += len(blob)
+            offsets.append(position)
+        return struct.pack(f"<{len(offsets)}I", *offsets) + b"".join(blobs)
+
+
+def encode_profile(config: Dict) -> bytes:
+    """A personality config (as saved to JSON) in the binary format"""
+    strings = _StringTable()
+
+    traits = []
+    for key, trait in config.get("traits", {}).items():
+        if set(trait) != set(TRAIT_FIELDS):
+            raise ProfileFormatError(f"trait {key!r} must have exactly the fields {', '.join(TRAIT_FIELDS)}")
+        traits.append(_TRAIT.pack(strings.add(key), strings.add(trait["name"]), trait["value"], trait["base_value"],
+                                  trait["evolution_rate"], strings.add(str(trait["last_updated"])),
+                                  strings.add(_compact(trait["influences"]))))
+
+    events = config.get("personality_events") or []
+    timestamps, triggers, rests = [], [], []
+    for event in events:
+        rest = dict(event)
+        timestamp, trigger = rest.pop("timestamp", None), rest.pop("trigger", None)
+        # Non-string values go with the other fields, so they come back unchanged
+        if not isinstance(timestamp, str):
+            if timestamp is not None:
+                rest["timestamp"] = timestamp
+            timestamp = None
+        if not isinstance(trigger, str):
+            if trigger is not None:
+                rest["trigger"] = trigger
+            trigger = None
+        timestamps.append(_MISSING if timestamp is None else strings.add(timestamp))
+        triggers.append(_MISSING if trigger is None else strings.add(trigger))
+        rests.append(strings.add(_compact(rest)))
+
+    extra = {key: value for key, value in config.items() if key not in ("traits", "personality_events")}
+    extra_blob = _compact(extra).encode("utf-8")
+    count = len(events)
+    event_blob = struct.pack(f"<{count}I{count}I{count}I", *timestamps, *triggers, *rests)
+    string_blob = strings.encode()
+    trait_blob = b"".join(traits)
+
+    strings_offset = _HEADER.size
+    traits_offset = strings_offset + len(string_blob)
+    events_offset = traits_offset + len(trait_blob)
+    extra_offset = events_offset + len(event_blob)
+    header = _HEADER.pack(PROFILE_MAGIC, PROFILE_VERSION, 0, len(traits), count, len(strings.strings),
+                          strings_offset, traits_offset, events_offset, extra_offset)
+    return header + string_blob + trait_blob + event_blob + extra_blob
+
+
+def write_profile(config: Dict, path: str):
+    """Write a profile atomically (temp file, fsync, rename)"""
+    temp_file = f"{path}.tmp"
+    with open(temp_file, "wb") as f:
+        f.write(encode_profile(config))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_file, path)
+
+
+class BinaryProfile:
+    def __init__(self, path: str, use_mmap: bool = True):
+        """Open a .grkp profile; records are decoded only when read"""
+        self.path = path
+        self._mmap = None
+        with open(path, "rb") as f:
+            if use_mmap and os.fstat(f.fileno()).st_size:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._buffer = memoryview(self._mmap)
+            else:
+                self._buffer = memoryview(f.read())
+
+        if len(self._buffer) < _HEADER.size:
+            self.close()
+            raise ProfileFormatError(f"{path} is not a GRKKMAI profile")
+        (magic, self.version, _, self.trait_count, self.event_count, self.string_count, strings_offset,
+         self._traits_offset, events_offset, self._extra_offset) = _HEADER.unpack_from(self._buffer)
+        if magic != PROFILE_MAGIC:
+            self.close()
+            raise ProfileFormatError(f"{path} is not a GRKKMAI profile")
+        if self.version > PROFILE_VERSION:
+            self.close()
+            raise ProfileFormatError(f"{path} is profile version {self.version}, "
+                                     f"this GRKKMAI reads up to {PROFILE_VERSION}")
+
+        self._string_offsets = self._buffer[strings_offset:strings_offset + 4 * (self.string_count + 1)].cast("I")
+        self._string_data = strings_offset + 4 * (self.string_count + 1)
+        self._strings: Optional[List[str]] = None
+        column = 4 * self.event_count
+        self._timestamps = self._buffer[events_offset:events_offset + column].cast("I")
+        self._triggers = self._buffer[events_offset + column:events_offset + 2 * column].cast("I")
+        self._rests = self._buffer[events_offset + 2 * column:events_offset + 3 * column].cast("I")
+        self.events = _EventColumns(self)
+
+    def string(self, index: int) -> str:
+        if self._strings is not None:
+            return self._strings[index]
+        start = self._string_data + self._string_offsets[index]
+        end = self._string_data + self._string_offsets[index + 1]
+        return str(self._buffer[start:end], "utf-8")
+
+    def strings(self) -> List[str]:
+        """The whole string table, decoded once (cheaper than string() for large reads)"""
+        if self._strings is None:
+            offsets = self._string_offsets.tolist()
+            data = bytes(self._buffer[self._string_data:self._string_data + offsets[-1]])
+            if data.isascii():
+                # Byte offsets are character offsets: decode once and slice
+                text = data.decode("ascii")
+                self._strings = [text[a:b] for a, b in zip(offsets, offsets[1:])]
+            else:
+                self._strings = [data[a:b].decode("utf-8") for a, b in zip(offsets, offsets[1:])]
+        return self._strings
+
+    def traits(self) -> Dict[str, Dict]:
+        result = {}
+        for i in range(self.trait_count):
+            key, name, value, base_value, rate, last_updated, influences = _TRAIT.unpack_from(
+                self._buffer, self._traits_offset + i * _TRAIT.size)
+            result[self.string(key)] = {"name": self.string(name), "value": value, "base_value": base_value,
+                                        "evolution_rate": rate, "last_updated": self.string(last_updated),
+                                        "influences": json.loads(self.string(influences))}
+        return result
+
+    def event(self, index: int) -> Dict:
+        return self.event_range(index, index + 1)[0]
+
+    def event_range(self, start: int, stop: int) -> List[Dict]:
+        """Events [start, stop); the other fields are parsed as one JSON array, in a single call"""
+        string = self.strings().__getitem__ if stop - start > 1000 else self.string
+        rests = json.loads("[" + ",".join([string(i) for i in self._rests[start:stop]]) + "]")
+        events = []
+        for timestamp, trigger, rest in zip(self._timestamps[start:stop], self._triggers[start:stop], rests):
+            event = {}
+            if timestamp != _MISSING:
+                event["timestamp"] = string(timestamp)
+            if trigger != _MISSING:
+                event["trigger"] = string(trigger)
+            event.update(rest)
+            events.append(event)
+        return events
+
+    def extra(self) -> Dict:
+        return json.loads(str(self._buffer[self._extra_offset:], "utf-8"))
+
+    def config(self, max_events: Optional[int] = None) -> Dict:
+        """The profile as a personality config dict (optionally only the newest max_events events)"""
+        config = self.extra()
+        config["traits"] = self.traits()
+        first = 0 if max_events is None else max(0, self.event_count - max_events)
+        config["personality_events"] = self.event_range(first, self.event_count)
+        return config
+
+    def close(self):
+        # Views into the mapping must go before the mapping itself
+        for name in ("_string_offsets", "_timestamps", "_triggers", "_rests", "_buffer"):
+            view = self.__dict__.pop(name, None)
+            if view is not None:
+                view.release()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def __enter__(self) -> "BinaryProfile":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _EventColumns(Sequence):
+    """The events of an open profile, decoded one at a time"""
+
+    def __init__(self, profile: BinaryProfile):
+        self._profile = profile
+
+    def __len__(self) -> int:
+        return self._profile.event_count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step == 1:
+                return self._profile.event_range(start, max(start, stop))
+            return [self._profile.event(i) for i in range(start, stop, step)]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return self._profile.event(index)
+
+
+def load_profile(path: str, max_events: Optional[int] = None) -> Dict:
+    """Read a .grkp profile into a personality config dict"""
+    with BinaryProfile(path) as profile:
+        return profile.config(max_events)
+
+
+def json_to_profile(json_path: str, profile_path: str) -> int:
+    with open(json_path) as f:
+        config = json.load(f)
+    write_profile(config, profile_path)
+    return os.path.getsize(profile_path)
+
+
+def profile_to_json(profile_path: str, json_path: str) -> Dict:
+    config = load_profile(profile_path)
+    with open(json_path, "w") as f:
+        json.dump(config, f, indent=2, default=str)
+    return config
+
+
+def main(argv: Optional[Iterable[str]] = None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Convert GRKKMAI personality profiles between JSON and binary")
+    commands = parser.add_subparsers(dest="command", required=True)
+    to_binary = commands.add_parser("import", help="JSON profile -> binary profile")
+    to_binary.add_argument("json_path")
+    to_binary.add_argument("profile_path")
+    to_json = commands.add_parser("export", help="binary profile -> JSON profile")
+    to_json.add_argument("profile_path")
+    to_json.add_argument("json_path")
+    args = parser.parse_args(argv)
+
+    if args.command == "import":
+        size = json_to_profile(args.json_path, args.profile_path)
+        print(f"💾 {args.profile_path}: {size / 1024:.1f} KB (was {os.path.getsize(args.json_path) / 1024:.1f} KB)")
+    else:
+        config = profile_to_json(args.profile_path, args.json_path)
+        print(f"📝 {args.json_path}: {len(config.get('traits', {}))} traits, "
+              f"{len(config.get('personality_events', []))} events")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
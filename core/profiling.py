@@ -0,0 +1,228 @@
+"""
+On-demand profiling and live performance figures for GRKKMAI
+
+TurnProfiler profiles the next N turns, either with cProfile (every call in
+the thread answering the turn; the live searches and database writes run on
+pool threads it does not see) or by sampling the stacks of every busy thread
+every few milliseconds (much lower overhead, wall-clock view including the
+worker threads waiting on the network). perf_snapshot() gathers the rolling per-stage
+latencies of the tracer, cache hit rates, internal queue depths and the
+process RSS. Both back the CLI's /profile and /perf commands.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, Optional
+
+from core.metrics import CACHE_LOOKUPS, QUEUE_DEPTH, SAVED_RESEARCH_LOOKUPS
+from core.tracing import tracer as default_tracer
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROFILE_MODES = ("cprofile", "sample")
+
+# Innermost Python frames of a thread that is parked, not working: (file name, function)
+IDLE_FRAMES = {
+    ("threading.py", "wait"),            # Event/Condition wait, queue.Queue.get
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("thread.py", "_worker"),            # idle ThreadPoolExecutor worker
+    ("selectors.py", "select"),          # event loop with nothing to do
+}
+
+
+class TurnProfiler:
+    def __init__(self, sample_interval: float = 0.005, ignore_threads: Iterable[str] = ()):
+        """Profiles the next N turns; results add up until reset()"""
+        self.sample_interval = sample_interval
+        # Threads that are never part of a turn (e.g. a blocking stdin reader)
+        self.ignore_threads = frozenset(ignore_threads)
+        self.mode: Optional[str] = None
+        self.turns_left = 0
+        self.turns_profiled = 0
+        self._lock = threading.Lock()
+        self._stats: Optional[pstats.Stats] = None
+        self._samples = 0
+        # (file, first line, function) -> samples it was on the stack / running
+        self._inclusive: Counter = Counter()
+        self._exclusive: Counter = Counter()
+        # thread name -> samples it was busy in
+        self._threads: Counter = Counter()
+
+    @property
+    def active(self) -> bool:
+        return self.turns_left > 0
+
+    def start(self, turns: int = 1, mode: str = "cprofile"):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"unknown profile mode {mode!r}, expected one of {', '.join(PROFILE_MODES)}")
+        if turns < 1:
+            raise ValueError("turns must be at least 1")
+        with self._lock:
+            if mode != self.mode:
+                self._reset()
+            self.mode = mode
+            self.turns_left = turns
+
+    def stop(self):
+        self.turns_left = 0
+
+    def reset(self):
+        with self._lock:
+            self._reset()
+
+    def _reset(self):
+        self.turns_profiled = 0
+        self._stats = None
+        self._samples = 0
+        self._inclusive.clear()
+        self._exclusive.clear()
+        self._threads.clear()
+
+    @contextmanager
+    def turn(self) -> Iterator[None]:
+        """Wrap one turn; a no-op unless profiling is on"""
+        with self._lock:
+            if self.turns_left <= 0:
+                mode = None
+            else:
+                mode = self.mode
+                self.turns_left -= 1
+        if mode is None:
+            yield
+            return
+
+        if mode == "cprofile":
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                yield
+            finally:
+                profile.disable()
+                with self._lock:
+                    if self._stats is None:
+                        self._stats = pstats.Stats(profile)
+                    else:
+                        self._stats.add(profile)
+                    self.turns_profiled += 1
+        else:
+            done = threading.Event()
+            sampler = threading.Thread(target=self._sample, args=(threading.get_ident(), done),
+                                       name="grkkm-sampler", daemon=True)
+            sampler.start()
+            try:
+                yield
+            finally:
+                done.set()
+                sampler.join()
+                with self._lock:
+                    self.turns_profiled += 1
+
+    def _sample(self, thread_id: int, done: threading.Event):
+        """Sample the turn's thread and every other thread that is not parked"""
+        me = threading.get_ident()
+        while not done.wait(self.sample_interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            inclusive, exclusive = set(), set()
+            busy = []
+            for ident, frame in sys._current_frames().items():
+                if ident == me or names.get(ident) in self.ignore_threads:
+                    continue
+                leaf = frame.f_code
+                if ident != thread_id and (os.path.basename(leaf.co_filename), leaf.co_name) in IDLE_FRAMES:
+                    continue
+                busy.append(names.get(ident, str(ident)))
+                exclusive.add((leaf.co_filename, leaf.co_firstlineno, leaf.co_name))
+                while frame is not None:  # recursion and parallel threads count once per sample
+                    code = frame.f_code
+                    inclusive.add((code.co_filename, code.co_firstlineno, code.co_name))
+                    frame = frame.f_back
+
+            with self._lock:
+                self._samples += 1
+                self._inclusive.update(inclusive)
+                self._exclusive.update(exclusive)
+                self._threads.update(busy)
+
+    def dump(self, limit: int = 20) -> str:
+        """The top functions so far, by cumulative time (or samples)"""
+        with self._lock:
+            if self.mode == "sample":
+                return self._dump_samples(limit)
+            if self._stats is None:
+                return "No profiled turns yet."
+            out = io.StringIO()
+            self._stats.stream = out
+            self._stats.sort_stats("cumulative").print_stats(limit)
+            return (f"{self.turns_profiled} turn(s) profiled with cProfile (the thread answering the turn only; "
+                    f"'/profile on sample' also covers the search and database threads)\n"
+                    + out.getvalue().strip("\n"))
+
+    def _dump_samples(self, limit: int) -> str:
+        if not self._samples:
+            return "No samples yet."
+        threads = ", ".join(f"{name} {count / self._samples * 100:.0f}%"
+                            for name, count in self._threads.most_common(8))
+        lines = [f"{self.turns_profiled} turn(s), {self._samples} samples every "
+                 f"{self.sample_interval * 1000:.0f} ms",
+                 f"busy threads: {threads}",
+                 "(threads run in parallel, so the percentages can add up to more than 100)",
+                 f"{'total %':>8}{'self %':>8}  function"]
+        for key, count in self._inclusive.most_common(limit):
+            filename, line, name = key
+            lines.append(f"{count / self._samples * 100:7.1f}%{self._exclusive[key] / self._samples * 100:7.1f}%  "
+                         f"{name} ({_short_path(filename)}:{line})")
+        return "\n".join(lines)
+
+
+def _short_path(filename: str) -> str:
+    """Paths inside the repository relative to it, others by their last two parts"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if filename.startswith(root + os.sep):
+        return os.path.relpath(filename, root)
+    return os.sep.join(filename.split(os.sep)[-2:])
+
+
+def current_rss_bytes() -> Optional[int]:
+    """Resident set size right now (Linux), else the peak so far"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is kilobytes on Linux and bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _hit_rate(counter) -> Dict[str, float]:
+    hits, misses = counter.value(result="hit"), counter.value(result="miss")
+    total = hits + misses
+    return {"hits": hits, "misses": misses, "hit_rate": hits / total if total else 0.0}
+
+
+def perf_snapshot(tracer=default_tracer) -> Dict:
+    """Per-stage latency percentiles, cache hit rates, queue depths and memory use"""
+    rss, peak = current_rss_bytes(), peak_rss_bytes()
+    return {
+        "tracing": tracer.enabled,
+        "stages": tracer.summary(),
+        "caches": {"search_cache": _hit_rate(CACHE_LOOKUPS), "saved_research": _hit_rate(SAVED_RESEARCH_LOOKUPS)},
+        "queues": {key[0]: value for key, value in sorted(QUEUE_DEPTH.values().items())},
+        "rss_bytes": rss,
+        # The kernel updates ru_maxrss lazily, so it can trail the current RSS
+        "peak_rss_bytes": max(peak, rss) if peak is not None and rss is not None else peak or rss,
+    }
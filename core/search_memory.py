@@ -2,28 +2,35 @@
 Memory system for the Web Search.
 """
 
-import sqlite3
 import json
+from dataclasses import asdict
 from datetime import datetime
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple
+
+from core.metrics import CONSENT_RESPONSES, DB_WRITE_SECONDS
+from core.stats import SavedTopic, SearchStats
+from core.storage import DEFAULT_DB_PATH, StorageEngine
+from core.tracing import traced
+
+SRM_TABLES = ("search_results", "search_consent")
 
 #SRM = Search Result Memory
 class SRM:
-    def __init__(self, db_path: str = "data/search_memory.db"):
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, storage: Optional[StorageEngine] = None,
+                 verbose: bool = True):
         """Initialization of search result storage with consent system"""
-        self.db_path = db_path
+        self.storage = storage or StorageEngine.shared(db_path)
+        self.db_path = self.storage.db_path
         self.setup_database()
-        print(" Search result memory (SRM) System initialized.")
+        if verbose:
+            print(" Search result memory (SRM) System initialized.")
 
 
 
     def setup_database(self):
         """Create database tables for search results and concent"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        #Stored search results
-        cursor.execute("""
+        self.storage.executescript("""
+            --Stored search results
             CREATE TABLE IF NOT EXISTS search_results (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 query TEXT NOT NULL,
@@ -36,22 +43,21 @@ class SRM:
                 user_consent INTEGER DEFAULT 1,
                 access_count INTEGER DEFAULT 0,
                 last_accessed DATETIME
-            )
-        """)
+            );
 
-        #Consent tracking 
-        cursor.execute("""
+            --Consent tracking 
             CREATE TABLE IF NOT EXISTS search_consent(
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 action TEXT NOT NULL,
                 query_topic TEXT,
                 user_response TEXT,
                 timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
+            );
         """)
 
-        conn.commit()
-        conn.close()
+    def import_legacy(self, legacy_path: str = "data/search_memory.db") -> int:
+        """Move the rows of the old standalone search memory database into the shared one"""
+        return self.storage.import_legacy(legacy_path, SRM_TABLES)
 
     def ask_to_save_search(self, query: str, search_results: Dict, topic: Optional[str] = None) -> str:
         if not topic:
@@ -89,23 +95,25 @@ What would you prefer?
         if any(word in response_lower for word in ["yes", "save", "store", "keep", "sure", "okay", "ok", "allow"]):
             self._save_search_results(query, search_results, topic, consent=True)
             self._log_consent_response(query, "granted", user_response)
+            CONSENT_RESPONSES.inc(store="search_save", response="granted")
             return f" Perfect. I've saved the research about '{topic}' for future reference. I can now give you faster, more detailed answers about this topic anytime you ask!"
         
         #Negative consent keywords
         if any(word in response_lower for word in ["no", "don't", "nope", "decline", "refuse", "temporary"]):
             self._log_consent_response(query, "declined", user_response)
+            CONSENT_RESPONSES.inc(store="search_save", response="declined")
             return "No issues here. I'll keep this information temporary for our current conversation only. You can always ask me to research it again anytime!"
         
         #Unclear consent response
         else:
+            CONSENT_RESPONSES.inc(store="search_save", response="unclear")
             return "I'm not sure if you want me to save this research or not. Could you say 'yes' to save it, or 'no' to keep it temporary?"
         
 
-    def find_saved_research(self, topic_query: str) -> Optional[Dict]:
-        conn = sqlite3.connect(self.db_path)
-
-        #topic or query search
-        cursor = conn.execute("""
+    @traced("db.srm.find_saved_research")
+    def find_saved_research(self, topic_query: str, touch: bool = True) -> Optional[Dict]:
+        #topic or query search (touch=False: the caller may still reject it, see mark_accessed)
+        row = self.storage.query_one("""
             SELECT id, query, topic, search_data, summary, key_facts, sources, timestamp, access_count
             FROM search_results
             WHERE (topic LIKE ? OR query LIKE ?) AND user_consent = 1
@@ -113,12 +121,9 @@ What would you prefer?
             LIMIT 1
         """, (f"%{topic_query}%", f"%{topic_query}%"))
 
-        row = cursor.fetchone()
-
         if row:
-            #update access count
-            conn.execute("UPDATE search_results SET access_count = access_count + 1, last_accessed = ? WHERE id = ?", (datetime.now().isoformat(),row[0]))
-            conn.commit()
+            if touch:
+                self.mark_accessed(row[0])
 
             result = {
                 "id": row[0],
@@ -132,16 +137,43 @@ What would you prefer?
                 "access_count": row[8]
             }
 
-            conn.close()
             return result
         
-        conn.close()
         return None
+
+    def mark_accessed(self, research_id: int):
+        """Count one use of saved research (in the background, the answer does not depend on it)"""
+        last_accessed = datetime.now().isoformat()
+        self.storage.submit(lambda conn: conn.execute(
+            "UPDATE search_results SET access_count = access_count + 1, last_accessed = ? WHERE id = ?",
+            (last_accessed, research_id)))
         
 
+    @traced("db.srm.save_search_results")
+    @DB_WRITE_SECONDS.time(store="srm", operation="save_search_results")
     def _save_search_results(self, query: str, search_results: Dict, topic: str, consent: bool = True):
-        conn = sqlite3.connect(self.db_path)
+        self.storage.execute("""
+            INSERT INTO search_results(query, topic, search_data, summary, key_facts, sources, user_consent)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, self._search_result_row(query, search_results, topic, consent))
+
+    @traced("db.srm.save_search_results_bulk")
+    @DB_WRITE_SECONDS.time(store="srm", operation="save_search_results_bulk")
+    def save_search_results_bulk(self, entries: List[Tuple[str, Dict, str]], consent: bool = True) -> int:
+        """Save many (query, search_results, topic) entries in a single transaction"""
+        rows = [self._search_result_row(query, search_results, topic, consent)
+                for query, search_results, topic in entries]
+        if not rows:
+            return 0
+
+        self.storage.executemany("""
+            INSERT INTO search_results(query, topic, search_data, summary, key_facts, sources, user_consent)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+
+        return len(rows)
 
+    def _search_result_row(self, query: str, search_results: Dict, topic: str, consent: bool) -> Tuple:
         #data preparation
         search_data_json = json.dumps(search_results)
         key_facts_json = json.dumps(search_results.get("key_information", []))
@@ -153,13 +185,7 @@ What would you prefer?
 
         summary = self._generate_summary(search_results)
 
-        conn.execute("""
-            INSERT INTO search_results(query, topic, search_data, summary, key_facts, sources, user_consent)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (query, topic, search_data_json, summary, key_facts_json, sources_json, consent))
-
-        conn.commit()
-        conn.close()
+        return (query, topic, search_data_json, summary, key_facts_json, sources_json, consent)
 
     def _generate_summary(self, search_results: Dict) -> str:
         key_info = search_results.get("key_information", [])
@@ -170,77 +196,58 @@ What would you prefer?
             source_count = len(search_results.get("sources", []))
             return f"Research from {source_count} sources with comprehensive information."
 
+    @traced("db.srm.get_saved_topics")
     def get_saved_topics(self) -> List[Dict]:
-        conn = sqlite3.connect(self.db_path)
+        with self.storage.reader() as conn:
+            return [asdict(topic) for topic in self._saved_topics(conn)]
 
-        cursor = conn.execute("""
+    @staticmethod
+    def _saved_topics(conn) -> List[SavedTopic]:
+        rows = conn.execute("""
             SELECT topic, COUNT(*) as search_count, MAX(timestamp) as latest_search, SUM(access_count) as total_access
             FROM search_results
             WHERE user_consent = 1
             GROUP BY topic
             ORDER BY latest_search DESC
-        """)
-
-        topics = []
-        for row in cursor.fetchall():
-            topics.append({
-                "topic": row[0],
-                "search_count": row[1],
-                "latest_search": row[2],
-                "total_access": row[3] or 0
-            })
-
-        conn.close()
-        return topics
+        """).fetchall()
+        return [SavedTopic(topic=row[0], search_count=row[1], latest_search=row[2], total_access=row[3] or 0)
+                for row in rows]
     
+    @traced("db.srm.delete_saved_research")
+    @DB_WRITE_SECONDS.time(store="srm", operation="delete_saved_research")
     def delete_saved_research(self, topic: str) -> bool:
-        conn = sqlite3.connect(self.db_path)
-
-        cursor = conn.execute("DELETE FROM search_results WHERE topic LIKE ?", (f"%{topic}%",))
-        deleted = cursor.rowcount > 0
-
-        conn.commit()
-        conn.close()
-
-        return deleted
+        return self.storage.execute("DELETE FROM search_results WHERE topic LIKE ?", (f"%{topic}%",)) > 0
     
+    @traced("db.srm.log_consent_request")
+    @DB_WRITE_SECONDS.time(store="srm", operation="log_consent_request")
     def _log_consent_request(self, query: str, topic: str):
-        conn = sqlite3.connect(self.db_path)
-        conn.execute("""
+        self.storage.execute("""
             INSERT INTO search_consent (action, query_topic)
             VALUES (?, ?)
         """, ("save_consent_requested", f"{topic}: {query}"))
-        conn.commit()
-        conn.close()
 
+    @traced("db.srm.log_consent_response")
+    @DB_WRITE_SECONDS.time(store="srm", operation="log_consent_response")
     def _log_consent_response(self, query: str, response_type: str, user_response: str):
-        conn = sqlite3.connect(self.db_path)
-        conn.execute("""
+        self.storage.execute("""
             INSERT INTO search_consent (action, query_topic, user_response)
             VALUES (?, ?, ?)
         """, (f"save_consent_{response_type}", query, user_response))
-        conn.commit()
-        conn.close()
 
+    @traced("db.srm.get_memory_stats")
     def get_memory_stats(self) -> Dict:
-        conn = sqlite3.connect(self.db_path)
-        
-        cursor = conn.execute("SELECT COUNT(*) FROM search_results WHERE user_consent = 1")
-        saved_searches = cursor.fetchone()[0]
-
-        cursor = conn.execute("SELECT COUNT(DISTINCT topic) FROM search_results WHERE user_consent = 1")
-        unique_topics = cursor.fetchone()[0]
-
-        cursor = conn.execute("SELECT SUM(access_count) FROM search_results WHERE user_consent = 1")
-        total_access = cursor.fetchone()[0] or 0
-
-        conn.close()
-
-        return {
-            "saved_searches": saved_searches,
-            "unique_topics": unique_topics,
-            "total_access_count": total_access
-        }
+        with self.storage.reader() as conn:
+            return self.collect_stats(conn, topics=False).totals()
+
+    @classmethod
+    def collect_stats(cls, conn, topics: bool = True) -> SearchStats:
+        """Saved research statistics (and the topic list), read on a connection the caller holds"""
+        saved_searches, unique_topics, total_access = conn.execute("""
+            SELECT COUNT(*), COUNT(DISTINCT topic), SUM(access_count) FROM search_results WHERE user_consent = 1
+        """).fetchone()
+        return SearchStats(saved_searches=saved_searches, unique_topics=unique_topics,
+                           total_access_count=total_access or 0,
+                           topics=tuple(cls._saved_topics(conn)) if topics else ())
 
 
 # Test the search memory system
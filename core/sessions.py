@@ -0,0 +1,197 @@
+"""
+Multi-session conversation engine for GRKKMAI
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, Iterator, List, Optional
+
+from core.conversation_buffer import ConversationBuffer, ConversationTurn
+from core.metrics import ACTIVE_SESSIONS
+
+
+class SessionContext:
+    """Everything that belongs to one conversation (the subsystems are shared)"""
+    __slots__ = ("session_id", "user_id", "conversation_history", "pending_save", "curiosity", "playfulness",
+                 "loyalty", "last_turn_metrics", "last_active", "lock")
+
+    def __init__(self, session_id: str, history_capacity: int = 50,
+                 spill: Optional[Callable[[ConversationTurn], None]] = None, user_id: Optional[str] = None):
+        self.session_id = session_id
+        # Whose storage namespace the session reads and writes (None: the shared one)
+        self.user_id = user_id
+        self.conversation_history = ConversationBuffer(capacity=history_capacity, spill=spill)
+        self.pending_save: Optional[Dict] = None
+
+        # Per-conversation trait overrides for _add_personality_touches; None
+        # follows the shared personality's value
+        self.curiosity: Optional[float] = None
+        self.playfulness: Optional[float] = None
+        self.loyalty: Optional[float] = None
+
+        self.last_turn_metrics: Optional[Dict] = None
+        self.last_active = time.monotonic()
+        # One message at a time per conversation; different sessions run in parallel
+        self.lock = threading.Lock()
+
+    def touch(self):
+        self.last_active = time.monotonic()
+
+
+class SessionManager:
+    def __init__(self, brain=None, max_sessions: int = 10_000, idle_timeout: float = 1800.0,
+                 history_capacity: int = 20):
+        """Many isolated conversations over one shared GRKKMAI"""
+        if brain is None:
+            from core.ai_brain import GRKKMAI
+            brain = GRKKMAI()
+
+        self.brain = brain
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.history_capacity = history_capacity
+
+        # Least recently active first
+        self._sessions: "OrderedDict[str, SessionContext]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        self.closed_sessions = 0
+        # Flushes sessions evicted by get(), which may be in the middle of a turn
+        self._retirer: Optional[ThreadPoolExecutor] = None
+        ACTIVE_SESSIONS.set_function(self.session_count)
+
+    def get(self, session_id: str, user_id: Optional[str] = None) -> SessionContext:
+        """Return a session, creating it (and evicting old ones) as needed"""
+        evicted = []
+
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = SessionContext(session_id, history_capacity=self.history_capacity,
+                                         spill=partial(self.brain._spill_turn, session_id=session_id,
+                                                       user_id=user_id),
+                                         user_id=user_id)
+                self._sessions[session_id] = session
+            elif session.user_id != user_id:
+                raise self._not_yours(session_id)
+            else:
+                self._sessions.move_to_end(session_id)
+            session.touch()
+
+            while len(self._sessions) > self.max_sessions:
+                evicted.append(self._sessions.popitem(last=False)[1])
+
+            if session.last_active - self._last_sweep > self.idle_timeout / 4:
+                evicted.extend(self._pop_idle(session.last_active))
+
+            if evicted and self._retirer is None:
+                self._retirer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="grkkm-retire")
+
+        # Never wait for an evicted session's turn (or its flush) in the caller's thread
+        if evicted:
+            self._retirer.submit(self._retire, evicted)
+        return session
+
+    def find(self, session_id: str, user_id: Optional[str] = None) -> Optional[SessionContext]:
+        """Return an existing session without creating, touching or evicting anything"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+        if session is not None and session.user_id != user_id:
+            raise self._not_yours(session_id)
+        return session
+
+    @staticmethod
+    def _not_yours(session_id: str) -> ValueError:
+        # A request without a user_id does not own a user's session either
+        return ValueError(f"session {session_id} belongs to another user")
+
+    def think(self, session_id: str, user_message: str, user_id: Optional[str] = None) -> str:
+        """Answer a message within its own conversation"""
+        return "\n\n".join(self.think_stream(session_id, user_message, user_id))
+
+    def think_stream(self, session_id: str, user_message: str, user_id: Optional[str] = None) -> Iterator[str]:
+        session = self.get(session_id, user_id)
+        with session.lock:
+            yield from self.brain.think_stream(user_message, session=session)
+            session.touch()
+
+    def process_save_consent(self, session_id: str, user_response: str,
+                             user_id: Optional[str] = None) -> Optional[str]:
+        """Answer the pending save question of a session, if there is one"""
+        session = self.find(session_id, user_id)
+        if session is None:
+            return None
+        with session.lock, self.brain.stores(session.user_id) as stores:
+            pending = session.pending_save
+            if not pending or not stores.search_memory:
+                return None
+
+            session.pending_save = None
+            response = stores.search_memory.process_save_consent(
+                user_response, pending["query"], pending["results"], pending["topic"]
+            )
+        # The answer may have saved research: /saved and /stats should show it
+        self.brain.invalidate_stats(session.user_id)
+        return response
+
+    def end_session(self, session_id: str, user_id: Optional[str] = None) -> bool:
+        """Close a session, moving its remaining turns to the memory database"""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return False
+            if session.user_id != user_id:
+                raise self._not_yours(session_id)
+            del self._sessions[session_id]
+
+        self._retire([session])
+        return True
+
+    def delete_user(self, user_id: str) -> bool:
+        """Drop a user's sessions (without saving them) and their storage namespace"""
+        with self._lock:
+            dropped = [self._sessions.pop(session_id) for session_id, session in list(self._sessions.items())
+                       if session.user_id == user_id]
+        # Let a turn in progress finish, then forget the history without spilling it
+        for session in dropped:
+            with session.lock:
+                session.conversation_history.clear()
+                session.conversation_history.spill = None
+                session.pending_save = None
+        self.closed_sessions += len(dropped)
+
+        namespaces = self.brain.namespaces
+        return bool(namespaces and namespaces.delete(user_id)) or bool(dropped)
+
+    def evict_idle(self) -> int:
+        """Close every session idle for longer than idle_timeout"""
+        with self._lock:
+            evicted = self._pop_idle(time.monotonic())
+        self._retire(evicted)
+        return len(evicted)
+
+    def _pop_idle(self, now: float) -> List[SessionContext]:
+        # Sessions are ordered by activity, so stop at the first active one
+        self._last_sweep = now
+        evicted = []
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.last_active <= self.idle_timeout:
+                break
+            evicted.append(self._sessions.pop(session_id))
+        return evicted
+
+    def _retire(self, sessions: List[SessionContext]):
+        for session in sessions:
+            with session.lock:
+                session.conversation_history.flush()
+            self.closed_sessions += 1
+
+    def session_count(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
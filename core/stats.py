@@ -0,0 +1,80 @@
+"""
+Aggregated statistics for GRKKMAI
+
+GRKKMAI.stats_snapshot() fills a StatsSnapshot from one read transaction per
+SQLite store (memory and search memory share one unless they have their own
+databases) plus the in-memory personality, and caches it for a few seconds.
+The CLI (/stats, /saved), the daemon (/stats, /saved, /memory) and the
+metrics gauges all read the same structure; to_dict()/from_dict() carry it
+over the daemon's JSON API.
+"""
+
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+# How long a snapshot is reused
+STATS_TTL = 2.0
+
+
+@dataclass(frozen=True)
+class MemoryStats:
+    memories_stored: int
+    conversations_today: int
+    consent_requests_made: int
+
+
+@dataclass(frozen=True)
+class SavedTopic:
+    topic: str
+    search_count: int
+    latest_search: Optional[str]
+    total_access: int
+
+
+@dataclass(frozen=True)
+class SearchStats:
+    saved_searches: int
+    unique_topics: int
+    total_access_count: int
+    topics: Tuple[SavedTopic, ...] = ()
+
+    def totals(self) -> Dict:
+        """The counts, without the topic list (the shape of SRM.get_memory_stats())"""
+        return {"saved_searches": self.saved_searches, "unique_topics": self.unique_topics,
+                "total_access_count": self.total_access_count}
+
+
+@dataclass(frozen=True)
+class PersonalityStats:
+    traits: Dict[str, float]
+    dominant_traits: List[str]
+    mood: str
+    evolution_events: int
+    last_evolution: str
+
+
+@dataclass(frozen=True)
+class StatsSnapshot:
+    user_id: Optional[str] = None
+    memory: Optional[MemoryStats] = None
+    search: Optional[SearchStats] = None
+    personality: Optional[PersonalityStats] = None
+    taken_at: float = field(default_factory=time.time)
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "StatsSnapshot":
+        search = data.get("search")
+        if search is not None:
+            search = SearchStats(**dict(search, topics=tuple(SavedTopic(**topic)
+                                                             for topic in search.get("topics", ()))))
+        return cls(
+            user_id=data.get("user_id"),
+            memory=MemoryStats(**data["memory"]) if data.get("memory") else None,
+            search=search,
+            personality=PersonalityStats(**data["personality"]) if data.get("personality") else None,
+            taken_at=data.get("taken_at", time.time())
+        )
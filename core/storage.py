@@ -0,0 +1,299 @@
+"""
+Storage engine for GRKKMAI: one SQLite database, one writer, many readers
+
+GRKKMAI_MEMORY and SRM are repositories over a shared StorageEngine:
+    - WAL mode, so readers never block the writer (or each other)
+    - every write goes through a single writer thread; writes queued at the
+      same time are committed together (group commit: one fsync per batch)
+    - reads use a small pool of connections
+"""
+
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from core.metrics import ERRORS, QUEUE_DEPTH
+
+DEFAULT_DB_PATH = "data/grkkmai.db"
+
+
+class _WriteJob:
+    __slots__ = ("func", "future", "transactional")
+
+    def __init__(self, func: Callable[[sqlite3.Connection], Any], transactional: bool = True):
+        self.func = func
+        self.future: Future = Future()
+        self.transactional = transactional
+
+
+class StorageEngine:
+    _shared: Dict[str, "StorageEngine"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, db_path: str = DEFAULT_DB_PATH, readers: int = 4, max_batch: int = 256,
+                 busy_timeout: float = 5.0):
+        """Open (or create) the database and start the writer thread"""
+        self.db_path = db_path
+        self.max_batch = max_batch
+        self.busy_timeout = busy_timeout
+        self.batches_committed = 0
+        self.writes_committed = 0
+
+        self._write_queue: "queue.Queue[Optional[_WriteJob]]" = queue.Queue()
+        self._readers: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._reader_slots = threading.BoundedSemaphore(readers)
+        self._all_readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+        self._closed = False
+
+        # Created here so a bad path fails in the caller, not in the writer thread
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._writer_conn = self._connect()
+        self._writer_conn.execute("PRAGMA journal_mode = WAL")
+        self._writer = threading.Thread(target=self._write_loop, name="grkkm-db-writer", daemon=True)
+        self._writer.start()
+
+    @classmethod
+    def shared(cls, db_path: str = DEFAULT_DB_PATH) -> "StorageEngine":
+        """The process-wide engine of a database file, so every store shares one writer"""
+        key = os.path.abspath(db_path)
+        with cls._shared_lock:
+            engine = cls._shared.get(key)
+            if engine is None or engine._closed:
+                engine = cls._shared[key] = cls(db_path)
+                QUEUE_DEPTH.set_function(engine.write_queue_depth, queue="db_writes")
+                # Drain queued writes (e.g. access-count updates) before the interpreter exits
+                atexit.register(engine.close)
+            return engine
+
+    def _connect(self) -> sqlite3.Connection:
+        # isolation_level=None: transactions are managed explicitly below
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout, isolation_level=None,
+                               check_same_thread=False)
+        conn.execute("PRAGMA synchronous = NORMAL")  # safe with WAL, one fsync per checkpoint
+        conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+
+    # Writes
+
+    def submit(self, func: Callable[[sqlite3.Connection], Any], transactional: bool = True) -> Future:
+        """Queue func(conn) on the writer thread; the future resolves once it is committed"""
+        if self._closed:
+            raise RuntimeError("storage engine is closed")
+        job = _WriteJob(func, transactional)
+        self._write_queue.put(job)
+        return job.future
+
+    def write(self, func: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run func(conn) on the writer thread and wait for the commit"""
+        return self.submit(func).result()
+
+    def execute(self, sql: str, params: Sequence = ()) -> int:
+        """Run one write statement; returns the number of changed rows"""
+        return self.write(lambda conn: conn.execute(sql, params).rowcount)
+
+    def executemany(self, sql: str, rows: Iterable[Sequence]) -> int:
+        return self.write(lambda conn: conn.executemany(sql, rows).rowcount)
+
+    def executescript(self, script: str):
+        """Run DDL (CREATE TABLE/INDEX ...) outside of a transaction"""
+        return self.submit(lambda conn: conn.executescript(script), transactional=False).result()
+
+    def _write_loop(self):
+        conn = self._writer_conn
+        while True:
+            job = self._write_queue.get()
+            if job is None:
+                break
+
+            if not job.transactional:
+                self._run_untransacted(conn, job)
+                continue
+
+            # Group commit: everything already waiting goes into the same transaction
+            batch = [job]
+            stop = False
+            while len(batch) < self.max_batch:
+                try:
+                    queued = self._write_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if queued is None:
+                    stop = True
+                    break
+                if not queued.transactional:
+                    self._commit_batch(conn, batch)
+                    batch = []
+                    self._run_untransacted(conn, queued)
+                    break
+                batch.append(queued)
+
+            if batch:
+                self._commit_batch(conn, batch)
+            if stop:
+                break
+
+        conn.close()
+
+    def _commit_batch(self, conn: sqlite3.Connection, batch: List[_WriteJob]):
+        results = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for job in batch:
+                # A failing job only rolls back its own changes
+                conn.execute("SAVEPOINT job")
+                try:
+                    results.append((job, job.func(conn), None))
+                    conn.execute("RELEASE SAVEPOINT job")
+                except Exception as e:
+                    conn.execute("ROLLBACK TO SAVEPOINT job")
+                    conn.execute("RELEASE SAVEPOINT job")
+                    results.append((job, None, e))
+            conn.execute("COMMIT")
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            ERRORS.inc(component="storage")
+            for job in batch:
+                job.future.set_exception(e)
+            return
+
+        self.batches_committed += 1
+        self.writes_committed += len(batch)
+        for job, result, error in results:
+            if error is None:
+                job.future.set_result(result)
+            else:
+                ERRORS.inc(component="storage")
+                job.future.set_exception(error)
+
+    @staticmethod
+    def _run_untransacted(conn: sqlite3.Connection, job: _WriteJob):
+        try:
+            job.future.set_result(job.func(conn))
+        except Exception as e:
+            ERRORS.inc(component="storage")
+            job.future.set_exception(e)
+
+    # Reads
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a read connection from the pool"""
+        self._reader_slots.acquire()
+        try:
+            try:
+                conn = self._readers.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+                conn.execute("PRAGMA query_only = ON")
+                with self._readers_lock:
+                    self._all_readers.append(conn)
+            try:
+                yield conn
+            finally:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                self._readers.put(conn)
+        finally:
+            self._reader_slots.release()
+
+    @contextmanager
+    def snapshot(self) -> Iterator[sqlite3.Connection]:
+        """A read connection inside one transaction: every query sees the same data"""
+        with self.reader() as conn:
+            conn.execute("BEGIN")
+            try:
+                yield conn
+            finally:
+                conn.execute("COMMIT")
+
+    def query(self, sql: str, params: Sequence = ()) -> List[tuple]:
+        with self.reader() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def query_one(self, sql: str, params: Sequence = ()) -> Optional[tuple]:
+        with self.reader() as conn:
+            return conn.execute(sql, params).fetchone()
+
+    # Maintenance
+
+    def import_legacy(self, legacy_path: str, tables: Sequence[str]) -> int:
+        """Copy the rows of an old per-store database file into this one (once)"""
+        if not os.path.exists(legacy_path) or os.path.abspath(legacy_path) == os.path.abspath(self.db_path):
+            return 0
+        # The import is recorded in the same transaction as the rows, so a crash
+        # before the rename below cannot make the next start import them again
+        info = os.stat(legacy_path)
+        marker = (os.path.abspath(legacy_path), info.st_size, info.st_mtime_ns)
+
+        def copy(conn: sqlite3.Connection) -> Optional[int]:
+            conn.execute("ATTACH DATABASE ? AS legacy", (legacy_path,))
+            try:
+                copied = 0
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS main.legacy_imports (
+                        path TEXT, size INTEGER, mtime_ns INTEGER, rows INTEGER,
+                        imported_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                        PRIMARY KEY (path, size, mtime_ns)
+                    )
+                """)
+                if conn.execute("SELECT 1 FROM main.legacy_imports WHERE path = ? AND size = ? AND mtime_ns = ?",
+                                marker).fetchone():
+                    conn.execute("COMMIT")
+                    return None
+                for table in tables:
+                    columns = [row[1] for row in conn.execute(f"PRAGMA legacy.table_info({table})")
+                               if row[1] != "id"]
+                    if not columns:
+                        continue
+                    column_list = ", ".join(columns)
+                    copied += conn.execute(f"INSERT INTO main.{table} ({column_list}) "
+                                           f"SELECT {column_list} FROM legacy.{table} ORDER BY id").rowcount
+                conn.execute("INSERT INTO main.legacy_imports (path, size, mtime_ns, rows) VALUES (?, ?, ?, ?)",
+                             marker + (copied,))
+                conn.execute("COMMIT")
+                return copied
+            except Exception:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+            finally:
+                conn.execute("DETACH DATABASE legacy")
+
+        copied = self.submit(copy, transactional=False).result()
+        os.replace(legacy_path, legacy_path + ".migrated")
+        if copied is None:
+            print(f"📦 {legacy_path} was already imported into {self.db_path}, moved it aside")
+            return 0
+        print(f"📦 Moved {copied} rows from {legacy_path} into {self.db_path}")
+        return copied
+
+    def checkpoint(self) -> tuple:
+        """Fold the WAL back into the database file and truncate it"""
+        return self.submit(lambda conn: conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone(),
+                           transactional=False).result()
+
+    def close(self):
+        """Finish queued writes, then close every connection"""
+        if self._closed:
+            return
+        self._closed = True
+        self._write_queue.put(None)
+        self._writer.join()
+        with self._readers_lock:
+            for conn in self._all_readers:
+                conn.close()
+            self._all_readers.clear()
+        with StorageEngine._shared_lock:
+            if StorageEngine._shared.get(os.path.abspath(self.db_path)) is self:
+                del StorageEngine._shared[os.path.abspath(self.db_path)]
+
+    def write_queue_depth(self) -> int:
+        return self._write_queue.qsize()
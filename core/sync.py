@@ -0,0 +1,425 @@
+"""
+Tachikoma-style synchronization between GRKKMAI instances
+
+Instances share explicit memories and personality events, and can see each
+other's traits, while each keeps (and only ever writes) its own personality.
+
+The shared state is a set of operations, each stamped with a dot (instance,
+counter) and a Lamport time:
+    - memory: last-writer-wins per (key, value); forgetting writes a tombstone
+    - event:  grow-only set keyed by dot
+    - traits: last-writer-wins per instance (an instance only sets its own)
+Merging is idempotent, commutative and associative, so replicas that have
+seen the same operations are identical, whatever the order. A vector clock
+(the highest counter seen per instance) says which operations a peer lacks,
+so syncs only exchange deltas.
+
+Transports:
+    - a shared directory: every instance appends its own operations to
+      <dir>/<instance>.jsonl and reads the other files from where it stopped
+    - the daemon (TCP or Unix socket): POST /sync is one round trip, see
+      InstanceSync.sync_peer and GRKKMClient.sync
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import uuid
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+Op = Dict  # {"i": instance, "c": counter, "l": lamport, "k": kind, "d": data}
+
+# Operations per round trip, so a first sync stays under the daemon's body limit
+SYNC_BATCH = 500
+
+
+def _dumps(value) -> str:
+    return json.dumps(value, separators=(",", ":"), sort_keys=True, default=str)
+
+
+def _read_ops(path: str, offset: int = 0) -> Tuple[List[Op], int]:
+    """Complete operation lines of a JSONL file from offset; returns (ops, new offset)"""
+    try:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+    except FileNotFoundError:
+        return [], offset
+
+    ops = []
+    for line in data.splitlines(keepends=True):
+        if not line.endswith(b"\n"):
+            break  # being written (or torn by a crash): read it next time
+        try:
+            ops.append(json.loads(line))
+        except json.JSONDecodeError:
+            break
+        offset += len(line)
+    return ops, offset
+
+
+class SyncState:
+    def __init__(self, instance_id: Optional[str] = None, log_path: Optional[str] = None):
+        """A replica of the shared state; operations are appended to log_path if given"""
+        self.instance_id = instance_id or uuid.uuid4().hex[:12]
+        self.log_path = log_path
+        self.lamport = 0
+
+        self._log: Dict[str, List[Op]] = {}                      # instance -> its ops, by counter
+        self._pending: Dict[Tuple[str, int], Op] = {}            # arrived ahead of a missing op
+        self._memories: Dict[str, Op] = {}                       # (key, value) -> winning op
+        self._events: Dict[Tuple[str, int], Op] = {}
+        self._traits: Dict[str, Op] = {}                         # instance -> winning op
+        self._latest_event: Dict[str, str] = {}                  # instance -> newest event timestamp
+        self._lock = threading.RLock()
+        self._log_file = None
+
+        if log_path:
+            ops, _ = _read_ops(log_path)
+            self._merge(ops)
+            self._log_file = open(log_path, "a")
+
+    @classmethod
+    def open(cls, state_dir: str) -> "SyncState":
+        """The replica of a data directory (its instance id is created once and kept)"""
+        os.makedirs(state_dir, exist_ok=True)
+        id_file = os.path.join(state_dir, "instance_id")
+        try:
+            with open(id_file) as f:
+                instance_id = f.read().strip()
+        except FileNotFoundError:
+            instance_id = uuid.uuid4().hex[:12]
+            with open(id_file, "w") as f:
+                f.write(instance_id)
+        return cls(instance_id, os.path.join(state_dir, "ops.jsonl"))
+
+    # Local changes
+
+    def put_memory(self, key: str, value: str, memory_type: str = "preference") -> Op:
+        return self._local("memory", {"key": key, "value": value, "type": memory_type, "deleted": False})
+
+    def forget_memory(self, key: str, value: str) -> Op:
+        return self._local("memory", {"key": key, "value": value, "deleted": True})
+
+    def add_event(self, event: Dict) -> Op:
+        return self._local("event", event)
+
+    def set_traits(self, traits: Dict[str, float]) -> Op:
+        return self._local("traits", traits)
+
+    def _local(self, kind: str, data: Dict) -> Op:
+        with self._lock:
+            op = {"i": self.instance_id, "c": len(self._log.get(self.instance_id, ())) + 1,
+                  "l": self.lamport + 1, "k": kind, "d": data}
+            self._merge([op])
+            return op
+
+    # Replication
+
+    def clock(self) -> Dict[str, int]:
+        """Vector clock: how many operations of each instance this replica has"""
+        return {instance: len(ops) for instance, ops in self._log.items()}
+
+    def delta(self, since: Dict[str, int]) -> List[Op]:
+        """Operations a replica at vector clock `since` has not seen"""
+        with self._lock:
+            return [op for instance, ops in self._log.items() for op in ops[since.get(instance, 0):]]
+
+    def merge(self, ops: Iterable[Op]) -> List[Op]:
+        """Apply operations from another replica; returns the ones that were new"""
+        with self._lock:
+            return self._merge(ops)
+
+    def _merge(self, ops: Iterable[Op]) -> List[Op]:
+        applied = []
+        for op in ops:
+            self._pending.setdefault((op["i"], op["c"]), op)
+        # Ops are applied in counter order per instance; one that arrives
+        # before an earlier op of its instance waits in _pending
+        progress = True
+        while progress and self._pending:
+            progress = False
+            for dot in sorted(self._pending):
+                instance, counter = dot
+                have = len(self._log.get(instance, ()))
+                if counter <= have:
+                    del self._pending[dot]
+                elif counter == have + 1:
+                    op = self._pending.pop(dot)
+                    self._apply(op)
+                    applied.append(op)
+                    progress = True
+
+        if applied and self._log_file is not None:
+            self._log_file.write("".join(_dumps(op) + "\n" for op in applied))
+            self._log_file.flush()
+        return applied
+
+    def _apply(self, op: Op):
+        self._log.setdefault(op["i"], []).append(op)
+        self.lamport = max(self.lamport, op["l"])
+        kind, data = op["k"], op["d"]
+        if kind == "memory":
+            ident = f"{data['key']}\x1f{data['value']}"
+            current = self._memories.get(ident)
+            if current is None or (op["l"], op["i"]) > (current["l"], current["i"]):
+                self._memories[ident] = op
+        elif kind == "event":
+            self._events[(op["i"], op["c"])] = op
+            timestamp = data.get("timestamp", "")
+            if timestamp > self._latest_event.get(op["i"], ""):
+                self._latest_event[op["i"]] = timestamp
+        elif kind == "traits":
+            current = self._traits.get(op["i"])
+            if current is None or op["c"] > current["c"]:
+                self._traits[op["i"]] = op
+
+    # Views
+
+    def memories(self) -> List[Dict]:
+        """Shared explicit memories (tombstones excluded)"""
+        with self._lock:
+            return [op["d"] for op in self._memories.values() if not op["d"]["deleted"]]
+
+    def is_known_memory(self, key: str, value: str) -> bool:
+        return f"{key}\x1f{value}" in self._memories
+
+    def events(self, limit: Optional[int] = None) -> List[Dict]:
+        """Personality events of every instance, oldest first"""
+        with self._lock:
+            ordered = sorted(self._events.values(), key=lambda op: (op["d"].get("timestamp", ""), op["i"], op["c"]))
+        ordered = ordered[-limit:] if limit else ordered
+        return [dict(op["d"], instance=op["i"]) for op in ordered]
+
+    def last_event_timestamp(self, instance_id: Optional[str] = None) -> str:
+        return self._latest_event.get(instance_id or self.instance_id, "")
+
+    def traits(self) -> Dict[str, Dict[str, float]]:
+        """The latest traits of every instance"""
+        with self._lock:
+            return {instance: op["d"] for instance, op in self._traits.items()}
+
+    def digest(self) -> str:
+        """Fingerprint of the merged state: equal on replicas that have seen the same operations"""
+        with self._lock:
+            state = {"memories": sorted((ident, op["i"], op["c"]) for ident, op in self._memories.items()),
+                     "events": sorted(self._events),
+                     "traits": sorted((instance, op["c"]) for instance, op in self._traits.items())}
+        return hashlib.sha1(_dumps(state).encode("utf-8")).hexdigest()
+
+    def op_count(self) -> int:
+        return sum(len(ops) for ops in self._log.values())
+
+    # Exchange (one round trip, used by the daemon's POST /sync)
+
+    def exchange(self, request: Dict) -> Dict:
+        """Server half: merge the peer's operations, answer with the ones it lacks"""
+        merged = self.merge(request.get("ops", []))
+        ops = self.delta(request.get("clock", {}))
+        limit = request.get("limit") or len(ops)
+        return {"instance": self.instance_id, "clock": self.clock(), "merged": len(merged),
+                "ops": ops[:limit], "more": len(ops) > limit}
+
+    def close(self):
+        with self._lock:
+            if self._log_file is not None:
+                self._log_file.close()
+                self._log_file = None
+
+
+class SyncDirectory:
+    def __init__(self, path: str, instance_id: str, offsets: Optional[Dict[str, int]] = None):
+        """A directory shared by instances; each writes only its own file"""
+        self.path = path
+        self.instance_id = instance_id
+        self.own_file = os.path.join(path, f"{instance_id}.jsonl")
+        # How far each sibling's file has been read (kept by InstanceSync between runs)
+        self._offsets: Dict[str, int] = {} if offsets is None else offsets
+        os.makedirs(path, exist_ok=True)
+        own_ops, _ = _read_ops(self.own_file)
+        self._published = own_ops[-1]["c"] if own_ops else 0
+
+    def publish(self, state: SyncState) -> int:
+        """Append this instance's operations that are not in its file yet"""
+        ops = state.delta({self.instance_id: self._published})
+        own = [op for op in ops if op["i"] == self.instance_id]
+        if own:
+            with open(self.own_file, "a") as f:
+                f.write("".join(_dumps(op) + "\n" for op in own))
+            self._published = own[-1]["c"]
+        return len(own)
+
+    def receive(self) -> List[Op]:
+        """Operations other instances appended since the last call"""
+        ops = []
+        for name in sorted(os.listdir(self.path)):
+            path = os.path.join(self.path, name)
+            if not name.endswith(".jsonl") or path == self.own_file:
+                continue
+            new_ops, self._offsets[name] = _read_ops(path, self._offsets.get(name, 0))
+            ops.extend(new_ops)
+        return ops
+
+
+class InstanceSync:
+    def __init__(self, state: SyncState, personality=None, memory=None, cursors_file: Optional[str] = None):
+        """Keep a replica in step with this instance's personality and explicit memories"""
+        self.state = state
+        self.personality = personality
+        self.memory = memory
+        self._directories: Dict[str, SyncDirectory] = {}
+
+        # Where each peer and shared directory was left, so syncs stay incremental across restarts
+        self.cursors_file = cursors_file or (os.path.join(os.path.dirname(state.log_path), "cursors.json")
+                                             if state.log_path else None)
+        cursors = {}
+        if self.cursors_file and os.path.exists(self.cursors_file):
+            with open(self.cursors_file) as f:
+                cursors = json.load(f)
+        self._peer_clocks: Dict[str, Dict[str, int]] = cursors.get("peers", {})
+        self._offsets: Dict[str, Dict[str, int]] = cursors.get("directories", {})
+        self._lock = threading.Lock()
+
+    @property
+    def instance_id(self) -> str:
+        return self.state.instance_id
+
+    def collect(self) -> int:
+        """Record local changes (new or forgotten memories, new events, traits) as operations"""
+        recorded = 0
+        if self.memory is not None:
+            local = {(m["key"], m["value"]): m["type"] for m in self.memory.get_explicit_memories()}
+            shared = {(m["key"], m["value"]) for m in self.state.memories()}
+            for (key, value), memory_type in local.items():
+                if (key, value) not in shared:
+                    self.state.put_memory(key, value, memory_type)
+                    recorded += 1
+            for key, value in shared - set(local):
+                self.state.forget_memory(key, value)
+                recorded += 1
+
+        if self.personality is not None:
+            since = self.state.last_event_timestamp()
+            for event in list(self.personality.personality_events):
+                if event["timestamp"] > since:
+                    self.state.add_event(event)
+                    recorded += 1
+
+            traits = {name: round(trait.value, 6) for name, trait in self.personality.traits.items()}
+            if self.state.traits().get(self.instance_id) != traits:
+                self.state.set_traits(traits)
+                recorded += 1
+        return recorded
+
+    def reconcile(self) -> int:
+        """Bring the local memory database in line with the shared memories"""
+        if self.memory is None:
+            return 0
+        changed = 0
+        local = {(m["key"], m["value"]) for m in self.memory.get_explicit_memories()}
+        shared = {(m["key"], m["value"]): m for m in self.state.memories()}
+        for (key, value), memory in shared.items():
+            if (key, value) not in local:
+                self.memory._store_explicit_memory(key, value, memory.get("type", "preference"))
+                changed += 1
+        for key, value in local - set(shared):
+            if self.state.is_known_memory(key, value):  # forgotten elsewhere
+                self.memory.remove_explicit_memory(key, value)
+                changed += 1
+        return changed
+
+    def sync_directory(self, path: str) -> Dict[str, int]:
+        """One incremental sync through a shared directory"""
+        with self._lock:
+            directory = self._directories.get(path)
+            if directory is None:
+                offsets = self._offsets.setdefault(os.path.abspath(path), {})
+                directory = self._directories[path] = SyncDirectory(path, self.instance_id, offsets)
+            recorded = self.collect()
+            merged = self.state.merge(directory.receive())
+            published = directory.publish(self.state)
+            self._save_cursors()
+            return {"recorded": recorded, "merged": len(merged), "published": published,
+                    "reconciled": self.reconcile()}
+
+    def sync_peer(self, exchange: Callable[[Dict], Dict], peer: str, batch: int = SYNC_BATCH) -> Dict[str, int]:
+        """One incremental sync with a peer; exchange(request) delivers a request and returns the reply"""
+        with self._lock:
+            recorded = self.collect()
+            sent = merged = 0
+            while True:
+                # The peer's last known clock: only what it lacks is sent
+                ops = self.state.delta(self._peer_clocks.get(peer, {}))[:batch]
+                response = exchange({"instance": self.instance_id, "clock": self.state.clock(), "ops": ops,
+                                     "limit": batch})
+                received = self.state.merge(response.get("ops", []))
+                self._peer_clocks[peer] = response.get("clock", {})
+                sent += len(ops)
+                merged += len(received)
+                if not response.get("more") and len(ops) < batch:
+                    break
+                if not received and not response.get("merged"):
+                    break  # no progress either way
+            self._save_cursors()
+            return {"recorded": recorded, "merged": merged, "published": sent, "reconciled": self.reconcile()}
+
+    def _save_cursors(self):
+        if not self.cursors_file:
+            return
+        temp_file = f"{self.cursors_file}.tmp"
+        with open(temp_file, "w") as f:
+            json.dump({"peers": self._peer_clocks, "directories": self._offsets}, f, separators=(",", ":"))
+        os.replace(temp_file, self.cursors_file)
+
+    def exchange(self, request: Dict) -> Dict:
+        """Serve a peer's sync_peer() (the daemon's POST /sync)"""
+        with self._lock:
+            self.collect()
+            response = self.state.exchange(request)
+            self.reconcile()
+            return response
+
+    def siblings(self) -> Dict[str, Dict[str, float]]:
+        """Traits of the other instances"""
+        return {instance: traits for instance, traits in self.state.traits().items()
+                if instance != self.instance_id}
+
+    def close(self):
+        self.state.close()
+
+
+def main():
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from core.ai_brain import GRKKMAI
+
+    parser = argparse.ArgumentParser(description="Synchronize this GRKKMAI instance with its siblings")
+    parser.add_argument("--data-dir", default="data")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--directory", help="shared sync directory")
+    target.add_argument("--daemon", help="a sibling's daemon, host:port")
+    target.add_argument("--unix-socket", help="a sibling's daemon Unix socket")
+    args = parser.parse_args()
+
+    brain = GRKKMAI(data_dir=args.data_dir)
+    if args.directory:
+        result = brain.sync.sync_directory(args.directory)
+    else:
+        from interface.daemon_client import GRKKMClient
+        if args.unix_socket:
+            client = GRKKMClient(unix_socket=args.unix_socket)
+        else:
+            host, _, port = args.daemon.rpartition(":")
+            client = GRKKMClient(host=host or "127.0.0.1", port=int(port))
+        result = client.sync(brain.sync)
+        client.close()
+
+    print(f"🔄 {brain.sync.instance_id}: recorded {result['recorded']}, sent {result['published']}, "
+          f"received {result['merged']}, memories updated {result['reconciled']}")
+    print(f"👯 Siblings: {len(brain.sync.siblings())}, shared events: {len(brain.sync.state.events())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+Lightweight per-stage latency tracing for GRKKMAI
+
+Usage:
+    from core.tracing import tracer, traced
+
+    with tracer.span("search.network"):
+        ...
+
+    @traced("db.srm.find_saved_research")
+    def find_saved_research(...): ...
+
+Tracing is off by default and then costs one attribute check per span. Turn it
+on with tracer.enable("trace.jsonl") or the GRKKM_TRACE=<path> environment
+variable; per-stage p50/p95/p99 are appended to the JSONL file by export() and
+at interpreter exit.
+"""
+
+import atexit
+import functools
+import json
+import math
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Callable, Deque, Dict, Optional
+
+
+class _NullSpan:
+    """Span used while tracing is disabled"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "started")
+
+    def __init__(self, tracer: "Tracer", name: str):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.tracer.record(self.name, time.perf_counter() - self.started)
+        return False
+
+
+def percentile(sorted_values, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class Tracer:
+    def __init__(self, max_samples: int = 10_000):
+        """Collects span durations per stage (bounded ring of samples per stage)"""
+        self.enabled = False
+        self.export_path: Optional[str] = None
+        self.max_samples = max_samples
+        self._samples: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=self.max_samples))
+        self._counts: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self._atexit_registered = False
+
+    def enable(self, export_path: Optional[str] = None):
+        self.enabled = True
+        if export_path:
+            self.export_path = export_path
+            if not self._atexit_registered:
+                atexit.register(self._export_at_exit)
+                self._atexit_registered = True
+
+    def disable(self):
+        self.enabled = False
+
+    def span(self, name: str):
+        """Context manager timing one stage (a shared no-op while disabled)"""
+        if not self.enabled:
+            return NULL_SPAN
+        return _Span(self, name)
+
+    def record(self, name: str, seconds: float):
+        """Record a duration measured elsewhere"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._samples[name].append(seconds)
+            self._counts[name] += 1
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Per-stage count and latency percentiles in milliseconds"""
+        with self._lock:
+            snapshot = {name: sorted(samples) for name, samples in self._samples.items()}
+            counts = dict(self._counts)
+
+        summary = {}
+        for name, values in sorted(snapshot.items()):
+            summary[name] = {
+                "count": counts[name],
+                "p50_ms": percentile(values, 0.50) * 1000,
+                "p95_ms": percentile(values, 0.95) * 1000,
+                "p99_ms": percentile(values, 0.99) * 1000,
+                "max_ms": (values[-1] if values else 0.0) * 1000,
+                "mean_ms": (sum(values) / len(values) if values else 0.0) * 1000
+            }
+        return summary
+
+    def export(self, path: Optional[str] = None) -> int:
+        """Append one JSONL line per stage to `path` (or the configured export path)"""
+        path = path or self.export_path
+        if not path:
+            return 0
+
+        exported_at = time.time()
+        lines = [json.dumps(dict(stage=name, exported_at=exported_at, **stats))
+                 for name, stats in self.summary().items()]
+        if lines:
+            with open(path, "a") as f:
+                f.write("\n".join(lines) + "\n")
+        return len(lines)
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+
+    def _export_at_exit(self):
+        try:
+            self.export()
+        except OSError as e:
+            print(f"⚠️ Could not export trace: {e}")
+
+
+tracer = Tracer()
+
+if os.environ.get("GRKKM_TRACE"):
+    tracer.enable(os.environ["GRKKM_TRACE"])
+
+
+def traced(name: str) -> Callable:
+    """Decorator recording every call of a function as a span"""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                tracer.record(name, time.perf_counter() - started)
+        return wrapper
+    return decorator
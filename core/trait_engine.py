@@ -0,0 +1,209 @@
+"""
+Array-backed trait engine for batch personality evolution
+
+GRKKMAIPersonality evolves one trait at a time per interaction. TraitEngine
+keeps the same state as columns (value, base and rate per trait; one value
+per mood factor) and applies thousands of interactions in a single step, for
+long-horizon simulations and history replays.
+
+Uses NumPy when it is installed; without it the same rules run as a plain
+Python loop (with its own random stream, and slower).
+"""
+
+import random
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+# NumPy is optional, and only imported once a TraitEngine is created (it
+# would add ~10 MB to every chat process otherwise)
+np = None
+_numpy_checked = False
+
+# How much each interaction nudges a trait (before the trait's own rate and
+# the random 0.5x-1.5x modifier). Effects are non-negative, so the only bound
+# a trait can reach is 1.0
+TRAIT_EFFECTS: Dict[str, Dict[str, float]] = {
+    "question_asked": {"curiosity": 0.02},
+    "learned_something": {"curiosity": 0.01, "enthusiasm": 0.015},
+    "helped_user": {"loyalty": 0.01, "empathy": 0.015},
+    "playful_conversation": {"playfulness": 0.01, "enthusiasm": 0.01},
+    "philosophical_discussion": {"independence": 0.02},
+    "emotional_support": {"empathy": 0.02, "loyalty": 0.01},
+}
+
+# Mood boosts per interaction. Moods decay with time, not per interaction
+# (see decay_mood), so a batch of interactions only applies boosts
+MOOD_BOOSTS: Dict[str, Dict[str, float]] = {
+    "learned_something": {"learning_excitement": 0.1, "curiosity_satisfaction": 0.05},
+    "social_interaction": {"social_fulfillment": 0.08},
+    "helped_user": {"current_energy": 0.1},
+}
+MOOD_FLOOR = 0.1
+MOOD_HALF_LIFE = 3 * 3600.0  # seconds for a mood to fall halfway back to the floor
+
+SPEECH_EFFECTS: Dict[str, Dict[str, float]] = {
+    "philosophical_discussion": {"philosophical_tendency": 0.02},
+}
+
+# A trait change bigger than this counts as an evolution event
+EVOLUTION_THRESHOLD = 0.001
+
+Interaction = Union[str, Tuple[str, Dict]]
+
+
+def load_numpy():
+    """The numpy module, or None if it is not installed"""
+    global np, _numpy_checked
+    if not _numpy_checked:
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            pass
+        _numpy_checked = True
+    return np
+
+
+def decay_mood(value: float, elapsed: float, half_life: float = MOOD_HALF_LIFE) -> float:
+    """A mood value `elapsed` seconds after it was set (exponential decay toward MOOD_FLOOR)"""
+    if elapsed <= 0 or value <= MOOD_FLOOR:
+        return value
+    return MOOD_FLOOR + (value - MOOD_FLOOR) * 0.5 ** (elapsed / half_life)
+
+
+@dataclass
+class BatchEvolution:
+    """What a batch of interactions did"""
+    interactions: int
+    evolved: List[int]                # indices of the interactions that changed a trait
+    trait_changes: Dict[str, float]   # net change per trait
+    touched: List[str]                # traits that any interaction nudged
+
+
+class TraitEngine:
+    def __init__(self, traits: Dict, mood: Dict[str, float], speech: Optional[Dict[str, float]] = None,
+                 seed: Optional[int] = None, vectorized: Optional[bool] = None):
+        """Copy trait, mood and speech state into columns (traits need value, base_value, evolution_rate)"""
+        numpy_available = load_numpy() is not None
+        if vectorized and not numpy_available:
+            raise ImportError("numpy is not installed")
+        self.vectorized = numpy_available if vectorized is None else vectorized
+
+        self.trait_names = list(traits)
+        self.mood_names = list(mood)
+        self.speech = dict(speech or {})
+        self._trait_index = {name: i for i, name in enumerate(self.trait_names)}
+        self._mood_index = {name: i for i, name in enumerate(self.mood_names)}
+
+        # One row per interaction type; the last row (no effect) is for unknown types
+        self.kinds = list(dict.fromkeys([*TRAIT_EFFECTS, *MOOD_BOOSTS, *SPEECH_EFFECTS]))
+        self._kind_index = {kind: i for i, kind in enumerate(self.kinds)}
+        trait_effects = [self._row(TRAIT_EFFECTS.get(kind, {}), self._trait_index) for kind in self.kinds]
+        mood_boosts = [self._row(MOOD_BOOSTS.get(kind, {}), self._mood_index) for kind in self.kinds]
+        trait_effects.append([0.0] * len(self.trait_names))
+        mood_boosts.append([0.0] * len(self.mood_names))
+
+        values = [traits[name].value for name in self.trait_names]
+        bases = [traits[name].base_value for name in self.trait_names]
+        rates = [traits[name].evolution_rate for name in self.trait_names]
+        moods = [mood[name] for name in self.mood_names]
+
+        if self.vectorized:
+            self._rng = np.random.default_rng(seed)
+            self.values = np.array(values, dtype=np.float64)
+            self.bases = np.array(bases, dtype=np.float64)
+            self.rates = np.array(rates, dtype=np.float64)
+            self.mood = np.array(moods, dtype=np.float64)
+            self._trait_effects = np.array(trait_effects, dtype=np.float64).reshape(-1, len(values))
+            self._mood_boosts = np.array(mood_boosts, dtype=np.float64).reshape(-1, len(moods))
+        else:
+            self._rng = random.Random(seed)
+            self.values, self.bases, self.rates, self.mood = values, bases, rates, moods
+            self._trait_effects, self._mood_boosts = trait_effects, mood_boosts
+
+    @classmethod
+    def from_personality(cls, personality, seed: Optional[int] = None,
+                         vectorized: Optional[bool] = None) -> "TraitEngine":
+        return cls(personality.traits, personality.current_mood(), personality.speech_patterns, seed, vectorized)
+
+    @staticmethod
+    def _row(effects: Dict[str, float], index: Dict[str, int]) -> List[float]:
+        row = [0.0] * len(index)
+        for name, amount in effects.items():
+            if name in index:
+                row[index[name]] = amount
+        return row
+
+    def trait_values(self) -> Dict[str, float]:
+        return {name: float(value) for name, value in zip(self.trait_names, self.values)}
+
+    def mood_values(self) -> Dict[str, float]:
+        return {name: float(value) for name, value in zip(self.mood_names, self.mood)}
+
+    def evolve_many(self, interactions: Iterable[Interaction]) -> BatchEvolution:
+        """Apply interactions (types, or (type, context) pairs) in order, in one step"""
+        kinds = [item if isinstance(item, str) else item[0] for item in interactions]
+        if not kinds:
+            return BatchEvolution(0, [], {name: 0.0 for name in self.trait_names}, [])
+
+        unknown = len(self.kinds)
+        rows = [self._kind_index.get(kind, unknown) for kind in kinds]
+        before = self.trait_values()
+
+        if self.vectorized:
+            evolved, touched = self._evolve_arrays(np.array(rows, dtype=np.intp))
+        else:
+            evolved, touched = self._evolve_lists(rows)
+
+        for kind, count in self._count(kinds).items():
+            for name, amount in SPEECH_EFFECTS.get(kind, {}).items():
+                if name in self.speech:
+                    self.speech[name] = min(1.0, self.speech[name] + amount * count)
+
+        after = self.trait_values()
+        return BatchEvolution(len(kinds), evolved, {name: after[name] - before[name] for name in after},
+                              [self.trait_names[i] for i in touched])
+
+    @staticmethod
+    def _count(kinds: Sequence[str]) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for kind in kinds:
+            counts[kind] = counts.get(kind, 0) + 1
+        return counts
+
+    def _evolve_arrays(self, rows) -> Tuple[List[int], List[int]]:
+        effects = self._trait_effects[rows]
+        modifiers = self._rng.uniform(0.5, 1.5, size=effects.shape)
+        increments = effects * modifiers * self.rates
+
+        # Increments are non-negative, so clamping the running sum at 1.0 gives
+        # exactly the per-interaction clamped values
+        trajectory = np.minimum(1.0, self.values + np.cumsum(increments, axis=0))
+        previous = np.vstack((self.values, trajectory[:-1]))
+        evolved = np.flatnonzero((np.abs(trajectory - previous) > EVOLUTION_THRESHOLD).any(axis=1))
+        touched = np.flatnonzero(effects.any(axis=0))
+        self.values = trajectory[-1].copy()
+
+        # Boosts are non-negative too
+        self.mood = np.minimum(1.0, self.mood + self._mood_boosts[rows].sum(axis=0))
+        return evolved.tolist(), touched.tolist()
+
+    def _evolve_lists(self, rows: List[int]) -> Tuple[List[int], List[int]]:
+        evolved = []
+        touched = set()
+        values, mood, rates = self.values, self.mood, self.rates
+        for position, row in enumerate(rows):
+            changed = False
+            for i, effect in enumerate(self._trait_effects[row]):
+                if effect:
+                    old = values[i]
+                    values[i] = min(1.0, old + effect * self._rng.uniform(0.5, 1.5) * rates[i])
+                    changed |= abs(values[i] - old) > EVOLUTION_THRESHOLD
+                    touched.add(i)
+            if changed:
+                evolved.append(position)
+            for i, boost in enumerate(self._mood_boosts[row]):
+                if boost:
+                    mood[i] = min(1.0, mood[i] + boost)
+        return evolved, sorted(touched)
+
@@ -0,0 +1,203 @@
+"""
+Non-interactive batch mode for the chat CLI
+
+Reads messages from stdin or a file, one per line: plain text (every line is
+its own conversation) or JSON, {"message": ..., "session_id": ..., "id": ...},
+where lines with the same session_id form one conversation, answered in
+order. Conversations run in parallel on a worker pool; every answer is
+written as a JSON line, in completion order, with "line" pointing back at the
+input. Search results are saved or not according to a consent policy instead
+of a prompt.
+"""
+
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, IO, Iterable, List, Optional
+
+from core.metrics import ERRORS
+
+# Consent policy -> the answer given to the save question
+CONSENT_POLICIES = {"decline": "no", "save": "yes", "ignore": None}
+
+
+@dataclass
+class BatchItem:
+    line: int
+    session_id: str
+    message: str
+    id: Any = None
+
+
+@dataclass
+class BatchReport:
+    messages: int
+    conversations: int
+    errors: int
+    saved: int
+    seconds: float
+    latencies: List[float]
+    interrupted: bool = False
+
+    @property
+    def throughput(self) -> float:
+        return self.messages / self.seconds if self.seconds else 0.0
+
+    def percentile(self, fraction: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def summary(self) -> str:
+        prefix = "⚠️ Interrupted after" if self.interrupted else "📦"
+        return (f"{prefix} {self.messages} messages in {self.conversations} conversations, {self.errors} errors, "
+                f"{self.saved} saved searches: {self.seconds:.2f}s, {self.throughput:.1f} messages/sec "
+                f"(latency p50 {self.percentile(0.5) * 1000:.0f} ms, p95 {self.percentile(0.95) * 1000:.0f} ms)")
+
+
+def read_items(lines: Iterable[str]) -> List[BatchItem]:
+    """Parse the input lines (blank lines are skipped)"""
+    items = []
+    for number, line in enumerate(lines, 1):
+        text = line.strip()
+        if not text:
+            continue
+        if text.startswith("{"):
+            try:
+                data = json.loads(text)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"line {number}: {e}") from None
+            if not isinstance(data.get("message"), str):
+                raise ValueError(f"line {number}: \"message\" must be a string")
+            session_id = str(data.get("session_id") or f"batch-{number}")
+            items.append(BatchItem(number, session_id, data["message"], data.get("id")))
+        else:
+            items.append(BatchItem(number, f"batch-{number}", text))
+    return items
+
+
+class LocalBackend:
+    def __init__(self, manager):
+        """Sessions of an in-process SessionManager"""
+        self.manager = manager
+
+    def turn(self, session_id: str, message: str) -> Dict:
+        response = self.manager.think(session_id, message)
+        session = self.manager.get(session_id)
+        pending = session.pending_save
+        return {"response": response, "pending_save": pending is not None,
+                "metrics": session.last_turn_metrics}
+
+    def consent(self, session_id: str, choice: str) -> Optional[str]:
+        return self.manager.process_save_consent(session_id, choice)
+
+    def end(self, session_id: str):
+        self.manager.end_session(session_id)
+
+
+class RemoteBackend:
+    def __init__(self, client_factory):
+        """Sessions on a daemon; one keep-alive connection per worker thread"""
+        self.client_factory = client_factory
+        self._local = threading.local()
+
+    def _client(self, session_id: str):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.client_factory()
+        client.session_id = session_id
+        return client
+
+    def turn(self, session_id: str, message: str) -> Dict:
+        data = self._client(session_id).think(message)
+        return {"response": data["response"], "pending_save": bool(data.get("pending_save")),
+                "metrics": data.get("metrics")}
+
+    def consent(self, session_id: str, choice: str) -> Optional[str]:
+        from interface.daemon_client import DaemonError
+        try:
+            return self._client(session_id).consent(choice)
+        except DaemonError:
+            return None
+
+    def end(self, session_id: str):
+        self._client(session_id).end_session()
+
+
+class BatchRunner:
+    def __init__(self, backend, output: IO[str], consent: str = "decline", workers: int = 4):
+        """Answer batches of messages over a backend (LocalBackend or RemoteBackend)"""
+        if consent not in CONSENT_POLICIES:
+            raise ValueError(f"unknown consent policy {consent!r}, expected one of {', '.join(CONSENT_POLICIES)}")
+        self.backend = backend
+        self.output = output
+        self.consent_choice = CONSENT_POLICIES[consent]
+        self.workers = max(1, workers)
+        self._write_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._latencies: List[float] = []
+        self._errors = 0
+        self._saved = 0
+
+    def run(self, items: List[BatchItem]) -> BatchReport:
+        conversations: "OrderedDict[str, List[BatchItem]]" = OrderedDict()
+        for item in items:
+            conversations.setdefault(item.session_id, []).append(item)
+
+        started = time.perf_counter()
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="grkkm-batch")
+        interrupted = False
+        try:
+            for future in [executor.submit(self._conversation, turns) for turns in conversations.values()]:
+                future.result()
+        except KeyboardInterrupt:
+            interrupted = True
+        finally:
+            # Ctrl-C: drop the conversations that have not started yet
+            executor.shutdown(wait=True, cancel_futures=True)
+            self.output.flush()
+
+        return BatchReport(messages=len(self._latencies), conversations=len(conversations), errors=self._errors,
+                           saved=self._saved, seconds=time.perf_counter() - started, latencies=self._latencies,
+                           interrupted=interrupted)
+
+    def _conversation(self, turns: List[BatchItem]):
+        for item in turns:
+            self._answer(item)
+        try:
+            self.backend.end(turns[0].session_id)
+        except Exception as e:
+            print(f"⚠️ Could not end session {turns[0].session_id}: {e}", file=sys.stderr)
+
+    def _answer(self, item: BatchItem):
+        record = {"line": item.line, "session_id": item.session_id}
+        if item.id is not None:
+            record["id"] = item.id
+
+        started = time.perf_counter()
+        saved = False
+        try:
+            turn = self.backend.turn(item.session_id, item.message)
+            record["response"] = turn["response"]
+            if turn["pending_save"] and self.consent_choice is not None:
+                record["consent"] = self.backend.consent(item.session_id, self.consent_choice)
+                saved = self.consent_choice == "yes" and record["consent"] is not None
+            record["metrics"] = turn["metrics"]
+        except Exception as e:
+            ERRORS.inc(component="batch")
+            record["error"] = f"{type(e).__name__}: {e}"
+        elapsed = time.perf_counter() - started
+        record["seconds"] = round(elapsed, 6)
+
+        with self._stats_lock:
+            self._latencies.append(elapsed)
+            self._errors += "error" in record
+            self._saved += saved
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._write_lock:
+            self.output.write(line + "\n")
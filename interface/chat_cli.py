@@ -1,25 +1,82 @@
 """
 GRKKMAI Chat Interface - Command-line Version
+
+    python interface/chat_cli.py                               interactive chat
+    python interface/chat_cli.py --batch messages.txt --workers 8 --consent save > answers.jsonl
 """
 
+import argparse
+import asyncio
+import contextlib
 import os
+import signal
 import sys
+import threading
 from datetime import datetime
+from typing import Optional
 
 # Adding parent dir so modules can be imported
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from core.ai_brain import GRKKMAI
+from core.metrics import ERRORS
+from core.profiling import PROFILE_MODES, TurnProfiler, perf_snapshot
+from core.tracing import tracer
+from core.sessions import SessionManager
+from interface.batch import CONSENT_POLICIES, BatchRunner, LocalBackend, RemoteBackend, read_items
+from interface.daemon_client import GRKKMClient, RemoteGRKKMAI
+
+
+SPINNER_INTERVAL = 0.1
+# After Ctrl-C, how long to wait for the partial answer before giving the prompt back
+CANCEL_GRACE = 2.0
+
+
+class Spinner:
+    FRAMES = "⠋⠙⠹⠸⠼⠴⠦⠧⠇⠏"
+
+    def __init__(self, stream=None):
+        """Status text drawn in place after the cursor (only on a terminal)"""
+        self.stream = stream or sys.stdout
+        self.enabled = self.stream.isatty()
+        self._frame = 0
+        self._width = 0
+
+    def draw(self, text: str):
+        if not self.enabled:
+            return
+        status = f"{self.FRAMES[self._frame % len(self.FRAMES)]} {text}"
+        self._frame += 1
+        # Overwrite the previous status, then move back so the answer starts where the status did
+        padding = " " * max(0, self._width - len(status))
+        self.stream.write(status + padding + "\b" * (len(status) + len(padding)))
+        self.stream.flush()
+        self._width = len(status)
+
+    def clear(self):
+        if self._width:
+            self.stream.write(" " * self._width + "\b" * self._width)
+            self.stream.flush()
+            self._width = 0
 
 
 class GRKKMCLI:
-    def __init__(self):
+    def __init__(self, client: Optional[GRKKMClient] = None, speculative_lookup: bool = False):
         print("🤖 Starting up Gurukukomi Chat Interface...")
         print("="*50)
+        # /profile: profiles the next turns; the stdin reader is never part of one
+        self.profiler = TurnProfiler(ignore_threads=("grkkm-stdin",))
 
         try:
-            # Full system initialization - GRKKMAI handles all subsystems internally
-            self.ai = GRKKMAI()
+            if client:
+                # Thin client: a running daemon does the thinking and keeps the warm caches
+                client.health()
+                self.ai = RemoteGRKKMAI(client)
+                print("🛰️ Connected to the Gurukukomi daemon.")
+            else:
+                # GRKKMAI builds its subsystems lazily; warm them up in the background
+                # while the user reads the welcome message and types
+                self.ai = GRKKMAI(warm_up=True, speculative_lookup=speculative_lookup)
             
             print("="*50)
             print("✅ Gurukukomi is ready for interaction!")
@@ -32,11 +89,34 @@ class GRKKMCLI:
     def start_chat(self):
         """Start the main chat loop"""
         self.print_welcome()
+        try:
+            asyncio.run(self._chat_loop())
+        except KeyboardInterrupt:
+            print("\n\n👋 Goodbye! Thanks for chatting with Gurukukomi!")
+
+    async def _chat_loop(self):
+        """Read lines in the background (so the next message can be typed early) and answer them in order"""
+        loop = asyncio.get_running_loop()
+        self._lines: asyncio.Queue = asyncio.Queue()
+        self._turn: Optional[threading.Event] = None      # cancel event of the turn in flight
+        self._abandon = asyncio.Event()
+        self._background: Optional[asyncio.Future] = None  # an abandoned turn that is still finishing
+        threading.Thread(target=self._read_lines, args=(loop,), name="grkkm-stdin", daemon=True).start()
+        try:
+            loop.add_signal_handler(signal.SIGINT, self._interrupt)
+        except (NotImplementedError, RuntimeError):
+            pass  # no loop signal handlers (Windows): Ctrl-C ends the chat as before
 
         while True:
-            try:
-                user_input = input("\n👤 You: ").strip()
+            user_input = await self._next_line("\n👤 You: ")
+            if user_input is None:
+                print("\n\n👋 Chat ended. Bye, bye!")
+                break
+            if user_input is KeyboardInterrupt:
+                print("\n\n👋 Goodbye! Thanks for chatting with Gurukukomi!")
+                break
 
+            try:
                 # Handle special commands
                 if self.handle_special_commands(user_input):
                     continue
@@ -45,43 +125,128 @@ class GRKKMCLI:
                 if not user_input:
                     continue
 
-                # Get AI response
-                print("\n🤖 Gurukukomi: ", end="", flush=True)
-                response = self.ai.think(user_input)
-                print(response)
+                # Get AI response, printing each section as soon as it is ready
+                if not await self._respond(user_input):
+                    continue
 
                 # Handle consent for saving search results
-                if (self.ai.search_memory and 
-                    self.ai.advanced_search and 
-                    getattr(self.ai.advanced_search, "_pending_save", None)):
-                    
-                    # Store pending_save in a variable to avoid type errors
-                    pending = self.ai.advanced_search._pending_save
-                    
-                    # Only proceed if pending is actually a dict
-                    if pending and isinstance(pending, dict):
-                        choice = input("\n💾 Your choice: ").strip()
-                        consent_response = self.ai.search_memory.process_save_consent(
-                            choice,
-                            pending["query"],
-                            pending["results"],
-                            pending["topic"]
-                        )
-                        print(consent_response)
-                        # Clear pending save
-                        self.ai.advanced_search._pending_save = None
-
-
-            except KeyboardInterrupt:
-                print("\n\n👋 Goodbye! Thanks for chatting with Gurukukomi!")
-                break
-            except EOFError:
-                print("\n\n👋 Chat ended. Bye, bye!")
-                break
+                pending = self.ai.pending_save
+                if pending and isinstance(pending, dict) and self.ai.search_memory:
+                    choice = await self._next_line("\n💾 Your choice: ")
+                    if not isinstance(choice, str):
+                        choice = "no"
+                    consent_response = self.ai.search_memory.process_save_consent(
+                        choice,
+                        pending["query"],
+                        pending["results"],
+                        pending["topic"]
+                    )
+                    print(consent_response)
+                    # Clear pending save
+                    self.ai.pending_save = None
+                    self.ai.invalidate_stats()
+
             except Exception as e:
+                ERRORS.inc(component="cli")
                 print(f"\n❌ Error: {e}")
                 print("Let's keep chatting though!")
 
+    def _read_lines(self, loop: asyncio.AbstractEventLoop):
+        """stdin reader thread: every line goes to the queue, None at the end"""
+        for line in sys.stdin:
+            loop.call_soon_threadsafe(self._lines.put_nowait, line.rstrip("\n"))
+        loop.call_soon_threadsafe(self._lines.put_nowait, None)
+
+    async def _next_line(self, prompt: str):
+        """The next typed line (stripped), None at end of input, KeyboardInterrupt on Ctrl-C"""
+        typed_ahead = not self._lines.empty()
+        print(prompt, end="", flush=True)
+        line = await self._lines.get()
+        if typed_ahead and isinstance(line, str):
+            print(line)  # echo what was typed during the previous answer
+        return line.strip() if isinstance(line, str) else line
+
+    def _interrupt(self):
+        """Ctrl-C: cancel the search in flight (twice: stop waiting for it), or quit at the prompt"""
+        if self._turn is None:
+            self._lines.put_nowait(KeyboardInterrupt)
+        elif not self._turn.is_set():
+            self._turn.set()
+        else:
+            self._abandon.set()
+
+    async def _respond(self, user_input: str) -> bool:
+        """Answer one message with a spinner; False if the answer was abandoned"""
+        loop = asyncio.get_running_loop()
+        spinner = Spinner()
+        started = loop.time()
+
+        # An abandoned turn shares the conversation state: let it finish first
+        while self._background is not None and not self._background.done():
+            spinner.draw(f"finishing the previous search… {loop.time() - started:.1f}s")
+            await asyncio.wait({self._background}, timeout=SPINNER_INTERVAL)
+        spinner.clear()
+        self._background = None
+
+        cancel = threading.Event()
+        sections: asyncio.Queue = asyncio.Queue()
+
+        profiling = self.profiler.active
+
+        def produce():
+            try:
+                with self.profiler.turn():
+                    for section in self.ai.think_stream(user_input, cancel=cancel):
+                        loop.call_soon_threadsafe(sections.put_nowait, section)
+            except Exception as e:
+                loop.call_soon_threadsafe(sections.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(sections.put_nowait, None)
+
+        print("\n🤖 Gurukukomi: ", end="", flush=True)
+        self._turn, cancelled_at = cancel, None
+        self._abandon.clear()
+        worker = loop.run_in_executor(None, produce)
+        try:
+            count = 0
+            while True:
+                getter = asyncio.ensure_future(sections.get())
+                while True:
+                    # No spinner when the next section is already there
+                    await asyncio.wait({getter}, timeout=SPINNER_INTERVAL)
+                    if getter.done():
+                        break
+                    if cancel.is_set() and cancelled_at is None:
+                        cancelled_at = loop.time()
+                    if cancelled_at is not None and (self._abandon.is_set()
+                                                     or loop.time() - cancelled_at > CANCEL_GRACE):
+                        getter.cancel()
+                        spinner.clear()
+                        print("\n⏳ Stopped waiting; the search finishes in the background.")
+                        self._background = worker
+                        return False
+                    elapsed = loop.time() - started
+                    queued = self._lines.qsize()
+                    spinner.draw(("cancelling… " if cancel.is_set() else "") + f"{elapsed:.1f}s"
+                                 + (f" · {queued} queued" if queued else ""))
+                spinner.clear()
+
+                section = getter.result()
+                if section is None:
+                    break
+                if isinstance(section, Exception):
+                    raise section
+                print(section if count == 0 else f"\n\n{section}", end="", flush=True)
+                count += 1
+            print()
+            if profiling and not self.profiler.active:
+                print("\n🔬 Profiling finished:")
+                self.print_profile()
+            return True
+        finally:
+            spinner.clear()
+            self._turn = None
+
     def handle_special_commands(self, user_input):
         """Handle special chat commands"""
         command = user_input.lower().strip()
@@ -101,6 +266,21 @@ class GRKKMCLI:
             self.print_stats()
             return True
 
+        # Metrics
+        elif command in ["/metrics", "metrics"]:
+            self.print_metrics()
+            return True
+
+        # Live performance figures
+        elif command in ["/perf", "perf"]:
+            self.print_perf()
+            return True
+
+        # Profiler
+        elif command == "/profile" or command.startswith("/profile "):
+            self.handle_profile_command(command.split()[1:])
+            return True
+
         # Memory
         elif command in ["/memory", "memory", "what do you remember"]:
             self.print_memory_info()
@@ -144,6 +324,12 @@ class GRKKMCLI:
         print("/memory      - Show what I remember")
         print("/personality - Show my current mood")
         print("/saved       - Show saved research topics")
+        print("/metrics     - Show a metrics snapshot")
+        print("/perf        - Show stage latencies, cache hit rates, queues and memory")
+        print("/profile on [TURNS] [sample] - Profile the next turns (cProfile: answering thread only;")
+        print("                               sample: every busy thread, searches included)")
+        print("/profile off - Stop profiling")
+        print("/profile dump [N] - Show the top N functions profiled so far")
         print("/clear       - Clear the screen")
         print("-"*40)
 
@@ -153,37 +339,100 @@ class GRKKMCLI:
         print("-"*40)
 
         # Basic conversation count
-        if hasattr(self.ai, 'conversation_history'):
-            total_exchanges = len([msg for msg in self.ai.conversation_history if "user" in msg])
-            print(f"💬 Total conversations: {total_exchanges}")
+        print(f"💬 Total conversations: {self.ai.get_conversation_count()}")
 
-        # Memory stats
-        if self.ai.memory:
-            try:
-                memory_stats = self.ai.memory.get_memory_stats()
-                print(f"💾 Memories stored: {memory_stats.get('memories_stored', 0)}")
-                print(f"🗣️ Conversations today: {memory_stats.get('conversations_today', 0)}")
-            except Exception as e:
-                print(f"💾 Memory stats unavailable: {e}")
+        # Memory, personality and search memory, from one snapshot
+        try:
+            stats = self.ai.stats_snapshot()
+        except Exception as e:
+            print(f"📊 Stats unavailable: {e}")
+            print("-"*40)
+            return
 
-        # Personality stats
-        if self.ai.personality:
-            try:
-                personality_summary = self.ai.personality.get_personality_summary()
-                dominant_traits = personality_summary.get('dominant_traits', [])
-                if dominant_traits:
-                    print(f"🎭 Top personality traits: {', '.join(dominant_traits[:3])}")
-            except Exception as e:
-                print(f"🎭 Personality stats unavailable: {e}")
+        if stats.memory:
+            print(f"💾 Memories stored: {stats.memory.memories_stored}")
+            print(f"🗣️ Conversations today: {stats.memory.conversations_today}")
 
-        # Search memory stats
-        if self.ai.search_memory:
-            try:
-                search_stats = self.ai.search_memory.get_memory_stats()
-                print(f"🔍 Saved searches: {search_stats.get('saved_searches', 0)}")
-                print(f"📚 Unique topics: {search_stats.get('unique_topics', 0)}")
-            except Exception as e:
-                print(f"🔍 Search stats unavailable: {e}")
+        if stats.personality and stats.personality.dominant_traits:
+            print(f"🎭 Top personality traits: {', '.join(stats.personality.dominant_traits[:3])}")
+
+        if stats.search:
+            print(f"🔍 Saved searches: {stats.search.saved_searches}")
+            print(f"📚 Unique topics: {stats.search.unique_topics}")
+
+        print("-"*40)
+
+    def print_metrics(self):
+        """Print a snapshot of the metrics registry (Prometheus text format)"""
+        print("\n📈 METRICS SNAPSHOT:")
+        print("-"*40)
+
+        try:
+            for line in self.ai.metrics_text().splitlines():
+                # Skip HELP/TYPE comments to keep the snapshot readable
+                if line and not line.startswith("#"):
+                    print(line)
+        except Exception as e:
+            print(f"❌ Metrics unavailable: {e}")
+
+        print("-"*40)
+
+    def handle_profile_command(self, args):
+        """/profile on [TURNS] [cprofile|sample], /profile off, /profile dump [N]"""
+        action = args[0] if args else "dump"
+        if isinstance(self.ai, RemoteGRKKMAI):
+            print("📡 Turns are answered by the daemon; /profile only profiles a local brain.")
+            return
+
+        if action == "on":
+            turns = next((int(arg) for arg in args[1:] if arg.isdigit()), 1)
+            mode = next((arg for arg in args[1:] if arg in PROFILE_MODES), "cprofile")
+            self.profiler.start(max(1, turns), mode)
+            print(f"🔬 Profiling the next {max(1, turns)} turn(s) with {mode}.")
+        elif action == "off":
+            self.profiler.stop()
+            print(f"🔬 Profiling stopped after {self.profiler.turns_profiled} turn(s); '/profile dump' shows them.")
+        elif action == "dump":
+            limit = int(args[1]) if len(args) > 1 and args[1].isdigit() else 20
+            self.print_profile(limit)
+        else:
+            print("❓ Usage: /profile on [TURNS] [cprofile|sample] | /profile off | /profile dump [N]")
+
+    def print_profile(self, limit: int = 20):
+        """Print the top functions of the profiled turns"""
+        print("-"*40)
+        print(self.profiler.dump(limit))
+        print("-"*40)
+
+    def print_perf(self):
+        """Print rolling stage latencies, cache hit rates, queue depths and memory use"""
+        print("\n⏱️ PERFORMANCE:")
+        print("-"*40)
+
+        if isinstance(self.ai, RemoteGRKKMAI):
+            print("📡 These figures describe this process; '/metrics' shows the daemon's.")
+
+        perf = perf_snapshot()
+        if not perf["tracing"]:
+            # Spans cost next to nothing, so start collecting from here on
+            tracer.enable()
+            print("⏱️ Stage tracing was off; it is on now, ask again after a few turns.")
+        elif not perf["stages"]:
+            print("⏱️ No stages traced yet.")
+        else:
+            print(f"{'stage':<32}{'count':>7}{'p50':>10}{'p95':>10}{'p99':>10}")
+            for stage, stats in perf["stages"].items():
+                print(f"{stage:<32}{stats['count']:>7}{stats['p50_ms']:>8.1f}ms{stats['p95_ms']:>8.1f}ms"
+                      f"{stats['p99_ms']:>8.1f}ms")
+
+        for name, cache in perf["caches"].items():
+            lookups = int(cache["hits"] + cache["misses"])
+            print(f"🎯 {name.replace('_', ' ')}: {cache['hit_rate'] * 100:.0f}% hits ({lookups} lookups)")
+        for queue, depth in perf["queues"].items():
+            print(f"📥 {queue} queue: {depth:.0f} waiting")
+        if perf["rss_bytes"] is not None:
+            print(f"🧠 Memory: {perf['rss_bytes'] / 2 ** 20:.1f} MB resident "
+                  f"(peak {perf['peak_rss_bytes'] / 2 ** 20:.1f} MB)")
 
         print("-"*40)
 
@@ -245,23 +494,21 @@ class GRKKMCLI:
         print("\n💾 SAVED RESEARCH:")
         print("-"*40)
 
-        if not self.ai.search_memory:
-            print("❌ Search memory not available")
-            return
-        
         try:
-            topics = self.ai.search_memory.get_saved_topics()
-            stats = self.ai.search_memory.get_memory_stats()
-            
-            print(f"📊 Total saved: {stats['saved_searches']} searches on {stats['unique_topics']} topics")
-            print(f"🔍 Total accessed: {stats['total_access_count']} times")
+            search = self.ai.stats_snapshot().search
+            if not search:
+                print("❌ Search memory not available")
+                return
+
+            print(f"📊 Total saved: {search.saved_searches} searches on {search.unique_topics} topics")
+            print(f"🔍 Total accessed: {search.total_access_count} times")
             print()
             
-            if topics:
+            if search.topics:
                 print("📚 Saved topics:")
-                for topic_info in topics[:10]:  # Show top 10
-                    name = topic_info['topic'][:40]
-                    count = topic_info['total_access']
+                for topic_info in search.topics[:10]:  # Show top 10
+                    name = topic_info.topic[:40]
+                    count = topic_info.total_access
                     print(f"  • {name} (accessed {count} times)")
             else:
                 print("📝 No saved research yet.")
@@ -273,10 +520,63 @@ class GRKKMCLI:
         print("-"*40)
 
 
+def run_batch(args) -> int:
+    """Batch mode: JSON lines out, progress and the throughput report on stderr"""
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        # The brain reports progress with print(); keep stdout for the JSON lines
+        with contextlib.redirect_stdout(sys.stderr):
+            if args.batch == "-":
+                items = read_items(sys.stdin)
+            else:
+                with open(args.batch, encoding="utf-8") as f:
+                    items = read_items(f)
+
+            if args.connect or args.socket:
+                backend = RemoteBackend(lambda: GRKKMClient(host=args.host, port=args.port,
+                                                            unix_socket=args.socket, user_id=args.user))
+            else:
+                backend = LocalBackend(SessionManager(GRKKMAI(speculative_lookup=args.speculative_lookup)))
+            report = BatchRunner(backend, output, consent=args.consent, workers=args.workers).run(items)
+    except (OSError, ValueError) as e:
+        print(f"❌ Batch failed: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print(report.summary(), file=sys.stderr)
+    return 1 if report.errors or report.interrupted else 0
+
+
 def main():
     """Main function to start the chat interface"""
+    parser = argparse.ArgumentParser(description="Chat with Gurukukomi")
+    parser.add_argument("--connect", action="store_true", help="use a running daemon instead of a local brain")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--socket", help="daemon Unix socket (implies --connect)")
+    parser.add_argument("--user", help="user id whose storage namespace to use (daemon with --per-user-storage)")
+    parser.add_argument("--speculative-lookup", action="store_true",
+                        help="search the web while looking up saved research, instead of after (local brain only)")
+    batch = parser.add_argument_group("batch mode")
+    batch.add_argument("--batch", nargs="?", const="-", metavar="FILE",
+                       help="answer the messages in FILE (default: stdin) as JSON lines, without prompts")
+    batch.add_argument("--output", help="write the JSON lines here instead of stdout")
+    batch.add_argument("--consent", choices=sorted(CONSENT_POLICIES), default="decline",
+                       help="what to answer when a search asks to be saved (default: decline)")
+    batch.add_argument("--workers", type=int, default=4, help="conversations answered in parallel")
+    args = parser.parse_args()
+
+    if args.batch:
+        sys.exit(run_batch(args))
+
     try:
-        cli = GRKKMCLI()
+        client = None
+        if args.connect or args.socket:
+            client = GRKKMClient(host=args.host, port=args.port, unix_socket=args.socket, user_id=args.user)
+
+        cli = GRKKMCLI(client, speculative_lookup=args.speculative_lookup)
         cli.start_chat()
     except Exception as e:
         print(f"❌ Failed to start Gurukukomi: {e}")
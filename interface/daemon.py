@@ -0,0 +1,415 @@
+"""
+GRKKMAI Daemon - long-lived asyncio server over HTTP (TCP or Unix socket)
+
+Endpoints (JSON in, JSON out):
+    POST   /think           {"session_id", "message", "stream", "user_id"}  (stream -> chunked NDJSON)
+    POST   /consent         {"session_id", "choice", "user_id"}
+    POST   /session/end     {"session_id", "user_id"}
+    GET    /stats           ?session_id=&user_id=
+    GET    /memory          ?user_id=
+    GET    /personality
+    GET    /saved           ?user_id=
+    DELETE /saved           ?topic=&user_id=
+    GET    /user/export     ?user_id=             (with --per-user-storage)
+    DELETE /user            ?user_id=             (with --per-user-storage)
+    GET    /health
+    GET    /metrics         (Prometheus text format)
+    POST   /sync            {"instance", "clock", "ops", "limit"}  (see core/sync.py)
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from http import HTTPStatus
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+# Adding parent dir so modules can be imported
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.metrics import ERRORS, QUEUE_DEPTH, registry
+from core.sessions import SessionManager
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BODY_BYTES = 1 << 20
+
+
+class HTTPError(Exception):
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class GRKKMDaemon:
+    def __init__(self, manager: Optional[SessionManager] = None, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                 unix_socket: Optional[str] = None, max_concurrency: int = 8, max_pending: int = 64,
+                 keepalive_timeout: float = 15.0):
+        """Serve think(), consent, stats and saved research to local clients"""
+        self.manager = manager or SessionManager()
+        self.host = host
+        self.port = port
+        self.unix_socket = unix_socket
+        self.max_pending = max_pending
+        self.keepalive_timeout = keepalive_timeout
+
+        # Blocking brain calls run here; the pool size is the request concurrency limit
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="grkkm-daemon")
+        self._pending = 0  # requests accepted but not finished (backpressure)
+        self.requests_served = 0
+        self.requests_rejected = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        QUEUE_DEPTH.set_function(lambda: self._pending, queue="daemon_requests")
+
+        self._routes: Dict[Tuple[str, str], Callable] = {
+            ("POST", "/consent"): self._consent,
+            ("POST", "/session/end"): self._end_session,
+            ("GET", "/stats"): self._stats,
+            ("GET", "/memory"): self._memory,
+            ("GET", "/personality"): self._personality,
+            ("GET", "/saved"): self._saved,
+            ("DELETE", "/saved"): self._delete_saved,
+            ("GET", "/user/export"): self._export_user,
+            ("DELETE", "/user"): self._delete_user,
+            ("GET", "/health"): self._health,
+            ("POST", "/sync"): self._sync,
+        }
+
+    async def start(self):
+        if self.unix_socket:
+            if os.path.exists(self.unix_socket):
+                os.unlink(self.unix_socket)
+            self._server = await asyncio.start_unix_server(self._handle_connection, path=self.unix_socket)
+            print(f"🛰️ Gurukukomi daemon listening on unix:{self.unix_socket}")
+        else:
+            self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+            print(f"🛰️ Gurukukomi daemon listening on http://{self.host}:{self.port}")
+
+    async def serve_forever(self):
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self.unix_socket and os.path.exists(self.unix_socket):
+            os.unlink(self.unix_socket)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """One client connection, any number of keep-alive requests"""
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self._read_request(reader), self.keepalive_timeout)
+                except asyncio.TimeoutError:
+                    break
+                except HTTPError as e:
+                    await self._send_json(writer, e.status, {"error": str(e)}, keep_alive=False)
+                    break
+
+                if request is None:
+                    break
+
+                method, path, query, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                keep_alive = await self._dispatch(writer, method, path, query, body, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        request_line = await reader.readline()
+        if not request_line.strip():
+            return None
+
+        try:
+            method, target, _version = request_line.decode("latin-1").split()
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "malformed request line")
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length", "0") or 0)
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "invalid Content-Length")
+        if length < 0:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "request body too large")
+        body = await reader.readexactly(length) if length else b""
+
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        return method.upper(), url.path, query, headers, body
+
+    async def _dispatch(self, writer, method: str, path: str, query: Dict, body: bytes, keep_alive: bool) -> bool:
+        # Backpressure: refuse new work instead of queueing without bound
+        if self._pending >= self.max_pending:
+            self.requests_rejected += 1
+            await self._send_json(writer, HTTPStatus.SERVICE_UNAVAILABLE, {"error": "server busy, retry later"},
+                                  keep_alive, extra_headers={"Retry-After": "1"})
+            return keep_alive
+
+        self._pending += 1
+        try:
+            payload = json.loads(body) if body else {}
+            if not isinstance(payload, dict):
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "JSON object expected")
+
+            if (method, path) == ("POST", "/think"):
+                await self._think(writer, payload, keep_alive)
+            elif (method, path) == ("GET", "/metrics"):
+                body = registry.render().encode("utf-8")
+                writer.write(self._head(HTTPStatus.OK, "text/plain; version=0.0.4", keep_alive,
+                                        {"Content-Length": str(len(body))}) + body)
+                await writer.drain()
+            else:
+                handler = self._routes.get((method, path))
+                if handler is None:
+                    raise HTTPError(HTTPStatus.NOT_FOUND, f"no route for {method} {path}")
+                result = await self._run(handler, payload, query)
+                await self._send_json(writer, HTTPStatus.OK, result, keep_alive)
+            self.requests_served += 1
+        except HTTPError as e:
+            await self._send_json(writer, e.status, {"error": str(e)}, keep_alive)
+        except json.JSONDecodeError:
+            await self._send_json(writer, HTTPStatus.BAD_REQUEST, {"error": "invalid JSON"}, keep_alive)
+        except Exception as e:
+            ERRORS.inc(component="daemon")
+            await self._send_json(writer, HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)}, keep_alive)
+        finally:
+            self._pending -= 1
+
+        return keep_alive
+
+    async def _run(self, func: Callable, *args) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def _think(self, writer, payload: Dict, keep_alive: bool):
+        session_id = str(payload.get("session_id") or "default")
+        user_id = self._user_id(payload)
+        message = str(payload.get("message") or "").strip()
+        if not message:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "message is required")
+        try:
+            await self._run(self.manager.get, session_id, user_id)
+        except ValueError as e:
+            raise HTTPError(HTTPStatus.FORBIDDEN, str(e))
+
+        if not payload.get("stream"):
+            response = await self._run(self.manager.think, session_id, message, user_id)
+            info = await self._run(self._turn_info, session_id, user_id)
+            await self._send_json(writer, HTTPStatus.OK, dict(info, response=response), keep_alive)
+            return
+
+        # Stream sections as chunked NDJSON while the brain works in a worker thread
+        loop = asyncio.get_running_loop()
+        sections: asyncio.Queue = asyncio.Queue()
+
+        def produce():
+            try:
+                for section in self.manager.think_stream(session_id, message, user_id):
+                    loop.call_soon_threadsafe(sections.put_nowait, {"section": section})
+            except Exception as e:
+                loop.call_soon_threadsafe(sections.put_nowait, {"error": str(e)})
+            finally:
+                loop.call_soon_threadsafe(sections.put_nowait, None)
+
+        producer = loop.run_in_executor(self._executor, produce)
+
+        writer.write(self._head(HTTPStatus.OK, "application/x-ndjson", keep_alive,
+                                {"Transfer-Encoding": "chunked"}))
+        try:
+            while True:
+                item = await sections.get()
+                if item is None:
+                    break
+                await self._write_chunk(writer, item)
+
+            await producer
+            await self._write_chunk(writer, dict(await self._run(self._turn_info, session_id, user_id), done=True))
+        except ConnectionError:
+            raise
+        except Exception as e:
+            # The 200 head is out: report the error inside the stream, not as a second response
+            ERRORS.inc(component="daemon")
+            await self._write_chunk(writer, {"error": str(e)})
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    def _turn_info(self, session_id: str, user_id: Optional[str]) -> Dict:
+        session = self.manager.find(session_id, user_id)
+        pending = session.pending_save if session else None
+        return {
+            "session_id": session_id,
+            "pending_save": {"query": pending["query"], "topic": pending["topic"]} if pending else None,
+            "metrics": session.last_turn_metrics if session else None
+        }
+
+    def _consent(self, payload: Dict, query: Dict) -> Dict:
+        session_id = str(payload.get("session_id") or "default")
+        try:
+            response = self.manager.process_save_consent(session_id, str(payload.get("choice", "")),
+                                                         self._user_id(payload))
+        except ValueError as e:
+            raise HTTPError(HTTPStatus.FORBIDDEN, str(e))
+        if response is None:
+            raise HTTPError(HTTPStatus.CONFLICT, "nothing waiting for save consent")
+        return {"response": response}
+
+    def _end_session(self, payload: Dict, query: Dict) -> Dict:
+        try:
+            return {"ended": self.manager.end_session(str(payload.get("session_id") or "default"),
+                                                      self._user_id(payload))}
+        except ValueError as e:
+            raise HTTPError(HTTPStatus.FORBIDDEN, str(e))
+
+    def _stats(self, payload: Dict, query: Dict) -> Dict:
+        brain = self.manager.brain
+        stats = {"sessions": self.manager.session_count(), "requests_served": self.requests_served,
+                 "requests_rejected": self.requests_rejected}
+
+        session_id = query.get("session_id")
+        if session_id:
+            # Asking for stats must not create (and so claim) the session
+            try:
+                session = self.manager.find(session_id, self._user_id(query))
+            except ValueError as e:
+                raise HTTPError(HTTPStatus.FORBIDDEN, str(e))
+            stats["conversation_count"] = brain.get_conversation_count(session) if session else 0
+        stats.update(brain.stats_snapshot(self._user_id(query)).to_dict())
+        return stats
+
+    def _memory(self, payload: Dict, query: Dict) -> Dict:
+        user_id = self._user_id(query)
+        snapshot = self.manager.brain.stats_snapshot(user_id)
+        with self.manager.brain.stores(user_id) as stores:
+            return {"memories": stores.memory.get_explicit_memories(),
+                    "stats": asdict(snapshot.memory) if snapshot.memory else {}}
+
+    def _personality(self, payload: Dict, query: Dict) -> Dict:
+        return self.manager.brain.personality.get_personality_summary()
+
+    def _saved(self, payload: Dict, query: Dict) -> Dict:
+        search = self.manager.brain.stats_snapshot(self._user_id(query)).search
+        if search is None:
+            raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, "search memory not available")
+        return {"topics": [asdict(topic) for topic in search.topics], "stats": search.totals()}
+
+    def _delete_saved(self, payload: Dict, query: Dict) -> Dict:
+        topic = query.get("topic") or payload.get("topic")
+        if not topic:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "topic is required")
+        user_id = self._user_id(query) or self._user_id(payload)
+        with self.manager.brain.stores(user_id) as stores:
+            deleted = self._search_memory(stores).delete_saved_research(topic)
+        self.manager.brain.invalidate_stats(user_id)
+        return {"deleted": deleted}
+
+    def _export_user(self, payload: Dict, query: Dict) -> Dict:
+        user_id = self._required_user_id(query)
+        try:
+            return {"user_id": user_id, "tables": self.manager.brain.namespaces.export_data(user_id)}
+        except KeyError:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"no data for user {user_id}")
+
+    def _delete_user(self, payload: Dict, query: Dict) -> Dict:
+        user_id = self._required_user_id(query)
+        return {"deleted": self.manager.delete_user(user_id)}
+
+    def _sync(self, payload: Dict, query: Dict) -> Dict:
+        if not isinstance(payload.get("ops", []), list) or not isinstance(payload.get("clock", {}), dict):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "ops must be a list and clock an object")
+        return self.manager.brain.sync.exchange(payload)
+
+    def _health(self, payload: Dict, query: Dict) -> Dict:
+        return {"status": "ok", "pending": self._pending, "sessions": self.manager.session_count()}
+
+    @staticmethod
+    def _search_memory(stores):
+        if not stores.search_memory:
+            raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, "search memory not available")
+        return stores.search_memory
+
+    @staticmethod
+    def _user_id(params: Dict) -> Optional[str]:
+        user_id = params.get("user_id")
+        return str(user_id) if user_id else None
+
+    def _required_user_id(self, params: Dict) -> str:
+        if not self.manager.brain.per_user_storage:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "per-user storage is off (start with --per-user-storage)")
+        user_id = self._user_id(params)
+        if not user_id:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "user_id is required")
+        return user_id
+
+    @staticmethod
+    def _head(status: HTTPStatus, content_type: str, keep_alive: bool,
+              extra_headers: Optional[Dict[str, str]] = None) -> bytes:
+        lines = [f"HTTP/1.1 {status.value} {status.phrase}", f"Content-Type: {content_type}",
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        lines += [f"{name}: {value}" for name, value in (extra_headers or {}).items()]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    async def _send_json(self, writer, status: HTTPStatus, payload: Any, keep_alive: bool,
+                         extra_headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload).encode("utf-8")
+        headers = dict(extra_headers or {}, **{"Content-Length": str(len(body))})
+        writer.write(self._head(status, "application/json", keep_alive, headers) + body)
+        await writer.drain()
+
+    @staticmethod
+    async def _write_chunk(writer, payload: Dict):
+        data = (json.dumps(payload) + "\n").encode("utf-8")
+        writer.write(f"{len(data):x}\r\n".encode("latin-1") + data + b"\r\n")
+        await writer.drain()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Gurukukomi daemon")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--socket", help="serve on this Unix socket instead of TCP")
+    parser.add_argument("--max-concurrency", type=int, default=8)
+    parser.add_argument("--max-pending", type=int, default=64)
+    parser.add_argument("--per-user-storage", action="store_true",
+                        help="keep each user_id's memories in a database file of its own")
+    parser.add_argument("--speculative-lookup", action="store_true",
+                        help="search the web while looking up saved research, instead of after")
+    args = parser.parse_args()
+
+    from core.ai_brain import GRKKMAI
+    manager = SessionManager(GRKKMAI(warm_up=True, per_user_storage=args.per_user_storage,
+                                     speculative_lookup=args.speculative_lookup))
+    daemon = GRKKMDaemon(manager, host=args.host, port=args.port, unix_socket=args.socket,
+                         max_concurrency=args.max_concurrency, max_pending=args.max_pending)
+    try:
+        asyncio.run(daemon.serve_forever())
+    except KeyboardInterrupt:
+        print("\n👋 Gurukukomi daemon stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""
+Thin client for a running Gurukukomi daemon
+"""
+
+import http.client
+import json
+import socket
+import threading
+import uuid
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import urlencode
+
+from core.stats import StatsSnapshot
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path: str, timeout: float = 300.0):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class DaemonError(Exception):
+    pass
+
+
+class GRKKMClient:
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765, unix_socket: Optional[str] = None,
+                 session_id: Optional[str] = None, timeout: float = 300.0, user_id: Optional[str] = None):
+        """Keep-alive connection to a Gurukukomi daemon"""
+        self.host = host
+        self.user_id = user_id
+        self.port = port
+        self.unix_socket = unix_socket
+        self.timeout = timeout
+        self.session_id = session_id or uuid.uuid4().hex
+        self._conn: Optional[http.client.HTTPConnection] = None
+
+    def _connection(self) -> http.client.HTTPConnection:
+        if self._conn is None:
+            if self.unix_socket:
+                self._conn = UnixHTTPConnection(self.unix_socket, timeout=self.timeout)
+            else:
+                self._conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        return self._conn
+
+    def _request(self, method: str, path: str, payload: Optional[Dict] = None) -> http.client.HTTPResponse:
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+
+        # The daemon may have closed an idle keep-alive connection; retry once on a fresh one
+        for attempt in range(2):
+            try:
+                conn = self._connection()
+                conn.request(method, path, body=body, headers=headers)
+                return conn.getresponse()
+            except (ConnectionError, http.client.RemoteDisconnected, http.client.CannotSendRequest):
+                self.close()
+                if attempt:
+                    raise
+        raise DaemonError("unreachable")
+
+    def _call(self, method: str, path: str, payload: Optional[Dict] = None) -> Any:
+        response = self._request(method, path, payload)
+        data = json.loads(response.read() or b"null")
+        if response.status != 200:
+            raise DaemonError(data.get("error", response.reason) if isinstance(data, dict) else response.reason)
+        return data
+
+    def think_stream(self, message: str) -> Iterator[Dict]:
+        """Yield {"section": ...} items, then a final {"done": True, ...} item"""
+        response = self._request("POST", "/think", {"session_id": self.session_id, "message": message,
+                                                    "stream": True, "user_id": self.user_id})
+        if response.status != 200:
+            data = json.loads(response.read() or b"null")
+            raise DaemonError(data.get("error", response.reason) if isinstance(data, dict) else response.reason)
+
+        while True:
+            line = response.readline()
+            if not line:
+                break
+            item = json.loads(line)
+            if "error" in item:
+                response.read()
+                raise DaemonError(item["error"])
+            yield item
+            if item.get("done"):
+                response.read()  # consume the end of the chunked body so the connection can be reused
+                break
+
+    def think(self, message: str) -> Dict:
+        return self._call("POST", "/think", {"session_id": self.session_id, "message": message,
+                                             "user_id": self.user_id})
+
+    def consent(self, choice: str) -> str:
+        return self._call("POST", "/consent", {"session_id": self.session_id, "choice": choice,
+                                               "user_id": self.user_id})["response"]
+
+    def stats(self) -> Dict:
+        return self._call("GET", "/stats?" + self._query(session_id=self.session_id))
+
+    def memory(self) -> Dict:
+        return self._call("GET", "/memory?" + self._query())
+
+    def personality(self) -> Dict:
+        return self._call("GET", "/personality")
+
+    def saved(self) -> Dict:
+        return self._call("GET", "/saved?" + self._query())
+
+    def delete_saved(self, topic: str) -> bool:
+        return self._call("DELETE", "/saved?" + self._query(topic=topic))["deleted"]
+
+    def export_user(self) -> Dict:
+        """Every row stored for this client's user_id"""
+        return self._call("GET", "/user/export?" + self._query())["tables"]
+
+    def delete_user(self) -> bool:
+        """Delete everything stored for this client's user_id"""
+        return self._call("DELETE", "/user?" + self._query())["deleted"]
+
+    def _query(self, **params) -> str:
+        if self.user_id:
+            params["user_id"] = self.user_id
+        return urlencode(params)
+
+    def metrics(self) -> str:
+        """The daemon's metrics in Prometheus text format"""
+        response = self._request("GET", "/metrics")
+        text = response.read().decode("utf-8")
+        if response.status != 200:
+            raise DaemonError(response.reason)
+        return text
+
+    def sync(self, instance_sync) -> Dict[str, int]:
+        """Synchronize a local InstanceSync with the daemon's instance"""
+        address = self.unix_socket or f"{self.host}:{self.port}"
+        return instance_sync.sync_peer(lambda request: self._call("POST", "/sync", request), peer=address)
+
+    def health(self) -> Dict:
+        return self._call("GET", "/health")
+
+    def end_session(self) -> bool:
+        return self._call("POST", "/session/end", {"session_id": self.session_id,
+                                                   "user_id": self.user_id})["ended"]
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def abort(self):
+        """Cut the connection from another thread, waking up a read blocked on it"""
+        conn = self._conn
+        sock = conn.sock if conn is not None else None
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+class _RemoteMemory:
+    def __init__(self, client: GRKKMClient):
+        self.client = client
+
+    def get_memory_stats(self) -> Dict:
+        return self.client.memory()["stats"]
+
+    def get_explicit_memories(self) -> List[Dict]:
+        return self.client.memory()["memories"]
+
+
+class _RemotePersonality:
+    def __init__(self, client: GRKKMClient):
+        self.client = client
+
+    def get_personality_summary(self) -> Dict:
+        return self.client.personality()
+
+
+class _RemoteSearchMemory:
+    def __init__(self, client: GRKKMClient):
+        self.client = client
+
+    def get_memory_stats(self) -> Dict:
+        return self.client.saved()["stats"]
+
+    def get_saved_topics(self) -> List[Dict]:
+        return self.client.saved()["topics"]
+
+    def delete_saved_research(self, topic: str) -> bool:
+        return self.client.delete_saved(topic)
+
+    def process_save_consent(self, user_response: str, query: str, search_results: Any,
+                             topic: Optional[str] = None) -> str:
+        # The daemon keeps the results of the session's pending save itself
+        return self.client.consent(user_response)
+
+
+class RemoteGRKKMAI:
+    def __init__(self, client: GRKKMClient):
+        """GRKKMAI look-alike backed by a daemon, so the CLI can run as a thin client"""
+        self.client = client
+        self.memory = _RemoteMemory(client)
+        self.personality = _RemotePersonality(client)
+        self.search_memory = _RemoteSearchMemory(client)
+        self.pending_save: Optional[Dict] = None
+        self.last_turn_metrics: Optional[Dict] = None
+
+    def think_stream(self, user_message: str, cancel: Optional[threading.Event] = None) -> Iterator[str]:
+        # The daemon cannot be interrupted mid-turn: on cancel, stop reading and
+        # drop the connection (the daemon finishes the turn on its own). A
+        # watcher cuts the connection, so a read waiting on a slow section
+        # returns at once instead of when the section arrives.
+        finished = threading.Event()
+        if cancel is not None:
+            threading.Thread(target=self._abort_on_cancel, args=(cancel, finished), name="grkkm-cancel",
+                             daemon=True).start()
+        try:
+            for item in self.client.think_stream(user_message):
+                if cancel is not None and cancel.is_set():
+                    break
+                if item.get("done"):
+                    pending = item.get("pending_save")
+                    self.pending_save = dict(pending, results=None) if pending else None
+                    self.last_turn_metrics = item.get("metrics")
+                else:
+                    yield item["section"]
+        except (OSError, http.client.HTTPException, ValueError):
+            if cancel is None or not cancel.is_set():
+                raise
+        finally:
+            finished.set()
+
+        if cancel is not None and cancel.is_set():
+            self.client.close()
+            self.pending_save = None
+
+    def _abort_on_cancel(self, cancel: threading.Event, finished: threading.Event):
+        while not finished.is_set():
+            if cancel.wait(0.05):
+                if not finished.is_set():
+                    self.client.abort()
+                return
+
+    def think(self, user_message: str, cancel: Optional[threading.Event] = None) -> str:
+        return "\n\n".join(self.think_stream(user_message, cancel))
+
+    def metrics_text(self) -> str:
+        return self.client.metrics()
+
+    def get_conversation_count(self) -> int:
+        return self.client.stats().get("conversation_count", 0)
+
+    def stats_snapshot(self) -> StatsSnapshot:
+        return StatsSnapshot.from_dict(self.client.stats())
+
+    def invalidate_stats(self, user_id: Optional[str] = None):
+        # The daemon invalidates its own snapshot after consent and deletes
+        pass